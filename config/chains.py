@@ -19,7 +19,8 @@ class Chains:
     обязательные:
 
     - name - название сети, в формате snake_case, при инициализации в класс Chains должно совпадать с именем переменной
-    - param rpc: адрес провайдера в формате https://1rpc.io/ethereum, можно взять на https://chainlist.org/
+    - param rpc: адрес провайдера в формате https://1rpc.io/ethereum, можно взять на https://chainlist.org/,
+      либо список адресов ['https://...', 'https://...'] для распределения запросов и переключения при ошибках
     - chain_id: id сети, например 1 для Ethereum, можно искать тут https://chainid.network/chains.json
 
     опциональные:
@@ -30,6 +31,10 @@ class Chains:
     - okx_name: название сети в OKX, список сетей можно получить запустив метод bot.exchanges.okx.get_chains()
     - binance_name: название сети в Binance, список сетей можно получить запустив метод bot.exchanges.binance.get_chains()
     - multiplier: множитель для увеличения комиссии, если транзакции не проходят из-за низкой комиссии, по умолчанию 1.0
+    - block_interval: среднее время блока в секундах
+    - ws_rpc: адрес websocket провайдера wss://..., если указан, ожидание газа следит за новыми блоками по подписке
+
+    is_eip1559 и block_interval можно не указывать, они берутся из config/data/chains_data.json
 
 
     """
@@ -5,6 +5,9 @@ from models.contract_raw import ContractRaw
 
 class Contracts:
     """Класс для хранения адресов контрактов и их ABI"""
+    # Multicall3 развернут по одному адресу во всех EVM сетях, abi - multicall3
+    MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+
     ARBSWAP_SWAP_FACTORY = ContractRaw(
         address='0xd394e9cc20f43d2651293756f8d320668e850f1b',
         abi_name='arbswap_swap_factory',
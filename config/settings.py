@@ -22,6 +22,16 @@ class Config:
     # формат даты в excel, не меняйте если не знаете что делаете
     date_format = '%d/%m/%Y %H:%M:%S'
 
+    # копить изменения excel в памяти и сохранять файл один раз на аккаунт, а не после каждой ячейки
+    # при аварийном завершении скрипта несохраненные изменения теряются, поэтому по умолчанию выключено
+    is_excel_buffered = False
+    # как часто сохранять накопленные изменения excel в файл, в секундах (проверяется при следующей записи)
+    excel_flush_interval = 30
+
+    # где хранить таблицы статистики (report.xlsx): 'excel' - в xlsx файле, 'sqlite' - в базе SQLite
+    # sqlite позволяет параллельным воркерам одновременно обновлять счетчики, xlsx собирается методом export_to_excel
+    statistics_backend = 'excel'
+
     # случайный порядок аккаунтов
     is_random = False  # Если True, то аккаунты будут выбираться случайно, иначе по порядку
 
@@ -31,6 +41,14 @@ class Config:
     # пауза между запуском профилей в секундах от и до
     pause_between_profile = [1, 2]
 
+    # количество профилей, которые работают одновременно, 1 - профили запускаются по очереди
+    threads = 1
+    # режим параллельной работы: 'thread' - потоки (подходит для большинства задач), 'process' - процессы
+    workers_mode = 'thread'
+    # сколько процессов подписывают транзакции при workers_mode = 'thread', 0 - подписывать в потоке воркера
+    # включите (например, по количеству ядер процессора) при массовой отправке транзакций во много потоков
+    signing_processes = 0
+
     # укажите сколько раз прокрутить все аккаунты
     cycle = 10000
     # укажите какую паузу делать перед новым циклом запуска профилей в секундах от и до
@@ -59,6 +77,59 @@ class Config:
 
     # лимит газа для метода ожидания нужного газа gas_price_wait
     gas_price_limit = 60
+    # как часто в секундах проверять газ в gas_price_wait, если у сети не указан ws_rpc для подписки на новые блоки
+    # при is_web3_proxy = True газ проверяется через прокси ожидающего аккаунта, иначе через общее подключение без прокси
+    gas_watcher_poll_interval = 5
+
+    # максимальный размер calldata одного запроса multicall в байтах, используется в onchain.get_balances
+    # уменьшите, если RPC отвечает ошибкой на большие запросы
+    multicall_max_calldata = 100_000
+
+    # начальный диапазон блоков одного запроса eth_getLogs (onchain.get_transfers, remove_approves без ключа etherscan)
+    # если RPC отвечает ошибкой на большой диапазон, диапазон автоматически уменьшается
+    logs_block_range = 10_000
+    # сколько запросов eth_getLogs отправлять одновременно при загрузке логов за большой диапазон блоков
+    logs_concurrency = 4
+
+    # отправлять независимые запросы к rpc (комиссия, баланс) одним batch запросом
+    # если rpc не поддерживает batch запросы, они автоматически отправляются по одному
+    is_rpc_batch = True
+
+    # сколько сессий подключения к rpc (rpc + прокси) держать открытыми для переиспользования соединений
+    web3_sessions_max = 50
+    # через сколько секунд без запросов закрывать сессию подключения к rpc
+    web3_session_idle_timeout = 300
+
+    # сколько запросов AsyncOnchain одновременно отправлять в один rpc
+    async_rpc_concurrency = 50
+
+    # сколько токенов держать в памяти в кэше параметров токенов (symbol, decimals)
+    # кэш также хранится в файле config/data/tokens_cache.json и не требует запросов к rpc при повторных запусках
+    token_cache_size = 10_000
+    # сколько объектов контрактов web3 хранить в памяти для каждого подключения, чтобы не разбирать abi при каждом вызове контракта
+    contract_cache_size = 1000
+
+    # через сколько секунд без новых транзакций аккаунта заново запрашивать nonce из сети, до этого nonce выдается
+    # из локального счетчика (сверка нужна, если транзакции выпали из mempool или отправлены из другого места)
+    nonce_stale_timeout = 120
+
+    # как часто проверять подтверждение отправленных транзакций в секундах
+    tx_receipt_poll_interval = 1
+    # сколько секунд ждать подтверждения транзакции, после чего считать ее неудачной
+    tx_receipt_timeout = 120
+
+    # сколько секунд комиссии сети считаются актуальными, если время блока сети неизвестно
+    # обычно комиссии обновляются раз в блок сети, все транзакции за это время используют одни и те же данные без запросов к rpc
+    fee_cache_ttl = 3
+    # перцентили чаевых (priority fee) за последние блоки для скоростей транзакций
+    fee_percentiles = {'slow': 20, 'normal': 40, 'fast': 70}
+    # скорость транзакций по умолчанию: slow, normal, fast
+    fee_speed = 'normal'
+
+    # для сетей с несколькими rpc: дублировать запрос на чтение в следующий rpc, если ответ дольше обычного (p95 задержки)
+    is_rpc_hedge = True
+    # сколько секунд не отправлять запросы в rpc после ошибки или превышения лимита запросов, если есть другие rpc
+    rpc_error_timeout = 30
 
     # id чата в телеграме, куда отправлять сообщения
     chat_id = '12345678'
@@ -84,6 +155,8 @@ class Config:
     binance_api_key = os.getenv('BINANCE_API_KEY')
     binance_secret_key = os.getenv('BINANCE_SECRET_KEY')
 
+    ETHERSCAN_API_KEY = os.getenv('ETHERSCAN_API_KEY')
+
     PATH_CONFIG = os.path.join(os.getcwd(), 'config')
     PATH_DATA = os.path.join(PATH_CONFIG, 'data')
     PATH_ABI = os.path.join(PATH_DATA, 'ABIs')
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import threading
+
+from core.json_store import JsonStore
+
+
+class ApprovalIndex:
+    """
+    Сохраненный между запусками индекс выданных approve по паре (сеть, владелец).
+
+    Для каждой пары хранится номер блока, до которого логи Approval уже просмотрены, и пары (токен, spender)
+    с ненулевым разрешением на момент последней проверки. При следующем вызове remove_approves
+    запрашиваются только логи после сохраненного блока. Отозванные разрешения удаляются из индекса:
+    новый approve создаст новый лог Approval, и пара снова попадет в индекс.
+    Индекс хранится в config/data/approvals_index.json, процессы воркеров не затирают индексы друг друга.
+
+    Examples:
+        >>> block, pairs = ApprovalIndex.get(chain.chain_id, address)
+        >>> pairs |= find_new_approvals(from_block=block + 1, to_block=latest_block)
+        >>> ApprovalIndex.set(chain.chain_id, address, latest_block, pairs)
+    """
+    _store = JsonStore('approvals_index.json', 'индекс approve')
+    _lock = threading.RLock()
+
+    @classmethod
+    def get(cls, chain_id: int, owner: str) -> tuple[int, set[tuple[str, str]]]:
+        """
+        Возвращает сохраненный индекс владельца.
+        :param chain_id: id сети
+        :param owner: адрес владельца токенов
+        :return: (последний просмотренный блок или -1, множество пар (адрес токена, адрес spender))
+        """
+        with cls._lock:
+            item = cls._store.get(cls._key(chain_id, owner))
+            if not item:
+                return -1, set()
+            return item['block'], {(token, spender) for token, spender in item['pairs']}
+
+    @classmethod
+    def set(cls, chain_id: int, owner: str, block: int, pairs: set[tuple[str, str]]) -> None:
+        """
+        Сохраняет индекс владельца.
+        :param chain_id: id сети
+        :param owner: адрес владельца токенов
+        :param block: последний просмотренный блок
+        :param pairs: пары (адрес токена, адрес spender) с ненулевым разрешением
+        """
+        with cls._lock:
+            cls._store.set(cls._key(chain_id, owner), {'block': block, 'pairs': sorted(pairs)})
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Забывает индекс в памяти, файл при следующем обращении будет прочитан заново.
+        """
+        with cls._lock:
+            cls._store.clear()
+
+    @staticmethod
+    def _key(chain_id: int, owner: str) -> str:
+        return f'{chain_id}:{owner.lower()}'
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from eth_typing import ChecksumAddress
+from loguru import logger
+from web3 import AsyncWeb3, AsyncHTTPProvider
+from web3.contract import AsyncContract
+
+from config import config, Tokens
+from core.token_cache import TokenCache
+from models.account import Account
+from models.amount import Amount
+from models.chain import Chain
+from models.contract_raw import ContractRaw, ContractCache
+from models.token import Token, TokenTypes
+from utils.utils import to_checksum, get_user_agent, prepare_proxy_http
+
+
+class AsyncOnchain:
+    """
+    Асинхронный аналог Onchain для чтения данных из блокчейна на AsyncWeb3.
+
+    Подходит для массовых проверок (балансы всех аккаунтов во всех сетях), когда тысячи запросов
+    можно держать в работе одновременно. Количество одновременных запросов к одному RPC ограничено
+    config.async_rpc_concurrency, подключения к RPC общие для всех AsyncOnchain с тем же rpc и прокси.
+
+    Examples:
+        >>> async def check(accounts):
+        ...     tasks = [AsyncOnchain(account, chain).get_balance()
+        ...              for account in accounts for chain in Chains.get_chains_list()]
+        ...     balances = await asyncio.gather(*tasks)
+        ...     await AsyncOnchain.close_all()
+        ...     return balances
+        >>> balances = asyncio.run(check(accounts))
+    """
+    # AsyncWeb3 для каждой пары (rpc, прокси), чтобы переиспользовать одну aiohttp сессию
+    _web3_instances: dict[tuple[str, str], AsyncWeb3] = {}
+    # кэш объектов контрактов для каждого общего AsyncWeb3
+    _contract_caches: dict[tuple[str, str], ContractCache] = {}
+    # ограничение одновременных запросов к каждому rpc, семафоры привязаны к циклу событий
+    _semaphores: dict[str, asyncio.Semaphore] = {}
+    _semaphores_loop: asyncio.AbstractEventLoop | None = None
+
+    def __init__(self, account: Account, chain: Chain):
+        self.account = account
+        self.chain = chain
+        self.w3 = self._prepare_w3(chain)
+        if self.account.private_key and not self.account.address:
+            self.account.address = self.w3.eth.account.from_key(self.account.private_key).address
+
+    def _prepare_w3(self, chain: Chain) -> AsyncWeb3:
+        """
+        Возвращает общий AsyncWeb3 для rpc сети и прокси аккаунта
+        :param chain: сеть
+        :return: объект AsyncWeb3
+        """
+        proxy = prepare_proxy_http(self.account.proxy) if config.is_web3_proxy else None
+        key = (chain.rpc, proxy or '')
+        if key not in self._web3_instances:
+            request_kwargs = {
+                'headers': {
+                    'User-Agent': get_user_agent(),
+                    "Content-Type": "application/json",
+                },
+            }
+            if proxy:
+                request_kwargs['proxy'] = proxy
+            self._web3_instances[key] = AsyncWeb3(AsyncHTTPProvider(chain.rpc, request_kwargs=request_kwargs))
+            self._contract_caches[key] = ContractCache(self._web3_instances[key])
+        self._contracts = self._contract_caches[key]
+        return self._web3_instances[key]
+
+    def change_chain(self, chain: Chain) -> None:
+        """
+        Изменение сети для работы с блокчейном.
+        :param chain: объект Chain новой сети
+        """
+        self.chain = chain
+        self.w3 = self._prepare_w3(chain)
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """
+        Закрывает все подключения к RPC, вызывайте в конце работы внутри того же цикла событий.
+        """
+        for w3 in cls._web3_instances.values():
+            await w3.provider.disconnect()
+        cls._web3_instances.clear()
+        cls._contract_caches.clear()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """
+        Возвращает семафор rpc текущей сети, при смене цикла событий семафоры создаются заново
+        :return: семафор
+        """
+        loop = asyncio.get_running_loop()
+        if AsyncOnchain._semaphores_loop is not loop:
+            AsyncOnchain._semaphores = {}
+            AsyncOnchain._semaphores_loop = loop
+        if self.chain.rpc not in self._semaphores:
+            self._semaphores[self.chain.rpc] = asyncio.Semaphore(config.async_rpc_concurrency)
+        return self._semaphores[self.chain.rpc]
+
+    async def _request(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет запрос к rpc с учетом ограничения одновременных запросов
+        :param request: функция без аргументов, которая возвращает корутину запроса
+        :return: результат запроса
+        """
+        async with self._get_semaphore():
+            return await request()
+
+    def _get_contract(self, contract_raw: ContractRaw) -> AsyncContract:
+        """
+        Получение инициализированного объекта контракта из кэша общего AsyncWeb3, объект создается один раз для подключения
+        :param contract_raw: объект ContractRaw
+        :return: объект контракта
+        """
+        return self._contracts.get(contract_raw)
+
+    async def _get_token_params(self, token_address: str | ChecksumAddress) -> tuple[str, int]:
+        """
+        Получение параметров токена (symbol, decimals) по адресу контракта токена через TokenCache
+        :param token_address:  адрес контракта токена
+        :return: кортеж (symbol, decimals)
+        """
+        token_contract_address = to_checksum(token_address)
+        if token_contract_address == Tokens.NATIVE_TOKEN.address:
+            return self.chain.native_token, Tokens.NATIVE_TOKEN.decimals
+
+        params = TokenCache.get(self.chain.chain_id, token_contract_address)
+        if params is not None:
+            return params
+
+        token_contract = self._get_contract(ContractRaw(token_contract_address, 'erc20', self.chain))
+        decimals, symbol = await asyncio.gather(
+            self._request(token_contract.functions.decimals().call),
+            self._request(token_contract.functions.symbol().call),
+        )
+        TokenCache.set(self.chain.chain_id, token_contract_address, symbol, decimals)
+        return symbol, decimals
+
+    async def _prepare_token(self, token: Optional[Token | str | ChecksumAddress]) -> Token:
+        """
+        Приводит токен к объекту Token текущей сети
+        :param token: объект Token, адрес контракта токена или None для нативного токена
+        :return: объект Token
+        :raises ValueError: если токен принадлежит другой сети
+        """
+        if token is None:
+            return Token(self.chain.native_token, Tokens.NATIVE_TOKEN.address, self.chain,
+                         Tokens.NATIVE_TOKEN.decimals, TokenTypes.NATIVE)
+
+        if isinstance(token, str):
+            symbol, decimals = await self._get_token_params(token)
+            return Token(symbol, token, self.chain, decimals)
+
+        if token.type_token != TokenTypes.NATIVE and token.chain != self.chain:
+            logger.error(f'Токен на другой сети {token.chain.name} проверяется в {self.chain.name}')
+            raise ValueError('Токен на другой сети')
+        return token
+
+    async def get_balance(
+            self,
+            *,
+            token: Optional[Token | str | ChecksumAddress] = None,
+            address: Optional[str | ChecksumAddress] = None
+    ) -> Amount:
+        """
+        Получение баланса кошелька в нативных или erc20 токенах, в формате Amount.
+
+        :param token: объект Token или адрес смарт контракта токена, если не указан, то нативный баланс
+        :param address: адрес кошелька, если не указан, то берется адрес аккаунта
+        :return: объект Amount с балансом
+
+        :raises ValueError: если токен принадлежит другой сети
+
+        Examples:
+            >>> balance = await onchain.get_balance()
+            >>> usdt_balance = await onchain.get_balance(token=Tokens.USDT_ARBITRUM_ONE)
+        """
+        address = to_checksum(address or self.account.address)
+        token = await self._prepare_token(token)
+
+        if token.type_token == TokenTypes.NATIVE:
+            native_balance = await self._request(lambda: self.w3.eth.get_balance(address))
+            return Amount(native_balance, wei=True)
+
+        contract = self._get_contract(token)
+        erc20_balance_wei = await self._request(contract.functions.balanceOf(address).call)
+        return Amount(erc20_balance_wei, decimals=token.decimals, wei=True)
+
+    async def _get_allowance(self, token: Token | str, spender: str | ChecksumAddress | ContractRaw) -> Amount:
+        """
+        Получение разрешенной суммы токенов на снятие
+        :param token: объект Token или адрес контракта токена
+        :param spender: адрес контракта, который получил разрешение на снятие токенов
+        :return: объект Amount с разрешенной суммой
+        """
+        if token is None or (isinstance(token, Token) and token.type_token == TokenTypes.NATIVE):
+            return Amount(0, wei=True)
+
+        token = await self._prepare_token(token)
+
+        if isinstance(spender, ContractRaw):
+            spender = spender.address
+        spender = to_checksum(spender)
+
+        contract = self._get_contract(token)
+        allowance = await self._request(contract.functions.allowance(self.account.address, spender).call)
+        return Amount(allowance, decimals=token.decimals, wei=True)
+
+    async def get_gas_price(self, gwei: bool = True) -> int | float:
+        """
+        Получение текущей ставки газа в сети.
+
+        :param gwei: если True, возвращает значение в gwei, иначе в wei
+        :return: ставка газа в gwei или wei
+
+        Examples:
+            >>> gas_price = await onchain.get_gas_price()
+        """
+        gas_price = await self._request(lambda: self.w3.eth.gas_price)
+        if gwei:
+            return gas_price / 10 ** 9
+        return gas_price
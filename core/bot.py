@@ -33,6 +33,7 @@ class Bot:
         onchain (Onchain): Модуль для работы с блокчейном
         excel (Excel): Модуль для работы с Excel таблицами
         exchanges (Exchanges): Модуль для работы с биржами
+        error (BaseException | None): Ошибка, с которой завершился бот, None если работа прошла успешно
 
     Example:
         >>> from core.bot import Bot
@@ -54,12 +55,18 @@ class Bot:
         self.metamask = Metamask(self.ads, account, self.excel)
         self.exchanges = Exchanges(account)
         self.onchain = Onchain(account, self.chain)
+        self.error: BaseException | None = None
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.ads.close_browser()
+        self.error = exc_val
+        try:
+            self.excel.flush()
+        except Exception as e:
+            logger.error(f'{self.account.profile_number} Не удалось сохранить таблицу: {e}')
         if exc_type is None:
             logger.success(
                 f'{self.account.profile_number} Аккаунт завершен успешно')
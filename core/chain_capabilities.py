@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+
+from loguru import logger
+
+from config import config
+from core.json_store import JsonStore
+from models.chain import Chain
+
+
+class ChainCapabilities:
+    """
+    Свойства сетей (поддержка EIP-1559, время блока) по chain_id без запросов к RPC.
+
+    Данные берутся из config/data/chains_data.json (выгрузка debank), а свойства, которые удалось
+    определить только запросом к RPC, сохраняются в config/data/chains_probes.json и используются
+    во всех следующих запусках. Значения, явно указанные в Chain, не перезаписываются.
+
+    Examples:
+        >>> ChainCapabilities.apply(Chains.ARBITRUM_ONE)
+        >>> print(Chains.ARBITRUM_ONE.is_eip1559, Chains.ARBITRUM_ONE.block_interval)
+    """
+    DATA_FILE = 'chains_data.json'
+
+    _capabilities: dict[int, dict] | None = None
+    _probes = JsonStore('chains_probes.json', 'результаты проверок сетей')
+    _lock = threading.RLock()
+
+    @classmethod
+    def get(cls, chain_id: int) -> dict:
+        """
+        Возвращает известные свойства сети.
+        :param chain_id: id сети
+        :return: словарь с ключами eip_1559 и block_interval, отсутствующие значения не указываются
+        """
+        with cls._lock:
+            cls._load()
+            capabilities = dict(cls._capabilities.get(chain_id, {}))
+            capabilities.update(cls._probes.get(str(chain_id), {}))
+            return capabilities
+
+    @classmethod
+    def apply(cls, chain: Chain) -> Chain:
+        """
+        Заполняет неизвестные свойства сети (is_eip1559, block_interval) из сохраненных данных.
+        :param chain: сеть
+        :return: та же сеть
+        """
+        if chain.is_eip1559 is not None and chain.block_interval is not None:
+            return chain
+
+        capabilities = cls.get(chain.chain_id)
+        if chain.is_eip1559 is None:
+            chain.is_eip1559 = capabilities.get('eip_1559')
+        if chain.block_interval is None:
+            chain.block_interval = capabilities.get('block_interval')
+        return chain
+
+    @classmethod
+    def save_probe(cls, chain: Chain, **capabilities) -> None:
+        """
+        Сохраняет свойства сети, определенные запросом к RPC, чтобы не запрашивать их в следующих запусках.
+        :param chain: сеть
+        :param capabilities: свойства сети, например eip_1559=True
+        """
+        with cls._lock:
+            probes = cls._probes.get(str(chain.chain_id), {})
+            if all(probes.get(key) == value for key, value in capabilities.items()):
+                return
+            cls._probes.set(str(chain.chain_id), {**probes, **capabilities})
+
+    @classmethod
+    def _load(cls) -> None:
+        """
+        Читает данные о сетях один раз за запуск. Вызывается под блокировкой.
+        """
+        if cls._capabilities is not None:
+            return
+
+        cls._capabilities = {}
+        for item in cls._read_json(cls.DATA_FILE, []):
+            if 'network_id' not in item:
+                continue
+            cls._capabilities[int(item['network_id'])] = {
+                key: item[key] for key in ('eip_1559', 'block_interval') if item.get(key) is not None
+            }
+
+    @classmethod
+    def _read_json(cls, name: str, default: list | dict) -> list | dict:
+        path = os.path.join(config.PATH_DATA, name)
+        if not os.path.exists(path):
+            return default
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Не удалось прочитать {path}: {e}')
+            return default
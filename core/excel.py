@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from typing import Optional
+import atexit
+import functools
+import tempfile
+import threading
+import time
+from typing import Any, Optional, Callable, TypeVar
 from datetime import datetime
 
 from loguru import logger
@@ -11,6 +16,200 @@ from openpyxl.worksheet.worksheet import Worksheet
 from config import config
 from models.account import Account
 
+T = TypeVar('T')
+
+
+class SharedWorkbook:
+    """
+    Загруженная в память таблица, общая для всех объектов Excel, которые работают с одним файлом.
+
+    Хранит саму таблицу, индексы столбцов и строк, признак несохраненных изменений и время изменения файла,
+    по которому определяется, что файл поменяли на диске. Все операции с таблицей выполняются под lock.
+    """
+
+    def __init__(self, file: str) -> None:
+        """
+        :param file: полный путь к файлу таблицы
+        """
+        self.file = file
+        self.lock = threading.RLock()
+        self.is_dirty = False
+        self.last_flush = time.monotonic()
+        self.mtime: int | None = None
+        self.table: Workbook = self._load()
+        self.sheet: Worksheet = self.table.active
+        self.build_index()
+
+    def _load(self) -> Workbook:
+        """
+        Загружает таблицу из файла, если файла нет, создает его.
+        :return: объект таблицы
+        """
+        if not os.path.exists(self.file):  # Если файл не существует, создаем его
+            table = self._create_excel()
+        else:
+            table = load_workbook(self.file)
+        self.mtime = self._get_mtime()
+        return table
+
+    def _create_excel(self) -> Workbook:
+        """
+        Создает excel файл и заполняет его стандартными заголовками.
+        :return: объект таблицы
+        """
+        table = Workbook()  # Создаем новую таблицу
+        table.active['A1'] = 'Profile Number'  # Заполняем ячейки
+        if self.file == config.PATH_EXCEL:
+            table.active['B1'] = 'Address'  # Заполняем ячейки
+            table.active['C1'] = 'Password'  # Заполняем ячейки
+            table.active['D1'] = 'Seed'  # Заполняем ячейки
+            table.active['E1'] = 'Private Key'  # Заполняем ячейки
+            table.active['F1'] = 'Proxy'  # Заполняем ячейки
+        table.save(self.file)  # Сохраняем таблицу
+        return table
+
+    def _get_mtime(self) -> int | None:
+        """
+        Возвращает время изменения файла в наносекундах или None, если файла нет.
+        :return: время изменения файла
+        """
+        try:
+            return os.stat(self.file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def is_changed_on_disk(self) -> bool:
+        """
+        Проверяет, изменили ли файл на диске после загрузки или последнего сохранения.
+        :return: True, если файл изменился
+        """
+        return self._get_mtime() != self.mtime
+
+    def reload(self) -> None:
+        """
+        Перечитывает таблицу с диска и перестраивает индексы.
+        :return: None
+        """
+        with self.lock:
+            self.table = self._load()
+            self.sheet = self.table.active
+            self.build_index()
+            self.is_dirty = False
+
+    def build_index(self) -> None:
+        """
+        Строит индексы столбцов по заголовкам и строк по номеру профиля (столбец A) и запоминает номер
+        последней строки, чтобы добавлять строки без перебора всех ячеек листа (sheet.max_row).
+        При повторяющихся значениях используется первое вхождение, как при поиске перебором.
+        :return: None
+        """
+        self.last_row = self.sheet.max_row
+        self.columns: dict[str | int, int] = {}
+        for column, value in enumerate(next(self.sheet.iter_rows(max_row=1, values_only=True), ()), start=1):
+            if value is not None:
+                self.columns.setdefault(value, column)
+
+        self.rows: dict[str, int] = {}
+        for row, (value,) in enumerate(self.sheet.iter_rows(min_row=2, max_col=1, values_only=True), start=2):
+            if value is not None:
+                self.rows.setdefault(str(value), row)
+
+    def flush(self) -> None:
+        """
+        Записывает несохраненные изменения в файл.
+        Таблица сохраняется во временный файл рядом с основным, после чего подменяет его.
+        :return: None
+        """
+        with self.lock:
+            if not self.is_dirty:
+                return
+            fd, tmp_file = tempfile.mkstemp(suffix='.xlsx', dir=os.path.dirname(self.file))
+            os.close(fd)
+            try:
+                self.table.save(tmp_file)
+                os.replace(tmp_file, self.file)
+            except Exception:
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+                raise
+            self.mtime = self._get_mtime()
+            self.is_dirty = False
+            self.last_flush = time.monotonic()
+
+
+class WorkbookRegistry:
+    """
+    Общий на процесс реестр загруженных таблиц.
+
+    Каждый файл загружается один раз, все объекты Excel получают одну и ту же SharedWorkbook.
+    Если файл изменили на диске (например, открыли и сохранили в Excel), таблица перечитывается
+    при следующем обращении.
+    """
+    _workbooks: dict[str, SharedWorkbook] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, file: str) -> SharedWorkbook:
+        """
+        Возвращает загруженную таблицу по пути к файлу, загружает ее при первом обращении.
+        :param file: полный путь к файлу таблицы
+        :return: общая таблица
+        """
+        with cls._lock:
+            workbook = cls._workbooks.get(file)
+            if workbook is None:
+                workbook = SharedWorkbook(file)
+                cls._workbooks[file] = workbook
+                return workbook
+
+        with workbook.lock:
+            if workbook.is_changed_on_disk():
+                if workbook.is_dirty:
+                    logger.warning(f'Таблица {file} изменена на диске, но в памяти есть несохраненные изменения, '
+                                   f'файл будет перезаписан')
+                else:
+                    logger.debug(f'Таблица {file} изменена на диске, перечитываем')
+                    workbook.reload()
+        return workbook
+
+    @classmethod
+    def flush_all(cls) -> None:
+        """
+        Записывает несохраненные изменения всех загруженных таблиц.
+        :return: None
+        """
+        with cls._lock:
+            workbooks = list(cls._workbooks.values())
+        for workbook in workbooks:
+            try:
+                workbook.flush()
+            except Exception as e:
+                logger.error(f'Не удалось сохранить таблицу {workbook.file}: {e}')
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Сохраняет изменения и удаляет все таблицы из реестра, следующее обращение загрузит их заново.
+        :return: None
+        """
+        cls.flush_all()
+        with cls._lock:
+            cls._workbooks.clear()
+
+
+def locked(method: Callable[..., T]) -> Callable[..., T]:
+    """
+    Декоратор для методов Excel, выполняет метод под блокировкой общей таблицы,
+    чтобы параллельные воркеры не изменяли таблицу одновременно.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: Excel, *args, **kwargs) -> T:
+        with self._workbook.lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 class Excel:
     """
@@ -18,20 +217,37 @@ class Excel:
     По стандарту создает подключение к таблице 'config/data/accounts.xlsx'.
 
     Можно создать объект отдельно от бота, передав туда аккаунт и название таблицы.
+
+    В буферизованном режиме (config.is_excel_buffered) изменения копятся в памяти и записываются
+    в файл методом flush: при переключении аккаунта, при записи, если с прошлого сохранения прошло
+    config.excel_flush_interval секунд, при завершении бота и при выходе из программы.
+
+    При загрузке таблицы строятся индексы "имя столбца -> номер столбца" и "номер профиля -> номер строки",
+    поэтому поиск столбца и строки аккаунта не перебирает таблицу.
+
+    Таблица загружается один раз на процесс через WorkbookRegistry, объекты Excel разных аккаунтов
+    работают с одной таблицей в памяти и не перечитывают файл.
     """
 
-    def __init__(self, account: Account | None = None, file: str = config.PATH_EXCEL) -> None:
+    def __init__(
+            self,
+            account: Account | None = None,
+            file: str = config.PATH_EXCEL,
+            is_buffered: Optional[bool] = None
+    ) -> None:
         """
         Инициализация класса
         :param account: объект аккаунта
         :param file: название файла excel с расширением таблицы, если не указано, берется 'accounts.xlsx'.
+        :param is_buffered: копить ли изменения в памяти до вызова flush, по умолчанию config.is_excel_buffered
         """
         self.account = account
+        self.is_buffered = config.is_excel_buffered if is_buffered is None else is_buffered
         self._file = self._get_file(file)
-        self._table = self._get_table()
-        self._sheet: Worksheet = self._table.active
+        self._workbook = WorkbookRegistry.get(self._file)
         if account:
-            self.acc_row = self._find_acc_row(str(self.account.profile_number))
+            with self._workbook.lock:
+                self.acc_row = self._find_acc_row(str(self.account.profile_number))
         else:
             self.account = Account(0)
 
@@ -42,9 +258,11 @@ class Excel:
         :param table_name: имя таблицы с расширением, например: report.xlsx
         :return: None
         """
+        self.flush()
         self._file = os.path.join(config.PATH_DATA, table_name)
-        self._table = self._get_table()
+        self._workbook = WorkbookRegistry.get(self._file)
 
+    @locked
     def connect_account(self, account: Account) -> None:
         """
         Подключает аккаунт к таблице.
@@ -66,6 +284,8 @@ class Excel:
             ...     if status == 'Work':
             ...         excel.set_cell('Status', 'Processing')
         """
+        # сохраняем изменения предыдущего аккаунта
+        self.flush()
         self.account = account
         self.acc_row = self._find_acc_row(str(self.account.profile_number))
 
@@ -78,32 +298,110 @@ class Excel:
         file = os.path.join(config.PATH_DATA, file)
         return file
 
-    def _get_table(self) -> Workbook:
+    @property
+    def _table(self) -> Workbook:
+        return self._workbook.table
+
+    @property
+    def _sheet(self) -> Worksheet:
+        return self._workbook.sheet
+
+    @property
+    def _columns(self) -> dict[str | int, int]:
+        return self._workbook.columns
+
+    @property
+    def _rows(self) -> dict[str, int]:
+        return self._workbook.rows
+
+    def _save(self) -> None:
         """
-        Получает таблицу из файла, если файла нет, создает его.
-        :return: объект таблицы
+        Сохраняет таблицу в файл. В буферизованном режиме только отмечает, что есть несохраненные изменения,
+        и записывает файл, если с последнего сохранения прошло больше config.excel_flush_interval секунд.
+        :return: None
         """
-        if not os.path.exists(self._file):  # Если файл не существует, создаем его
-            table = self._create_excel()
-        else:
-            table = load_workbook(self._file)
-        return table
+        self._workbook.is_dirty = True
+        if not self.is_buffered or time.monotonic() - self._workbook.last_flush >= config.excel_flush_interval:
+            self.flush()
 
-    def _create_excel(self) -> Workbook:
+    def flush(self) -> None:
         """
-        Создает excel файл и заполняет его стандартными заголовками.
+        Записывает несохраненные изменения в файл.
+
+        Таблица сохраняется во временный файл рядом с основным, после чего подменяет его,
+        поэтому при сбое во время записи файл не повреждается. Сохраняются изменения
+        всех объектов Excel, которые работают с этим файлом.
+
         :return: None
+
+        Examples:
+            >>> excel = Excel(file='report.xlsx', is_buffered=True)
+            >>> for account in accounts:
+            ...     excel.connect_account(account)  # изменения предыдущего аккаунта сохраняются здесь
+            ...     excel.set_cell('Status', 'Done')
+            >>> excel.flush()  # сохраняем последний аккаунт
         """
-        table = Workbook()  # Создаем новую таблицу
-        table.active['A1'] = 'Profile Number'  # Заполняем ячейки
-        if self._file == config.PATH_EXCEL:
-            table.active['B1'] = 'Address'  # Заполняем ячейки
-            table.active['C1'] = 'Password'  # Заполняем ячейки
-            table.active['D1'] = 'Seed'  # Заполняем ячейки
-            table.active['E1'] = 'Private Key'  # Заполняем ячейки
-            table.active['F1'] = 'Proxy'  # Заполняем ячейки
-        table.save(self._file)  # Сохраняем таблицу
-        return table
+        self._workbook.flush()
+
+    @classmethod
+    def flush_all(cls) -> None:
+        """
+        Записывает несохраненные изменения всех загруженных таблиц.
+        :return: None
+        """
+        WorkbookRegistry.flush_all()
+
+    def _update_index(self, row: int, column: int, old_value: Any, value: Any) -> None:
+        """
+        Обновляет индексы после записи в ячейку заголовка или номера профиля, не перестраивая их целиком.
+        Ключ старого значения удаляется, если указывал на эту ячейку, новое значение добавляется,
+        если оно первое вхождение, как при поиске перебором.
+        :param row: номер строки
+        :param column: номер столбца
+        :param old_value: значение ячейки до записи
+        :param value: записанное значение
+        :return: None
+        """
+        if row == 1:
+            index, position = self._columns, column
+        elif column == 1:
+            index, position = self._rows, row
+            old_value = None if old_value is None else str(old_value)
+            value = None if value is None else str(value)
+        else:
+            return
+        if old_value == value:
+            return
+
+        if old_value is not None and index.get(old_value) == position:
+            del index[old_value]
+            # такое же значение может быть дальше в таблице, тогда ключ указывает на него
+            duplicate = self._find_duplicate(row, column, old_value)
+            if duplicate:
+                index[old_value] = duplicate
+        if value is not None and (value not in index or index[value] > position):
+            index[value] = position
+
+    def _find_duplicate(self, row: int, column: int, value: Any) -> int | None:
+        """
+        Ищет следующее вхождение значения в строке заголовков или в столбце номеров профилей после ячейки.
+        Вызывается только при перезаписи заголовка или номера профиля, поэтому перебор здесь допустим.
+        :param row: номер строки ячейки
+        :param column: номер столбца ячейки
+        :param value: значение для поиска (номер профиля строкой)
+        :return: номер столбца или строки следующего вхождения или None
+        """
+        if row == 1:
+            values = next(self._sheet.iter_rows(min_row=1, max_row=1, min_col=column + 1, values_only=True), ())
+            start = column + 1
+        else:
+            values = (cell for (cell,) in self._sheet.iter_rows(min_row=row + 1, max_col=1, values_only=True))
+            start = row + 1
+            value = str(value)
+        for position, cell_value in enumerate(values, start=start):
+            if cell_value is not None and (cell_value if row == 1 else str(cell_value)) == value:
+                return position
+        return None
 
     def _find_acc_row(self, profile_number: str) -> int:
         """
@@ -111,23 +409,32 @@ class Excel:
         :param profile_number: номер профиля
         :return: номер строки
         """
-        for row in self._sheet.iter_rows(min_row=2, max_col=1):
-            if str(row[0].value) == profile_number:
-                return row[0].row
-        add_row = self._sheet.max_row + 1
+        row = self._rows.get(profile_number)
+        if row:
+            return row
+        add_row = self._workbook.last_row + 1
         self._sheet.cell(row=add_row, column=1, value=profile_number)
-        self._table.save(self._file)
+        self._workbook.last_row = add_row
+        self._rows[profile_number] = add_row
+        self._save()
         return add_row
 
+    @locked
     def add_row(self, values: list) -> None:
         """
         Добавляет значения из списка в строку в конец таблицы. Каждое значение в отдельную ячейку.
         :param values: список значений
         :return: None
         """
-        self._sheet.append(values)
-        self._table.save(self._file)
+        row = self._workbook.last_row + 1
+        for column, value in enumerate(values, start=1):
+            self._sheet.cell(row=row, column=column, value=value)
+        self._workbook.last_row = row
+        if values:
+            self._update_index(row, 1, None, values[0])
+        self._save()
 
+    @locked
     def set_cell(self, column_name: str, value: str | int | float, row: Optional[int] = None) -> None:
         """
         Устанавливает значение в ячейку по имени столбца и номеру строчки.
@@ -154,9 +461,14 @@ class Excel:
         row = self.acc_row if not row else row
 
         col_num = self.find_column(column_name)
-        self._sheet.cell(row=row, column=col_num, value=value)
-        self._table.save(self._file)
+        cell = self._sheet.cell(row=row, column=col_num)
+        old_value = cell.value
+        cell.value = value
+        self._workbook.last_row = max(self._workbook.last_row, row)
+        self._update_index(row, col_num, old_value, value)
+        self._save()
 
+    @locked
     def add_column(self, column_name: str) -> int:
         """
         Добавляет столбец в конец таблицы. Если столбец уже существует, возвращает его номер.
@@ -164,33 +476,34 @@ class Excel:
         :return: номер столбца
         """
         # Проверяем, существует ли уже такой столбец
-        for row in self._sheet.iter_rows(max_row=1):
-            for cell in row:
-                if cell.value == column_name:
-                    return cell.column
+        col_num = self._columns.get(column_name)
+        if col_num:
+            return col_num
 
         # Столбец не найден - создаем новый
         col_num = self._sheet.max_column + 1
         self._sheet.cell(row=1, column=col_num, value=column_name)
-        self._table.save(self._file)
+        self._columns[column_name] = col_num
+        self._save()
         logger.info(
             f'{self.account.profile_number} Создан новый столбец {column_name} (столбец {col_num}).')
         return col_num
 
+    @locked
     def find_column(self, column_name: str) -> int:
         """
         Находит номер столбца по имени. Если столбец не найден, создает его.
         :param column_name: имя столбца
         :return: номер столбца
         """
-        for row in self._sheet.iter_rows(max_row=1):
-            for cell in row:
-                if cell.value == column_name:
-                    return cell.column
+        col_num = self._columns.get(column_name)
+        if col_num:
+            return col_num
         logger.warning(
             f'{self.account.profile_number} Столбец {column_name} не найден, создаем новый.')
         return self.add_column(column_name)
 
+    @locked
     def get_cell(self, column_name: str, row: Optional[int] = None) -> str | int | None:
         """
         Возвращает значение ячейки по имени столбца из строки аккаунта.
@@ -215,6 +528,7 @@ class Excel:
 
         return self._sheet.cell(row=row, column=col_num).value
 
+    @locked
     def get_column(self, column_name: str, is_empty_pass: bool = False) -> list[str | int | None]:
         """
         Возвращает список значений столбца по имени. Если в ячейке пусто, возвращает None.
@@ -233,6 +547,7 @@ class Excel:
 
         return column_values
 
+    @locked
     def get_row(self, row: Optional[int] = None) -> list[str | int | None]:
         """
         Возвращает список значений из строки аккаунта.
@@ -247,6 +562,7 @@ class Excel:
 
         return row_values
 
+    @locked
     def get_counter(self, column_name: str, row: Optional[int] = None) -> int | float:
         """
         Возвращает значение счетчика из ячейки в таблице Excel. Если ячейка пустая, возвращает 0 и записывает 0 в ячейку.
@@ -261,20 +577,21 @@ class Excel:
 
         if cell.value is None:
             cell.value = 0
-            self._table.save(self._file)
+            self._save()
         elif isinstance(cell.value, str):
             if cell.value.isdigit():
                 cell.value = int(cell.value)
-                self._table.save(self._file)
+                self._save()
             elif cell.value.replace('.', '', 1).isdigit():
                 cell.value = float(cell.value)
-                self._table.save(self._file)
+                self._save()
             else:
                 raise TypeError(
                     f'Значение в столбце {column_name} не является числом')
 
         return cell.value
 
+    @locked
     def increase_counter(self, column_name: str, number: int = 1, row: Optional[int] = None) -> int:
         """
         Увеличивает значение счетчика на 1 или на указанное число.
@@ -316,9 +633,10 @@ class Excel:
                     f'Значение в столбце {column_name} не является числом')
 
         cell.value += number
-        self._table.save(self._file)
+        self._save()
         return cell.value
 
+    @locked
     def set_date(self, column_name: str, row: Optional[int] = None) -> None:
         """
         Записывает текущее время и дату в excel таблицу.
@@ -344,8 +662,9 @@ class Excel:
 
         self._sheet.cell(row=row, column=col_num,
                          value=datetime.now().strftime(config.date_format))
-        self._table.save(self._file)
+        self._save()
 
+    @locked
     def get_date(self, column_name: str, row: Optional[int] = None) -> datetime:
         """
         Возвращает дату из ячейки в таблице Excel.
@@ -382,6 +701,7 @@ class Excel:
             f'{self.account.profile_number} Не нашли дату в столбце {column_name} возвращаем старую дату')
         return datetime.now().replace(year=2000)
 
+    @locked
     def get_counters(self, column_name: str) -> list[int | float]:
         """
         Возвращает список значений счетчиков из столбца.
@@ -392,16 +712,25 @@ class Excel:
         """
         col_num = self.find_column(column_name)
         column_values = []
+        is_changed = False
         for raw in self._sheet.iter_cols(min_col=col_num, max_col=col_num, min_row=2):
             for cell in raw:
                 if cell.value is None:
                     cell.value = 0
+                    is_changed = True
                 elif isinstance(cell.value, str):
                     if cell.value.isdigit():
                         cell.value = int(cell.value)
-                    if cell.value.replace('.', '', 1).isdigit():
+                        is_changed = True
+                    elif cell.value.replace('.', '', 1).isdigit():
                         cell.value = float(cell.value)
+                        is_changed = True
 
                 column_values.append(cell.value)
-        self._table.save(self._file)
+        # файл сохраняется, только если какие-то ячейки были заполнены или преобразованы в числа
+        if is_changed:
+            self._save()
         return column_values
+
+
+atexit.register(WorkbookRegistry.flush_all)
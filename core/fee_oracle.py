@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from web3 import Web3
+
+from config import config
+from core.chain_capabilities import ChainCapabilities
+from core.rpc_batch import RpcBatch, BatchCall
+from models.chain import Chain
+
+
+class FeeSnapshot:
+    """
+    Параметры комиссии сети на момент запроса.
+
+    - base_fee - базовая комиссия следующего блока (0 для legacy сетей)
+    - priority_fees - медианные чаевые за последние блоки для каждой скорости из config.fee_percentiles
+    - gas_price - gasPrice сети
+    - updated_at - время получения данных (time.monotonic)
+    """
+
+    def __init__(self, base_fee: int, priority_fees: dict[str, int], gas_price: int, updated_at: float) -> None:
+        self.base_fee = base_fee
+        self.priority_fees = priority_fees
+        self.gas_price = gas_price
+        self.updated_at = updated_at
+
+    def __repr__(self) -> str:
+        return (f'FeeSnapshot(base_fee={self.base_fee}, priority_fees={self.priority_fees}, '
+                f'gas_price={self.gas_price})')
+
+
+class FeeOracle:
+    """
+    Общий для всех Onchain и потоков кэш комиссий по сетям.
+
+    Комиссии сети запрашиваются не чаще одного раза за блок (chain.block_interval или config.fee_cache_ttl секунд),
+    все транзакции в этот промежуток берут комиссию из памяти без запросов к RPC.
+    Чаевые считаются сразу для всех скоростей из config.fee_percentiles одним запросом fee_history.
+
+    Examples:
+        >>> snapshot = FeeOracle.get(w3, chain)
+        >>> fast_priority_fee = snapshot.priority_fees['fast']
+    """
+    _snapshots: dict[int, FeeSnapshot] = {}
+    _locks: dict[int, threading.Lock] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, w3: Web3, chain: Chain) -> FeeSnapshot:
+        """
+        Возвращает актуальные комиссии сети, при необходимости запрашивает их у RPC.
+        Если несколько потоков одновременно обнаружили устаревшие данные, запрос делает только один.
+        :param w3: объект Web3 сети
+        :param chain: сеть
+        :return: комиссии сети
+        """
+        snapshot = cls.get_cached(chain)
+        if snapshot:
+            return snapshot
+
+        with cls._get_lock(chain):
+            snapshot = cls.get_cached(chain)
+            if snapshot:
+                return snapshot
+            with RpcBatch(w3) as batch:
+                fee_history, gas_price = cls.add_requests(batch, w3, chain)
+            return cls.update(chain, fee_history, gas_price)
+
+    @classmethod
+    @contextmanager
+    def try_refresh(cls, chain: Chain) -> Iterator[bool]:
+        """
+        Занимает блокировку обновления комиссий сети без ожидания, чтобы обновить комиссии вместе с другими запросами.
+        Если внутри блока with получено True, этот поток должен добавить запросы add_requests в свою пачку и
+        вызвать update, остальные потоки в это время комиссии не запрашивают, а после блока берут их через get.
+        :param chain: сеть
+        :return: True, если комиссии устарели и их обновляет этот поток
+
+        Examples:
+            >>> with FeeOracle.try_refresh(chain) as is_refresh:
+            ...     with RpcBatch(w3) as batch:
+            ...         if is_refresh:
+            ...             fee_history, gas_price = FeeOracle.add_requests(batch, w3, chain)
+            ...         nonce = batch.add(lambda: w3.eth.get_transaction_count(address))
+            ...     if is_refresh:
+            ...         FeeOracle.update(chain, fee_history, gas_price)
+            >>> snapshot = FeeOracle.get(w3, chain)
+        """
+        lock = cls._get_lock(chain)
+        if not lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            yield cls.get_cached(chain) is None
+        finally:
+            lock.release()
+
+    @classmethod
+    def get_cached(cls, chain: Chain) -> FeeSnapshot | None:
+        """
+        Возвращает комиссии сети из памяти, если они еще не устарели. Комиссии актуальны в течение
+        одного блока сети, если время блока неизвестно, то config.fee_cache_ttl секунд.
+        :param chain: сеть
+        :return: комиссии сети или None
+        """
+        snapshot = cls._snapshots.get(chain.chain_id)
+        ttl = chain.block_interval or config.fee_cache_ttl
+        if snapshot and time.monotonic() - snapshot.updated_at < ttl:
+            return snapshot
+        return None
+
+    @staticmethod
+    def add_requests(batch: RpcBatch, w3: Web3, chain: Chain) -> tuple[BatchCall | None, BatchCall]:
+        """
+        Добавляет в пачку запросы для обновления комиссий, чтобы их можно было отправить вместе
+        с другими запросами, например nonce. Для legacy сетей fee_history не запрашивается.
+        :param batch: пачка запросов
+        :param w3: объект Web3 сети
+        :param chain: сеть
+        :return: запросы (fee_history или None, gas_price)
+        """
+        fee_history = None
+        if chain.is_eip1559 is not False:
+            # история комиссий за последние 20 блоков для всех перцентилей скоростей
+            percentiles = list(config.fee_percentiles.values())
+            fee_history = batch.add(lambda: w3.eth.fee_history(20, 'latest', percentiles))
+        gas_price = batch.add(lambda: w3.eth.gas_price)
+        return fee_history, gas_price
+
+    @classmethod
+    def update(cls, chain: Chain, fee_history_call: BatchCall | None, gas_price_call: BatchCall) -> FeeSnapshot:
+        """
+        Рассчитывает комиссии по выполненным запросам из add_requests и сохраняет их в кэш.
+        :param chain: сеть
+        :param fee_history_call: выполненный запрос fee_history или None
+        :param gas_price_call: выполненный запрос gas_price
+        :return: комиссии сети
+        """
+        fee_history = fee_history_call.result if fee_history_call else {}
+
+        # Определяем поддержку EIP-1559 по наличию baseFeePerGas
+        # Если есть хотя бы один ненулевой baseFee - сеть поддерживает EIP-1559
+        # Результат сохраняется, чтобы в следующих запусках не определять его заново
+        if chain.is_eip1559 is None:
+            chain.is_eip1559 = any(fee_history.get('baseFeePerGas', [0]))
+            ChainCapabilities.save_probe(chain, eip_1559=chain.is_eip1559)
+
+        # Берем последний baseFee (базовая комиссия следующего блока, сжигается)
+        base_fee = fee_history.get('baseFeePerGas', [0])[-1] if chain.is_eip1559 else 0
+
+        priority_fees = {}
+        for index, speed in enumerate(config.fee_percentiles):
+            # Собираем priority fees (чаевые майнерам) из истории, исключая нулевые,
+            # и берем медианное значение для стабильности
+            rewards = sorted(reward[index] for reward in fee_history.get('reward', [])
+                             if len(reward) > index and reward[index] != 0) or [0]
+            priority_fees[speed] = rewards[len(rewards) // 2]
+
+        snapshot = FeeSnapshot(base_fee, priority_fees, gas_price_call.result, time.monotonic())
+        cls._snapshots[chain.chain_id] = snapshot
+        return snapshot
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Очищает кэш комиссий всех сетей.
+        """
+        cls._snapshots.clear()
+
+    @classmethod
+    def _get_lock(cls, chain: Chain) -> threading.Lock:
+        with cls._lock:
+            if chain.chain_id not in cls._locks:
+                cls._locks[chain.chain_id] = threading.Lock()
+            return cls._locks[chain.chain_id]
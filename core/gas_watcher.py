@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+from loguru import logger
+from web3 import Web3
+from websockets.sync.client import connect
+
+from config import config
+from core.providers import MultiRpcProvider, PooledHTTPProvider
+from models.chain import Chain
+from utils.utils import get_user_agent
+
+# после скольких ошибок получения цены газа подряд переключать наблюдатель на другое подключение к rpc
+GAS_FAILURES_LIMIT = 3
+
+
+class GasWatcher:
+    """
+    Общий для всех аккаунтов наблюдатель за ценой газа в одной сети.
+
+    Пока есть ожидающие, один фоновый поток обновляет цену газа: на каждый новый блок,
+    если у сети указан chain.ws_rpc и он поддерживает подписку newHeads, иначе раз в
+    config.gas_watcher_poll_interval секунд. Ожидающие потоки спят на условии и просыпаются
+    при обновлении цены, поэтому нагрузка на RPC не зависит от количества ожидающих аккаунтов.
+
+    Если config.is_web3_proxy выключен, цену газа наблюдатель запрашивает через свое подключение к RPC сети
+    без прокси, иначе через подключение (прокси) первого ожидающего аккаунта, напрямую к RPC он не обращается.
+    Если запросы не удаются GAS_FAILURES_LIMIT раз подряд, наблюдатель переключается на подключение последнего
+    ожидающего аккаунта, чтобы ожидающие не зависли из-за одного прокси. Если фоновый поток упал,
+    ожидающие запускают его заново.
+
+    Examples:
+        >>> GasWatcher.get(chain, w3).wait_below(30)  # ждать газ ниже 30 gwei
+    """
+    _watchers: dict[int, GasWatcher] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, chain: Chain, w3: Web3) -> None:
+        self.chain = chain
+        self.shared_w3 = w3 if config.is_web3_proxy else self._create_w3(chain)
+        self.account_w3 = w3
+        self.w3 = self.shared_w3
+        self._failures = 0
+        self.gas_price: int | None = None
+        self._waiters = 0
+        self._condition = threading.Condition()
+        self._is_running = False
+
+    @classmethod
+    def get(cls, chain: Chain, w3: Web3) -> GasWatcher:
+        """
+        Возвращает наблюдатель сети, создает его при первом обращении.
+        :param chain: сеть
+        :param w3: объект Web3 аккаунта, используется для запросов, если включен config.is_web3_proxy
+        или подключение наблюдателя к rpc не работает
+        :return: наблюдатель за ценой газа
+        """
+        with cls._lock:
+            if chain.chain_id not in cls._watchers:
+                cls._watchers[chain.chain_id] = cls(chain, w3)
+            watcher = cls._watchers[chain.chain_id]
+        with watcher._condition:
+            watcher.account_w3 = w3
+        return watcher
+
+    @staticmethod
+    def _create_w3(chain: Chain) -> Web3:
+        """
+        Создает подключение к rpc сети без прокси, общее для всех аккаунтов.
+        :param chain: сеть
+        :return: объект Web3
+        """
+        request_kwargs = {
+            'headers': {
+                'User-Agent': get_user_agent(),
+                'Content-Type': 'application/json',
+            },
+            'proxies': None
+        }
+        if len(chain.rpcs) > 1:
+            return Web3(MultiRpcProvider(chain.rpcs, request_kwargs=request_kwargs))
+        return Web3(PooledHTTPProvider(chain.rpc, request_kwargs=request_kwargs))
+
+    def wait_below(self, gas_limit: float) -> int:
+        """
+        Блокирует поток, пока цена газа не станет не больше лимита.
+        :param gas_limit: лимит цены газа в gwei
+        :return: цена газа в wei, при которой закончилось ожидание
+        """
+        limit_wei = gas_limit * 10 ** 9
+        with self._condition:
+            self._waiters += 1
+            try:
+                if not self._is_running:
+                    self._start()
+                while self.gas_price is None or self.gas_price > limit_wei:
+                    self._condition.wait(config.gas_watcher_poll_interval)
+                    # фоновый поток упал с ошибкой, запускаем его заново
+                    if not self._is_running:
+                        self._start()
+                return self.gas_price
+            finally:
+                self._waiters -= 1
+
+    def _start(self) -> None:
+        """
+        Запускает фоновый поток наблюдателя, вызывается под блокировкой условия.
+        """
+        self._is_running = True
+        self.gas_price = None
+        threading.Thread(target=self._run, name=f'gas-watcher-{self.chain.name}', daemon=True).start()
+
+    def _run(self) -> None:
+        """
+        Цикл фонового потока: пока есть ожидающие, обновляет цену газа по новым блокам или опросом.
+        """
+        try:
+            if self.chain.ws_rpc:
+                try:
+                    self._watch_new_heads()
+                    return
+                except Exception as e:
+                    logger.warning(f'Подписка на блоки {self.chain.name} через {self.chain.ws_rpc} недоступна, '
+                                   f'проверяем газ опросом: {e}')
+            self._watch_polling()
+        except BaseException as e:
+            logger.error(f'Наблюдатель за газом в сети {self.chain.name} остановлен с ошибкой: {e}')
+            with self._condition:
+                self._is_running = False
+                self._condition.notify_all()
+            raise
+
+    def _watch_new_heads(self) -> None:
+        """
+        Подписывается на новые блоки через websocket и обновляет цену газа на каждом блоке.
+        """
+        with connect(self.chain.ws_rpc, open_timeout=10) as websocket:
+            websocket.send(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': ['newHeads']}))
+            response = json.loads(websocket.recv(timeout=10))
+            if 'error' in response:
+                raise ValueError(response['error'])
+
+            self._update_gas_price()
+            updated_at = time.monotonic()
+            while not self._should_stop():
+                try:
+                    websocket.recv(timeout=config.gas_watcher_poll_interval)
+                except TimeoutError:
+                    continue
+                # в сетях с быстрыми блоками обновляем цену не чаще раза в секунду
+                if time.monotonic() - updated_at >= 1:
+                    self._update_gas_price()
+                    updated_at = time.monotonic()
+
+    def _watch_polling(self) -> None:
+        """
+        Обновляет цену газа раз в config.gas_watcher_poll_interval секунд.
+        """
+        while True:
+            self._update_gas_price()
+            with self._condition:
+                if self._should_stop():
+                    return
+                self._condition.wait(config.gas_watcher_poll_interval)
+
+    def _update_gas_price(self) -> None:
+        """
+        Запрашивает цену газа и будит ожидающих.
+        """
+        w3 = self.w3
+        try:
+            gas_price = w3.eth.gas_price
+        except Exception as e:
+            logger.warning(f'Ошибка получения цены газа в сети {self.chain.name}: {e}')
+            self._register_failure(w3)
+            return
+        with self._condition:
+            self._failures = 0
+            self.gas_price = gas_price
+            self._condition.notify_all()
+
+    def _register_failure(self, w3: Web3) -> None:
+        """
+        Учитывает ошибку запроса цены газа и после GAS_FAILURES_LIMIT ошибок подряд переключает наблюдатель
+        с общего подключения на подключение аккаунта или обратно, при config.is_web3_proxy - на подключение
+        последнего ожидающего аккаунта.
+        :param w3: подключение, через которое запрос не удался
+        """
+        with self._condition:
+            self._failures += 1
+            if self._failures < GAS_FAILURES_LIMIT or w3 is not self.w3:
+                return
+            self._failures = 0
+            if config.is_web3_proxy:
+                # прокси аккаунта не работает, переходим на прокси последнего ожидающего аккаунта
+                if self.account_w3 is w3:
+                    return
+                self.w3 = self.account_w3
+            else:
+                self.w3 = self.account_w3 if w3 is self.shared_w3 else self.shared_w3
+        connection = 'аккаунта' if self.w3 is self.account_w3 else 'без прокси'
+        logger.warning(f'Цена газа в сети {self.chain.name} не получена {GAS_FAILURES_LIMIT} раз подряд, '
+                       f'переключаемся на подключение к rpc {connection}')
+
+    def _should_stop(self) -> bool:
+        """
+        Проверяет, остались ли ожидающие, если нет - поток помечается остановленным под той же блокировкой,
+        чтобы новый ожидающий запустил новый поток.
+        """
+        with self._condition:
+            if self._waiters:
+                return False
+            self._is_running = False
+            return True
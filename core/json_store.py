@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+    import msvcrt
+
+from loguru import logger
+
+from config import config
+
+
+class JsonStore:
+    """
+    Словарь, который хранится в json файле в config/data и сохраняется между запусками.
+
+    Файл читается один раз при первом обращении. При сохранении файл перечитывается и объединяется
+    с записями в памяти: в файл попадают ключи, измененные в этом процессе, а остальные ключи берутся из файла,
+    поэтому процессы utils/pool.py (workers_mode = 'process') не затирают записи друг друга.
+    Чтение, объединение и запись выполняются под блокировкой файла .lock рядом с файлом, общей для всех процессов.
+    Запись атомарная: во временный файл рядом с основным, который затем подменяет основной.
+
+    Examples:
+        >>> store = JsonStore('logs_checkpoints.json', 'просмотренные блоки')
+        >>> store.set('transfers:0x...', 300_000_000)
+        >>> block = store.get('transfers:0x...', -1)
+    """
+
+    def __init__(self, file_name: str, description: str) -> None:
+        """
+        :param file_name: имя файла в config/data
+        :param description: что хранится в файле, для сообщений об ошибках
+        """
+        self.file_name = file_name
+        self.description = description
+        self._data: dict[str, Any] | None = None
+        self._changed: set[str] = set()
+        self._lock = threading.RLock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(config.PATH_DATA, self.file_name)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Возвращает значение по ключу.
+        :param key: ключ
+        :param default: значение, если ключа нет
+        :return: значение
+        """
+        with self._lock:
+            return self._load().get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Сохраняет значение по ключу в память и в файл.
+        :param key: ключ
+        :param value: значение, которое можно записать в json
+        """
+        with self._lock:
+            self._load()[key] = value
+            self._changed.add(key)
+            self._save()
+
+    def clear(self) -> None:
+        """
+        Забывает данные в памяти, файл при следующем обращении будет прочитан заново.
+        """
+        with self._lock:
+            self._data = None
+            self._changed.clear()
+
+    def _load(self) -> dict[str, Any]:
+        """
+        Читает файл один раз. Вызывается под блокировкой.
+        """
+        if self._data is None:
+            self._data = self._read_file()
+        return self._data
+
+    def _read_file(self) -> dict[str, Any]:
+        path = self.path
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Не удалось прочитать {self.description} {path}: {e}')
+            return {}
+
+    def _save(self) -> None:
+        """
+        Объединяет данные с файлом и атомарно записывает их. Вызывается под блокировкой.
+        """
+        path = self.path
+        try:
+            with self._file_lock():
+                data = self._read_file()
+                data.update({key: self._data[key] for key in self._changed})
+                self._data = data
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                        json.dump(data, file, ensure_ascii=False, indent=1)
+                    os.replace(tmp_path, path)
+                except OSError:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+        except OSError as e:
+            logger.warning(f'Не удалось сохранить {self.description} {path}: {e}')
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """
+        Блокировка файла между процессами на время чтения и записи.
+        """
+        with open(self.path + '.lock', 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                # LK_LOCK повторяет попытку захвата 10 раз в секунду в течение 10 секунд
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from eth_utils import event_abi_to_log_topic
+from loguru import logger
+from web3 import Web3
+from web3._utils.events import get_event_data
+from web3.exceptions import Web3Exception
+
+from config import config
+from core.json_store import JsonStore
+from core.providers import get_provider_key
+from models.contract_raw import ContractRaw
+from utils.utils import to_checksum
+
+# фрагменты ошибок, которыми RPC отвечают на слишком большой диапазон блоков или слишком много логов
+RANGE_ERRORS = ('more than', 'too many', 'too large', 'too wide', 'limit', 'range', 'exceed', 'response size',
+                'timeout', 'timed out')
+
+
+class LogScanner:
+    """
+    Загрузка логов через eth_getLogs частями по диапазонам блоков.
+
+    Диапазон [from_block, to_block] делится на части по config.logs_block_range блоков, части запрашиваются
+    параллельно в config.logs_concurrency потоков. Если RPC отвечает, что диапазон слишком большой или логов
+    слишком много, часть делится пополам, а уменьшенный размер запоминается для RPC, чтобы следующие
+    загрузки сразу шли подходящими частями. Если передан ContractRaw, логи раскодируются по событиям его abi.
+
+    Для регулярной загрузки только новых логов используется scan_new: номер последнего просмотренного блока
+    сохраняется по ключу в config/data/logs_checkpoints.json.
+
+    Examples:
+        >>> scanner = LogScanner(w3, Tokens.USDT_ARBITRUM_ONE, event='Transfer',
+        ...                      topics=[None, None, '0x' + address[2:].lower().rjust(64, '0')])
+        >>> for log in scanner.get_logs(from_block=300_000_000):
+        ...     print(log.args['from'], log.args['value'])
+    """
+    _block_ranges: dict[str, int] = {}
+    _checkpoints = JsonStore('logs_checkpoints.json', 'просмотренные блоки')
+    _lock = threading.RLock()
+
+    def __init__(
+            self,
+            w3: Web3,
+            contract: ContractRaw | None = None,
+            *,
+            event: str | None = None,
+            address: str | list[str] | None = None,
+            topics: list | None = None,
+    ) -> None:
+        """
+        :param w3: объект Web3 сети
+        :param contract: контракт, логи которого нужны, если передан, логи раскодируются по его abi
+        :param event: имя события контракта, подставляется в topics[0]
+        :param address: адрес или список адресов контрактов, по умолчанию адрес contract или логи всех контрактов
+        :param topics: фильтр топиков eth_getLogs, None на позиции означает любой топик
+        """
+        self.w3 = w3
+        self.address = address or (contract.address if contract else None)
+        self.topics = list(topics or [])
+        self._events = {}
+        if contract:
+            for abi in contract.abi:
+                if abi.get('type') == 'event':
+                    self._events['0x' + event_abi_to_log_topic(abi).hex()] = abi
+        if event:
+            topic0 = next((topic for topic, abi in self._events.items() if abi['name'] == event), None)
+            if topic0 is None:
+                raise ValueError(f'Событие {event} не найдено в abi {contract.abi_name if contract else None}')
+            self.topics = [topic0] + self.topics[1:]
+
+    def get_logs(self, from_block: int, to_block: int | None = None) -> list:
+        """
+        Загружает логи за диапазон блоков.
+        :param from_block: первый блок
+        :param to_block: последний блок, по умолчанию последний блок сети
+        :return: логи в порядке блоков, раскодированные, если передан контракт
+        """
+        if to_block is None:
+            to_block = self.w3.eth.block_number
+        if from_block > to_block:
+            return []
+
+        block_range = self._get_block_range()
+        chunks = [(start, min(start + block_range - 1, to_block))
+                  for start in range(from_block, to_block + 1, block_range)]
+        if len(chunks) == 1:
+            results = [self._fetch(*chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(config.logs_concurrency, len(chunks))) as executor:
+                results = list(executor.map(lambda chunk: self._fetch(*chunk), chunks))
+
+        logs = [log for chunk_logs in results for log in chunk_logs]
+        return [log for log in map(self._decode, logs) if log is not None]
+
+    def scan_new(self, key: str, to_block: int | None = None) -> list:
+        """
+        Загружает логи после последнего просмотренного по ключу блока и сохраняет новый блок.
+        При первом вызове с ключом логи загружаются с блока 0.
+        :param key: уникальный ключ загрузки, например f'{chain.chain_id}:{address}:transfers'
+        :param to_block: последний блок, по умолчанию последний блок сети
+        :return: новые логи
+        """
+        if to_block is None:
+            to_block = self.w3.eth.block_number
+        checkpoint = self.get_checkpoint(key)
+        logs = self.get_logs(checkpoint + 1, to_block)
+        self.set_checkpoint(key, to_block)
+        return logs
+
+    @classmethod
+    def get_checkpoint(cls, key: str) -> int:
+        """
+        Возвращает последний просмотренный блок по ключу.
+        :param key: ключ загрузки
+        :return: номер блока или -1, если по ключу еще ничего не загружалось
+        """
+        with cls._lock:
+            return cls._checkpoints.get(key, -1)
+
+    @classmethod
+    def set_checkpoint(cls, key: str, block: int) -> None:
+        """
+        Сохраняет последний просмотренный блок по ключу.
+        :param key: ключ загрузки
+        :param block: номер блока
+        """
+        with cls._lock:
+            cls._checkpoints.set(key, block)
+
+    def _fetch(self, start: int, end: int) -> list:
+        """
+        Запрашивает логи диапазона, при ошибке размера делит диапазон пополам.
+        :param start: первый блок
+        :param end: последний блок
+        :return: логи диапазона
+        """
+        log_filter = {'fromBlock': start, 'toBlock': end, 'topics': self.topics}
+        if self.address:
+            log_filter['address'] = ([to_checksum(address) for address in self.address]
+                                     if isinstance(self.address, list) else to_checksum(self.address))
+        try:
+            return self.w3.eth.get_logs(log_filter)
+        except (Web3Exception, ValueError, requests.RequestException) as e:
+            message = str(e).lower()
+            is_rate_limited = 'rate limit' in message or 'too many requests' in message
+            if start == end or is_rate_limited or not any(text in message for text in RANGE_ERRORS):
+                raise
+            middle = (start + end) // 2
+            self._shrink_block_range(end - start + 1)
+            logger.debug(f'Диапазон блоков {start}-{end} слишком большой для {self._rpc}, делим пополам: {e}')
+            return self._fetch(start, middle) + self._fetch(middle + 1, end)
+
+    def _decode(self, log):
+        """
+        Раскодирует лог по событиям abi контракта, если контракт не передан, возвращает лог без изменений.
+        Логи, которые не подходят под событие abi (например, ERC721 Approval для abi erc20), пропускаются.
+        """
+        if not self._events:
+            return log
+        topics = log['topics']
+        abi = self._events.get(Web3.to_hex(topics[0])) if topics else None
+        if abi is None:
+            return None
+        try:
+            return get_event_data(self.w3.codec, abi, log)
+        except Exception as e:
+            logger.debug(f'Лог {Web3.to_hex(log["transactionHash"])} не подходит под событие {abi["name"]}: {e}')
+            return None
+
+    def _get_block_range(self) -> int:
+        with self._lock:
+            return self._block_ranges.get(self._rpc, config.logs_block_range)
+
+    def _shrink_block_range(self, failed_range: int) -> None:
+        """
+        Запоминает для RPC размер части в два раза меньше диапазона, на который RPC ответил ошибкой.
+        """
+        with self._lock:
+            self._block_ranges[self._rpc] = max(1, min(self._get_block_range(), failed_range // 2))
+
+    @property
+    def _rpc(self) -> str:
+        return get_provider_key(self.w3.provider)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+from loguru import logger
+
+from config import config
+
+
+class NonceManager:
+    """
+    Локальная выдача nonce для пары (сеть, адрес), чтобы один аккаунт мог отправить несколько
+    транзакций подряд, не дожидаясь подтверждения предыдущих.
+
+    Nonce выдаются по порядку из локального счетчика. Количество pending транзакций запрашивается у сети
+    внутри allocate под блокировкой адреса, только при первой выдаче nonce адресу и если локальный счетчик
+    не обновлялся дольше config.nonce_stale_timeout секунд: если сеть ушла вперед (транзакции отправлены
+    из другого места), берется значение сети, если локальный счетчик опережает сеть (транзакции выпали
+    из mempool), счетчик возвращается к значению сети, чтобы не оставлять пропуск. После ошибки отправки
+    счетчик сбрасывается через resync.
+
+    Examples:
+        >>> nonce = NonceManager.allocate(chain.chain_id, address,
+        ...                               lambda: w3.eth.get_transaction_count(address, 'pending'))
+        >>> try:
+        ...     send(nonce)
+        ... except Exception:
+        ...     NonceManager.resync(chain.chain_id, address, w3.eth.get_transaction_count(address, 'pending'))
+        ...     raise
+    """
+    _next_nonces: dict[tuple[int, str], int] = {}
+    _updated_at: dict[tuple[int, str], float] = {}
+    _locks: dict[tuple[int, str], threading.RLock] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_lock(cls, chain_id: int, address: str) -> threading.RLock:
+        """
+        Возвращает блокировку пары (сеть, адрес), под ней nonce выдается и используется для отправки,
+        чтобы транзакции одного аккаунта уходили в сеть в порядке nonce. Блокировка повторно входимая,
+        allocate берет ее сам, поэтому его можно вызывать и под уже взятой блокировкой.
+        :param chain_id: id сети
+        :param address: адрес аккаунта
+        :return: блокировка
+        """
+        key = (chain_id, address.lower())
+        with cls._lock:
+            if key not in cls._locks:
+                cls._locks[key] = threading.RLock()
+            return cls._locks[key]
+
+    @classmethod
+    def allocate(cls, chain_id: int, address: str, get_pending_nonce: Callable[[], int]) -> int:
+        """
+        Выдает следующий nonce для адреса. Пока локальный счетчик актуален, запросов к сети нет.
+        :param chain_id: id сети
+        :param address: адрес аккаунта
+        :param get_pending_nonce: функция, которая запрашивает у сети количество транзакций адреса с учетом pending,
+            вызывается под блокировкой адреса, только если локального счетчика нет или он устарел
+        :return: nonce для новой транзакции
+        """
+        key = (chain_id, address.lower())
+        with cls.get_lock(chain_id, address):
+            with cls._lock:
+                local_nonce = cls._next_nonces.get(key)
+                is_stale = time.monotonic() - cls._updated_at.get(key, 0) > config.nonce_stale_timeout
+
+            if local_nonce is None or is_stale:
+                # запрос к сети выполняется вне общей блокировки, чтобы не задерживать другие адреса
+                pending_nonce = get_pending_nonce()
+                if local_nonce is not None and local_nonce > pending_nonce:
+                    logger.warning(f'Локальный nonce {local_nonce} опережает сеть {pending_nonce} для {address}, '
+                                   f'транзакции выпали из mempool, продолжаем с nonce сети')
+                nonce = pending_nonce
+            else:
+                nonce = local_nonce
+
+            with cls._lock:
+                cls._next_nonces[key] = nonce + 1
+                cls._updated_at[key] = time.monotonic()
+            return nonce
+
+    @classmethod
+    def resync(cls, chain_id: int, address: str, pending_nonce: int) -> None:
+        """
+        Сбрасывает локальный счетчик на значение сети, вызывается после ошибки отправки транзакции.
+        :param chain_id: id сети
+        :param address: адрес аккаунта
+        :param pending_nonce: количество транзакций адреса с учетом pending по данным сети
+        """
+        key = (chain_id, address.lower())
+        with cls._lock:
+            cls._next_nonces[key] = pending_nonce
+            cls._updated_at[key] = time.monotonic()
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Забывает все локальные счетчики, следующие nonce будут взяты из сети.
+        """
+        with cls._lock:
+            cls._next_nonces.clear()
+            cls._updated_at.clear()
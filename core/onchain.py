@@ -1,27 +1,48 @@
 from __future__ import annotations
 
+import time
 from typing import Optional
 
-from eth_account import Account as EthAccount
 from eth_typing import ChecksumAddress
+from hexbytes import HexBytes
 from loguru import logger
 from web3 import Web3
 from web3.contract import Contract
 
-from config import config, Tokens, Chains
+from config import config, Tokens, Chains, Contracts
+from core.approval_index import ApprovalIndex
+from core.chain_capabilities import ChainCapabilities
+from core.fee_oracle import FeeOracle, FeeSnapshot
+from core.gas_watcher import GasWatcher
+from core.log_scanner import LogScanner
+from core.nonce_manager import NonceManager
+from core.providers import MultiRpcProvider, PooledHTTPProvider
+from core.rpc_batch import RpcBatch
+from core.signer import TxSigner
+from core.token_cache import TokenCache
+from core.tx_tracker import ReceiptTracker, TxFuture
 from models.account import Account
 from models.amount import Amount
 from models.chain import Chain
-from models.contract_raw import ContractRaw
+from models.contract_raw import ContractRaw, ContractCache
 from models.token import Token, TokenTypes
-from utils.utils import to_checksum, random_sleep, get_multiplayer, prepare_proxy_requests, get_user_agent, \
+from utils import hd_wallet
+from utils.utils import to_checksum, get_multiplayer, prepare_proxy_requests, get_user_agent, \
     get_response
 
+# селекторы функций для сборки calldata без обработки abi: balanceOf(address) и getEthBalance(address)
+BALANCE_OF_SELECTOR = bytes.fromhex('70a08231')
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex('4d2301cc')
+# селектор allowance(address,address)
+ALLOWANCE_SELECTOR = bytes.fromhex('dd62ed3e')
+# максимальное количество логов в одном ответе etherscan
+ETHERSCAN_PAGE_SIZE = 1000
+
 
 class Onchain:
     def __init__(self, account: Account, chain: Chain):
         self.account = account
-        self.chain = chain
+        self.chain = ChainCapabilities.apply(chain)
 
         self.w3 = self._prepare_w3(chain)
         if self.account.private_key:
@@ -40,8 +61,14 @@ class Onchain:
         if config.is_web3_proxy:
             request_kwargs['proxies'] = prepare_proxy_requests(
                 self.account.proxy)
-        self.w3 = Web3(Web3.HTTPProvider(
-            chain.rpc, request_kwargs=request_kwargs))
+        # сессия с открытыми соединениями к rpc берется из общего пула и переиспользуется всеми Onchain
+        if len(chain.rpcs) > 1:
+            # запросы идут в самый быстрый здоровый rpc сети, при ошибках и лимитах в следующий
+            self.w3 = Web3(MultiRpcProvider(chain.rpcs, request_kwargs=request_kwargs))
+        else:
+            self.w3 = Web3(PooledHTTPProvider(
+                chain.rpc, request_kwargs=request_kwargs))
+        self._contracts = ContractCache(self.w3)
         return self.w3
 
     def change_chain(self, chain: Chain):
@@ -63,12 +90,37 @@ class Onchain:
             >>> onchain.change_chain(Chains.ARBITRUM_ONE)
             >>> arb_balance = onchain.get_balance()
         """
-        self.chain = chain
+        self.chain = ChainCapabilities.apply(chain)
         self.w3 = self._prepare_w3(chain)
 
+    def batch(self) -> RpcBatch:
+        """
+        Пачка независимых запросов на чтение к RPC сети, которая отправляется одним HTTP запросом
+        при выходе из блока with. Если RPC не поддерживает batch запросы или в конфиге
+        выключен is_rpc_batch, запросы выполняются по очереди.
+
+        :return: объект RpcBatch
+
+        Examples:
+            >>> # Баланс, nonce и газ одним запросом
+            >>> with onchain.batch() as batch:
+            ...     balance = batch.add(lambda: onchain.w3.eth.get_balance(onchain.account.address))
+            ...     nonce = batch.add(lambda: onchain.w3.eth.get_transaction_count(onchain.account.address))
+            ...     gas_price = batch.add(lambda: onchain.w3.eth.gas_price)
+            >>> print(balance.result, nonce.result, gas_price.result)
+
+            >>> # Вызовы view функций контракта
+            >>> contract = onchain.w3.eth.contract(token.address, abi=token.abi)
+            >>> with onchain.batch() as batch:
+            ...     decimals = batch.add(contract.functions.decimals().call)
+            ...     symbol = batch.add(contract.functions.symbol().call)
+        """
+        return RpcBatch(self.w3)
+
     def _get_token_params(self, token_address: str | ChecksumAddress) -> tuple[str, int]:
         """
-        Получение параметров токена (symbol, decimals) по адресу контракта токена
+        Получение параметров токена (symbol, decimals) по адресу контракта токена,
+        параметры берутся из TokenCache, запрос к RPC делается только для неизвестных токенов
         :param token_address:  адрес контракта токена
         :return: кортеж (symbol, decimals)
         """
@@ -77,20 +129,26 @@ class Onchain:
         if token_contract_address == Tokens.NATIVE_TOKEN.address:
             return self.chain.native_token, Tokens.NATIVE_TOKEN.decimals
 
+        params = TokenCache.get(self.chain.chain_id, token_contract_address)
+        if params is not None:
+            return params
+
         token_contract_raw = ContractRaw(
             token_contract_address, 'erc20', self.chain)
         token_contract = self._get_contract(token_contract_raw)
-        decimals = token_contract.functions.decimals().call()
-        symbol = token_contract.functions.symbol().call()
-        return symbol, decimals
+        with self.batch() as batch:
+            decimals = batch.add(token_contract.functions.decimals().call)
+            symbol = batch.add(token_contract.functions.symbol().call)
+        TokenCache.set(self.chain.chain_id, token_contract_address, symbol.result, decimals.result)
+        return symbol.result, decimals.result
 
     def _get_contract(self, contract_raw: ContractRaw) -> Contract:
         """
-        Получение инициализированного объекта контракта
+        Получение инициализированного объекта контракта из кэша подключения, объект создается один раз для подключения
         :param contract_raw: объект ContractRaw
         :return: объект контракта
         """
-        return self.w3.eth.contract(contract_raw.address, abi=contract_raw.abi)
+        return self._contracts.get(contract_raw)
 
     def _estimate_gas(self, tx_params: dict) -> dict:
         """
@@ -101,57 +159,47 @@ class Onchain:
             tx_params) * get_multiplayer())
         return tx_params
 
-    def _get_fee(self, tx_params: dict[str, str | int] | None = None) -> dict[str, str | int]:
+    def _get_fee(self, tx_params: dict[str, str | int] | None = None, speed: str | None = None) -> dict[str, str | int]:
         """
         Подготовка параметров транзакции с учетом EIP-1559. Берет значение EIP-1559 из self.chain.is_eip1559,
         если не определено, то запрашивает и сохраняет значение на время сессии.
         Если сеть не поддерживает EIP-1559, то устанавливает параметр gasPrice,
         если поддерживает, то устанавливает параметры maxFeePerGas и maxPriorityFeePerGas.
+        Комиссии сети берутся из общего FeeOracle и запрашиваются у RPC не чаще раза в config.fee_cache_ttl секунд.
         :param tx_params: параметры транзакции без параметров комиссии либо None, если передан None, то создается новый словарь
+        :param speed: скорость транзакции из config.fee_percentiles (slow, normal, fast), по умолчанию config.fee_speed
+        """
+        return self._apply_fee(tx_params, FeeOracle.get(self.w3, self.chain), speed)
+
+    def _apply_fee(
+            self,
+            tx_params: dict[str, str | int] | None,
+            snapshot: FeeSnapshot,
+            speed: str | None = None
+    ) -> dict[str, str | int]:
+        """
+        Устанавливает параметры комиссии в tx_params по комиссиям сети из FeeOracle
+        :param tx_params: параметры транзакции без параметров комиссии либо None
+        :param snapshot: комиссии сети
+        :param speed: скорость транзакции из config.fee_percentiles, по умолчанию config.fee_speed
+        :return: параметры транзакции с комиссией
         """
         if tx_params is None:
             tx_params = {}
 
-        fee_history = None
-
-        # Проверяем, известна ли поддержка EIP-1559 для этой сети
-        if self.chain.is_eip1559 is None:
-            # Запрашиваем историю комиссий за последние 20 блоков (40-й перцентиль)
-            fee_history = self.w3.eth.fee_history(20, 'latest', [40])
-
-            # Определяем поддержку EIP-1559 по наличию baseFeePerGas
-            # Если есть хотя бы один ненулевой baseFee - сеть поддерживает EIP-1559
-            self.chain.is_eip1559 = any(fee_history.get('baseFeePerGas', [0]))
-
         # Legacy режим (без EIP-1559): используем простой gasPrice
         if self.chain.is_eip1559 is False:
-            tx_params['gasPrice'] = self._multiply(self.w3.eth.gas_price)
+            tx_params['gasPrice'] = self._multiply(snapshot.gas_price)
             return tx_params
 
         # EIP-1559 режим: рассчитываем maxFeePerGas и maxPriorityFeePerGas
 
-        # Получаем fee_history (используем уже запрошенный или делаем новый запрос)
-        fee_history = fee_history or self.w3.eth.fee_history(
-            20, 'latest', [40])
-
-        # Берем последний baseFee (базовая комиссия сети, сжигается)
-        base_fee = fee_history.get('baseFeePerGas', [0])[-1]
-
-        # Собираем priority fees (чаевые майнерам) из истории, исключая нулевые
-        priority_fees = [fee[0] for fee in fee_history.get(
-            'reward', [[0]]) if fee[0] != 0] or [0]
-
-        # Находим медианное значение priority fee для стабильности
-        median_index = len(priority_fees) // 2
-        priority_fees.sort()
-        median_priority_fee = priority_fees[median_index]
-
-        # Применяем множители для гарантии прохождения транзакции
-        priority_fee = self._multiply(median_priority_fee)
+        # Применяем множители к медианным чаевым выбранной скорости для гарантии прохождения транзакции
+        priority_fee = self._multiply(snapshot.priority_fees[speed or config.fee_speed])
 
         # maxFeePerGas = baseFee + priorityFee (с учетом множителей)
         # Это максимум, который готовы заплатить (реально может быть меньше)
-        max_fee = self._multiply(base_fee + priority_fee)
+        max_fee = self._multiply(snapshot.base_fee + priority_fee)
 
         # Устанавливаем тип транзакции 0x2 (EIP-1559)
         tx_params['type'] = '0x2'
@@ -211,21 +259,22 @@ class Onchain:
         return Amount(l1_fee, wei=True)
 
     def _prepare_tx(self, value: Optional[Amount] = None,
-                    to_address: Optional[str | ChecksumAddress] = None) -> dict:
+                    to_address: Optional[str | ChecksumAddress] = None,
+                    speed: Optional[str] = None) -> dict:
         """
         Подготовка параметров транзакции
         :param value: сумма перевода ETH, если ETH нужно приложить к транзакции
         :param to_address: адрес получателя транзакции, для перевода нативного токена
         или если НЕ используете build_transaction (он автоматически укажет адрес получателя)
+        :param speed: скорость транзакции из config.fee_percentiles (slow, normal, fast), по умолчанию config.fee_speed
         :return: параметры транзакции
         """
-        # получаем параметры комиссии
-        tx_params = self._get_fee()
+        # комиссии сети берутся из общего кэша FeeOracle, nonce выдает NonceManager при отправке в _sign_and_send
+        snapshot = FeeOracle.get(self.w3, self.chain)
+        tx_params = self._apply_fee(None, snapshot, speed)
 
         # добавляем параметры транзакции
         tx_params['from'] = self.account.address
-        tx_params['nonce'] = self.w3.eth.get_transaction_count(
-            self.account.address)
         tx_params['chainId'] = self.chain.chain_id
 
         # если передана сумма перевода, то добавляем ее в транзакцию
@@ -239,18 +288,79 @@ class Onchain:
 
         return tx_params
 
-    def _sign_and_send(self, tx: dict) -> str:
+    def _sign_and_send(self, tx: dict, wait: bool = True) -> str | TxFuture:
         """
-        Подпись и отправка транзакции
+        Подпись и отправка транзакции. Транзакция подписывается через TxSigner (в пуле процессов,
+        если указан config.signing_processes). Nonce выдается NonceManager, поэтому несколько транзакций
+        одного аккаунта получают последовательные nonce. Если сеть отклонила транзакцию,
+        сначала проверяется, не приняла ли сеть эту же транзакцию (тогда отслеживается ее хэш), затем счетчик nonce
+        сверяется с сетью, при ошибке nonce транзакция переподписывается и отправляется повторно.
         :param tx: параметры транзакции
-        :return: хэш транзакции
+        :param wait: ждать подтверждения транзакции, если False, то сразу после отправки возвращается TxFuture,
+            подтверждение которого ждет общий ReceiptTracker
+        :return: хэш транзакции или TxFuture, если wait=False
         """
-        signed_tx = self.w3.eth.account.sign_transaction(
-            tx, self.account.private_key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-        tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        address = self.account.address
+        with NonceManager.get_lock(self.chain.chain_id, address):
+            for attempt in range(2):
+                tx['nonce'] = NonceManager.allocate(
+                    self.chain.chain_id, address, lambda: self.w3.eth.get_transaction_count(address, 'pending'))
+                raw_transaction = None
+                try:
+                    raw_transaction = TxSigner.sign(tx, self.account.private_key)
+                    tx_hash = self.w3.eth.send_raw_transaction(raw_transaction)
+                    break
+                except Exception as e:
+                    # ошибка nonce или 'already known' может означать, что сеть уже приняла эту транзакцию
+                    # (например, RPC принял ее, но не успел ответить), повторная отправка создала бы дубль
+                    tx_hash = self._get_sent_tx_hash(raw_transaction)
+                    if tx_hash:
+                        logger.warning(f'{self.account.profile_number} Транзакция {tx_hash.hex()} уже в сети, '
+                                       f'ошибка отправки: {e}')
+                        break
+                    try:
+                        pending_nonce = self.w3.eth.get_transaction_count(address, 'pending')
+                    except Exception as nonce_error:
+                        logger.warning(f'{self.account.profile_number} Не удалось сверить nonce с сетью: {nonce_error}')
+                        # nonce не использован, возвращаем его, чтобы не оставить пропуск
+                        NonceManager.resync(self.chain.chain_id, address, tx['nonce'])
+                        raise e
+                    NonceManager.resync(self.chain.chain_id, address, pending_nonce)
+                    if attempt or 'nonce' not in str(e).lower():
+                        raise
+                    logger.warning(f'{self.account.profile_number} Ошибка nonce {tx["nonce"]}: {e}, '
+                                   f'отправляем с nonce {pending_nonce}')
+
+        tx_future = ReceiptTracker.track(self.w3, tx_hash, self.chain)
+        if not wait:
+            return tx_future
+        tx_receipt = tx_future.result()
         return tx_receipt['transactionHash'].hex()
 
+    def _get_native_token(self) -> Token:
+        """
+        Нативный токен текущей сети. Создается новый объект, общий Tokens.NATIVE_TOKEN не изменяется,
+        чтобы параллельные воркеры в разных сетях не мешали друг другу.
+        :return: объект Token нативного токена
+        """
+        return Token(self.chain.native_token, Tokens.NATIVE_TOKEN.address, self.chain,
+                     Tokens.NATIVE_TOKEN.decimals, TokenTypes.NATIVE)
+
+    def _get_sent_tx_hash(self, raw_transaction: bytes | None) -> HexBytes | None:
+        """
+        Проверяет, есть ли подписанная транзакция в сети (в mempool или в блоке).
+        :param raw_transaction: подписанная транзакция или None, если подписать не удалось
+        :return: хэш транзакции, если сеть ее знает, иначе None
+        """
+        if raw_transaction is None:
+            return None
+        tx_hash = HexBytes(Web3.keccak(raw_transaction))
+        try:
+            self.w3.eth.get_transaction(tx_hash)
+        except Exception:
+            return None
+        return tx_hash
+
     def get_balance(
             self,
             *,
@@ -282,9 +392,9 @@ class Onchain:
             >>> token_balance = onchain.get_balance(token='0xFd086bC7CD5C481DCC9C85ebE478A1C0b69FCbb9')
         """
 
-        if token is None:
-            token = Tokens.NATIVE_TOKEN
-            token.chain = self.chain
+        # общий Tokens.NATIVE_TOKEN привязан к Ethereum, заменяем его нативным токеном текущей сети
+        if token is None or token is Tokens.NATIVE_TOKEN:
+            token = self._get_native_token()
 
         # если не указан адрес, то берем адрес аккаунта
         if not address:
@@ -316,6 +426,103 @@ class Onchain:
                              decimals=token.decimals, wei=True)
         return balance
 
+    def get_balances(
+            self,
+            tokens: Optional[list[Token | str | ChecksumAddress | None]] = None,
+            addresses: Optional[list[str | ChecksumAddress]] = None
+    ) -> list[list[Amount | None]]:
+        """
+        Получение балансов нескольких токенов на нескольких адресах пачкой через контракт Multicall3.
+
+        Все запросы balanceOf и баланса нативного токена упаковываются в вызовы aggregate3,
+        размер одного вызова ограничен config.multicall_max_calldata. Вместо (1 + токены) * адреса
+        запросов к RPC делается несколько запросов на всю пачку.
+
+        :param tokens: список токенов (Token, адрес контракта или None для нативного токена),
+            если не указан, то только нативный токен
+        :param addresses: список адресов кошельков, если не указан, то адрес аккаунта
+        :return: матрица балансов result[i][j] - баланс токена tokens[i] на адресе addresses[j],
+            None если запрос баланса не удался
+
+        :raises ValueError: если токен принадлежит другой сети
+
+        Examples:
+            >>> # Нативный баланс и USDT аккаунта одним запросом
+            >>> native, usdt = onchain.get_balances([None, Tokens.USDT_ARBITRUM_ONE])
+            >>> print(native[0].ether, usdt[0].ether)
+
+            >>> # Балансы всех токенов сети для списка адресов
+            >>> tokens = Tokens.get_tokens_by_chain(Chains.ARBITRUM_ONE)
+            >>> balances = onchain.get_balances(tokens, [account.address for account in accounts])
+        """
+        tokens = tokens or [None]
+        addresses = [to_checksum(address) for address in addresses or [self.account.address]]
+
+        prepared_tokens = []
+        for token in tokens:
+            if token is None:
+                token = self._get_native_token()
+            elif isinstance(token, str):
+                symbol, decimals = self._get_token_params(token)
+                token = Token(symbol, token, self.chain, decimals)
+            elif token.type_token != TokenTypes.NATIVE and token.chain != self.chain:
+                logger.error(
+                    f'Токен на другой сети {token.chain.name} проверяется в {self.chain.name}')
+                raise ValueError('Токен на другой сети')
+            prepared_tokens.append(token)
+
+        # собираем calldata: для нативного токена getEthBalance у multicall, для erc20 balanceOf у токена
+        calls = []
+        for token in prepared_tokens:
+            for address in addresses:
+                padded_address = bytes.fromhex(address[2:]).rjust(32, b'\0')
+                if token.type_token == TokenTypes.NATIVE:
+                    calls.append((Contracts.MULTICALL3_ADDRESS, GET_ETH_BALANCE_SELECTOR + padded_address))
+                else:
+                    calls.append((token.address, BALANCE_OF_SELECTOR + padded_address))
+
+        try:
+            results = self._multicall(calls)
+        except Exception as e:
+            logger.warning(f'Multicall3 недоступен в сети {self.chain.name}, получаем балансы по одному: {e}')
+            return [[self.get_balance(token=token if token.type_token != TokenTypes.NATIVE else None,
+                                      address=address) for address in addresses] for token in prepared_tokens]
+
+        balances = []
+        results_iter = iter(results)
+        for token in prepared_tokens:
+            row = []
+            for _ in addresses:
+                success, data = next(results_iter)
+                if success and len(data) >= 32:
+                    row.append(Amount(int.from_bytes(data[:32], 'big'), decimals=token.decimals, wei=True))
+                else:
+                    row.append(None)
+            balances.append(row)
+        return balances
+
+    def _multicall(self, calls: list[tuple[str, bytes]]) -> list[tuple[bool, bytes]]:
+        """
+        Выполняет view вызовы пачками через Multicall3.aggregate3, неудачный вызов не ломает всю пачку.
+        :param calls: список пар (адрес контракта, calldata)
+        :return: список пар (успех, возвращенные данные) в порядке вызовов
+        """
+        multicall = self._get_contract(ContractRaw(Contracts.MULTICALL3_ADDRESS, 'multicall3', self.chain))
+
+        results = []
+        chunk, chunk_size = [], 0
+        for target, call_data in calls:
+            # смещение, адрес, флаг, смещение и длина данных занимают по 32 байта, данные выравниваются до 32 байт
+            call_size = 160 + (len(call_data) + 31) // 32 * 32
+            if chunk and chunk_size + call_size > config.multicall_max_calldata:
+                results.extend(multicall.functions.aggregate3(chunk).call())
+                chunk, chunk_size = [], 0
+            chunk.append((target, True, call_data))
+            chunk_size += call_size
+        if chunk:
+            results.extend(multicall.functions.aggregate3(chunk).call())
+        return results
+
     def _validate_native_transfer_value(self, tx_params: dict) -> None:
         """
         Проверка возможности отправки нативного токена и корректировка суммы перевода, если недостаточно средств
@@ -336,10 +543,14 @@ class Onchain:
         # Шаг 2: Рассчитываем L1 комиссию (для Optimism, для других сетей = 0)
         l1_fee = self._get_l1_fee(tx_params)
 
-        # Шаг 3: Оцениваем примерный gas для транзакции
+        # Шаг 3: Оцениваем примерный gas для транзакции и получаем текущий баланс одним batch запросом
         # Используем простую транзакцию самому себе для оценки
-        gues_gas = self.w3.eth.estimate_gas(
-            {'from': self.account.address, 'to': self.account.address, 'value': 1})
+        with self.batch() as batch:
+            gues_gas = batch.add(lambda: self.w3.eth.estimate_gas(
+                {'from': self.account.address, 'to': self.account.address, 'value': 1}))
+            balance = batch.add(lambda: self.w3.eth.get_balance(self.account.address))
+        gues_gas = gues_gas.result
+        balance = Amount(balance.result, wei=True)
 
         # Шаг 4: Получаем цену газа (для EIP-1559 используем maxFeePerGas, иначе gasPrice)
         gues_gas_price = tx_params.get(
@@ -350,28 +561,25 @@ class Onchain:
         fee_spend = self._multiply(
             l1_fee.wei + gues_gas * gues_gas_price, 1.1, 1.2)
 
-        # Шаг 6: Получаем текущий баланс
-        balance = self.get_balance()
-
-        # Шаг 7: Проверяем, хватает ли средств на перевод + комиссию
+        # Шаг 6: Проверяем, хватает ли средств на перевод + комиссию
         if balance.wei - fee_spend - amount.wei >= 0:
             return  # Все ОК, средств достаточно
 
-        # Шаг 8: Средств недостаточно - пытаемся отправить максимум доступных
+        # Шаг 7: Средств недостаточно - пытаемся отправить максимум доступных
         message = f'баланс {self.chain.native_token}: {balance}, сумма: {amount} to {tx_params["to"]}'
         logger.warning(
             f'{self.account.profile_number} Недостаточно средств для отправки транзакции, {message}'
             f'Отправляем все доступные средства')
 
-        # Шаг 9: Корректируем сумму перевода = баланс - комиссия (с запасом)
+        # Шаг 8: Корректируем сумму перевода = баланс - комиссия (с запасом)
         tx_params['value'] = int(
             balance.wei - self._multiply(fee_spend, 1.1, 1.2))
 
-        # Шаг 10: Проверяем, что после вычета комиссии осталось что-то для отправки
+        # Шаг 9: Проверяем, что после вычета комиссии осталось что-то для отправки
         if tx_params['value'] > 0:
             return  # Отправляем скорректированную сумму
 
-        # Шаг 11: Даже на комиссию не хватает - выбрасываем исключение
+        # Шаг 10: Даже на комиссию не хватает - выбрасываем исключение
         logger.error(
             f'{self.account.profile_number} Недостаточно средств для отправки транзакции')
         raise ValueError('Недостаточно средств для отправки нативного токена')
@@ -379,8 +587,9 @@ class Onchain:
     def send_token(self,
                    to_address: str | ChecksumAddress,
                    amount: Amount | int | float | None = None,
-                   token: Optional[Token | str | ChecksumAddress] = None
-                   ) -> str:
+                   token: Optional[Token | str | ChecksumAddress] = None,
+                   wait: bool = True
+                   ) -> str | TxFuture:
         """
         Отправка любых типов токенов, если не указан токен или адрес контракта токена, то отправка нативного токена,
         если при отправке токена не хватает средств, то отправляется все доступное количество.
@@ -389,7 +598,8 @@ class Onchain:
         :param to_address: адрес получателя
         :param amount: сумма перевода, может быть объектом Amount, int, float или None (отправить весь баланс)
         :param token: объект Token или адрес контракта токена, если оставить пустым будет отправлен нативный токен
-        :return: хэш транзакции
+        :param wait: ждать подтверждения транзакции, если False, то возвращается TxFuture сразу после отправки
+        :return: хэш транзакции или TxFuture, если wait=False
 
         :raises ValueError: если недостаточно средств для отправки нативного токена (включая комиссию)
 
@@ -420,12 +630,19 @@ class Onchain:
             ...     to_address='0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb5',
             ...     amount=amount_to_send
             ... )
+
+            >>> # Не ждать подтверждения, продолжить работу и дождаться позже
+            >>> tx = onchain.send_token(
+            ...     to_address='0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb5',
+            ...     amount=0.01,
+            ...     wait=False
+            ... )
+            >>> receipt = tx.result()
         """
         # если не передан токен, то отправляем нативный токен
-        if token is None:
-            token = Tokens.NATIVE_TOKEN
-            token.chain = self.chain
-            token.symbol = self.chain.native_token
+        # общий Tokens.NATIVE_TOKEN привязан к Ethereum, заменяем его нативным токеном текущей сети
+        if token is None or token is Tokens.NATIVE_TOKEN:
+            token = self._get_native_token()
 
         if amount is None:
             amount = Amount(self.get_balance(token=token).wei,
@@ -464,10 +681,11 @@ class Onchain:
 
         self._estimate_gas(tx_params)
         # подписываем и отправляем транзакцию
-        tx_hash = self._sign_and_send(tx_params)
+        tx_hash = self._sign_and_send(tx_params, wait)
         message = f' {amount} {token.symbol} на адрес {to_address} '
         logger.info(
-            f'{self.account.profile_number} Транзакция отправлена [{message}] хэш: {tx_hash}')
+            f'{self.account.profile_number} Транзакция отправлена [{message}] хэш: '
+            f'{tx_hash if wait else tx_hash.tx_hash}')
         return tx_hash
 
     def _get_allowance(self, token: Token | str, spender: str | ChecksumAddress | ContractRaw) -> Amount:
@@ -496,7 +714,7 @@ class Onchain:
         return Amount(allowance, decimals=token.decimals, wei=True)
 
     def approve(self, token: Optional[Token, str], amount: Amount | int | float,
-                spender: str | ChecksumAddress | ContractRaw) -> None:
+                spender: str | ChecksumAddress | ContractRaw, wait: bool = True) -> TxFuture | None:
         """
         Одобрение транзакции на снятие токенов (approve).
 
@@ -506,7 +724,8 @@ class Onchain:
         :param token: токен, который одобряем или адрес контракта токена
         :param amount: сумма одобрения (может быть Amount, int, float). Для отзыва одобрения используйте 0
         :param spender: адрес контракта или объект ContractRaw, который получит разрешение на снятие токенов
-        :return: None
+        :param wait: ждать подтверждения транзакции, если False, то возвращается TxFuture сразу после отправки
+        :return: None или TxFuture отправленной транзакции, если wait=False
 
         Examples:
             >>> # Одобрить 100 USDT для DEX контракта
@@ -561,20 +780,32 @@ class Onchain:
         if amount.wei != 0 and allowed.wei >= amount.wei:
             return
 
+        return self._send_approve(token, amount, spender, wait)
+
+    def _send_approve(self, token: Token, amount: Amount, spender: str | ChecksumAddress | ContractRaw,
+                      wait: bool = True) -> TxFuture | None:
+        """
+        Отправка транзакции approve без проверки текущего разрешения.
+        :param token: токен, который одобряем
+        :param amount: сумма одобрения
+        :param spender: адрес контракта или объект ContractRaw, который получит разрешение на снятие токенов
+        :param wait: ждать подтверждения транзакции, если False, то возвращается TxFuture сразу после отправки
+        :return: None или TxFuture отправленной транзакции, если wait=False
+        """
         if isinstance(spender, ContractRaw):
             spender = spender.address
 
         contract = self._get_contract(token)
         tx_params = self._prepare_tx()
-        tx_params = self._get_fee(tx_params)
 
         tx_params = contract.functions.approve(
             spender, amount.wei).build_transaction(tx_params)
         self._estimate_gas(tx_params)
-        self._sign_and_send(tx_params)
+        tx_future = self._sign_and_send(tx_params, wait)
         message = f'approve {amount} {token.symbol} to {spender}'
         logger.info(
             f'{self.account.profile_number} Транзакция отправлена {message}')
+        return None if wait else tx_future
 
     def get_gas_price(self, gwei: bool = True) -> int:
         """
@@ -591,7 +822,7 @@ class Onchain:
             >>> # Получить цену газа в wei
             >>> gas_price_wei = onchain.get_gas_price(gwei=False)
         """
-        gas_price = self.w3.eth.gas_price
+        gas_price = FeeOracle.get(self.w3, self.chain).gas_price
         if gwei:
             return gas_price / 10 ** 9
         return gas_price
@@ -600,7 +831,9 @@ class Onchain:
         """
         Ожидание пока ставка газа не станет меньше лимита.
 
-        Осуществляется запрос каждые 5-10 секунд до достижения нужной цены газа.
+        Цену газа отслеживает общий для всех аккаунтов GasWatcher сети: по подписке на новые блоки, если указан
+        chain.ws_rpc, иначе запросом раз в config.gas_watcher_poll_interval секунд. Сколько бы аккаунтов ни ждали газ,
+        запросы к RPC делает один поток.
 
         :param gas_limit: лимит ставки газа в gwei, если не передан, берется из config.gas_price_limit
         :return: None
@@ -616,8 +849,7 @@ class Onchain:
         if not gas_limit:
             gas_limit = config.gas_price_limit
 
-        while self.get_gas_price() > gas_limit:
-            random_sleep(5, 10)
+        GasWatcher.get(self.chain, self.w3).wait_below(gas_limit)
 
     def get_pk_from_seed(self, seed: str | list, index: int = 0) -> str:
         """
@@ -648,18 +880,33 @@ class Onchain:
             >>> seed_list = ["word1", "word2", "word3", ..., "word12"]
             >>> private_key = onchain.get_pk_from_seed(seed_list, index=0)
         """
-        EthAccount.enable_unaudited_hdwallet_features()
-        if isinstance(seed, list):
-            seed = ' '.join(seed)
-
         # BIP-44 путь деривации для Ethereum: m/44'/60'/0'/0/{index}
         # 44' - BIP-44 стандарт
         # 60' - Ethereum coin type
         # 0' - account number
         # 0 - change (0 для внешних адресов)
         # index - номер приватного ключа
-        account_path = f"m/44'/60'/0'/0/{index}"
-        return EthAccount.from_mnemonic(seed, account_path=account_path).key.hex()
+        # растяжение seed фразы выполняется один раз, следующие номера считаются от сохраненного узла
+        return hd_wallet.get_pk_from_seed(seed, index)
+
+    def get_pks_from_seed(self, seed: str | list, count: int, start: int = 0) -> list[str]:
+        """
+        Получение нескольких приватных ключей подряд из одной seed фразы по пути m/44'/60'/0'/0/{index}.
+
+        Seed фраза растягивается (2048 раундов PBKDF2) один раз, каждый следующий ключ - одна операция HMAC,
+        поэтому тысячи ключей получаются за доли секунды. Для списка разных seed фраз
+        используйте utils.hd_wallet.get_pks_from_seeds, он распределяет фразы по процессам.
+
+        :param seed: seed фраза в виде строки или списка слов
+        :param count: количество ключей
+        :param start: номер первого ключа, по умолчанию 0
+        :return: список приватных ключей в формате hex строки
+
+        Examples:
+            >>> # Первые 100 приватных ключей seed фразы
+            >>> private_keys = onchain.get_pks_from_seed(seed, count=100)
+        """
+        return hd_wallet.get_pks_from_seed(seed, count, start)
 
     def is_eip_1559(self) -> bool:
         """
@@ -668,6 +915,9 @@ class Onchain:
         EIP-1559 - это механизм динамического расчета комиссий с базовой комиссией (baseFee)
         и чаевыми (priorityFee). Поддерживается большинством современных EVM сетей.
 
+        Значение берется из данных о сети (ChainCapabilities), запрос к RPC делается только для неизвестных сетей,
+        результат сохраняется для следующих запусков.
+
         :return: True если EIP-1559 включен, False если используется legacy режим
 
         Examples:
@@ -675,95 +925,253 @@ class Onchain:
             >>> is_eip1559 = onchain.is_eip_1559()
             >>> print(f'EIP-1559 supported: {is_eip1559}')
         """
+        if self.chain.is_eip1559 is not None:
+            return self.chain.is_eip1559
+
         fees_data = self.w3.eth.fee_history(50, 'latest')
-        base_fee = fees_data['baseFeePerGas']
-        if any(base_fee):
-            return True
-        return False
+        self.chain.is_eip1559 = any(fees_data['baseFeePerGas'])
+        ChainCapabilities.save_probe(self.chain, eip_1559=self.chain.is_eip1559)
+        return self.chain.is_eip1559
 
-    def remove_approves(self):
+    def get_transfers(
+            self,
+            token: Token | str,
+            from_block: int,
+            to_block: int | None = None,
+            *,
+            address: str | ChecksumAddress | None = None,
+            incoming: bool = True
+    ) -> list:
         """
-        Удаление всех активных approves (одобрений) токенов для смарт-контрактов
+        Получение переводов erc20 токена на адрес или с адреса по логам Transfer через LogScanner.
+        Диапазон блоков запрашивается частями параллельно, размер частей подстраивается под ограничения RPC.
 
-        Этот метод полезен для повышения безопасности кошелька, так как отзывает
-        все ранее выданные разрешения на использование токенов смарт-контрактами.
+        :param token: объект Token или адрес контракта токена
+        :param from_block: первый блок
+        :param to_block: последний блок, по умолчанию последний блок сети
+        :param address: адрес кошелька, по умолчанию адрес аккаунта
+        :param incoming: True - входящие переводы, False - исходящие
+        :return: список раскодированных логов Transfer, в log.args поля from, to и value (в wei)
 
-        Алгоритм работы:
-        1. Получает все исторические события Approval через Etherscan API
-        2. Извлекает уникальные пары (токен, spender)
-        3. Для каждой пары вызывает approve с amount=0 (отзыв разрешения)
+        Examples:
+            >>> # Входящие USDT за последние 10000 блоков
+            >>> latest = onchain.w3.eth.block_number
+            >>> for log in onchain.get_transfers(Tokens.USDT_ARBITRUM_ONE, latest - 10_000):
+            ...     print(log.args['from'], Amount(log.args['value'], decimals=6, wei=True))
+        """
+        if isinstance(token, str):
+            symbol, decimals = self._get_token_params(token)
+            token = Token(symbol, token, self.chain, decimals)
 
-        Требования:
-        - Необходим ETHERSCAN_API_KEY в .env файле
-        - Работает только с сетями, поддерживаемыми Etherscan API
+        padded_address = '0x' + to_checksum(address or self.account.address)[2:].lower().rjust(64, '0')
+        # topics[1] - отправитель, topics[2] - получатель
+        topics = [None, None, padded_address] if incoming else [None, padded_address]
+        return LogScanner(self.w3, token, event='Transfer', topics=topics).get_logs(from_block, to_block)
 
-        Примечание: Каждый отзыв - это отдельная транзакция с комиссией
+    def wait_for_transfer(
+            self,
+            token: Token | str,
+            *,
+            min_amount: Amount | int | float | None = None,
+            from_block: int | None = None,
+            timeout: int = 600,
+            poll_interval: int = 10
+    ) -> Amount:
         """
-        # Проверяем наличие API ключа Etherscan
-        if not config.ETHERSCAN_API_KEY:
-            logger.error(
-                '[onchain.remove_approves] Не указан ключ для etherscan')
-            return
+        Ожидание входящего перевода erc20 токена на адрес аккаунта, например поступления после бриджа или вывода с биржи.
 
-        # Получаем все логи событий Approval для данного адреса
-        logs = self._get_approval_logs()
-        if not logs:
-            logger.info('[onchain.remove_approves] Нет логов Approval')
-            return
+        Вместо сравнения баланса каждые несколько секунд проверяет логи Transfer только в новых блоках,
+        одним запросом eth_getLogs за опрос, и не путает поступление с другими изменениями баланса.
+
+        :param token: объект Token или адрес контракта токена
+        :param min_amount: минимальная сумма перевода, меньшие переводы игнорируются, по умолчанию любая
+        :param from_block: с какого блока искать перевод, по умолчанию с текущего блока
+        :param timeout: сколько секунд ждать перевод
+        :param poll_interval: как часто проверять новые блоки в секундах
+        :return: сумма найденного перевода
+        :raises TimeoutError: если перевод не поступил за timeout секунд
+
+        Examples:
+            >>> start_block = onchain.w3.eth.block_number
+            >>> ...  # отправляем бридж в другой сети
+            >>> amount = onchain.wait_for_transfer(Tokens.USDC_ARBITRUM_ONE, min_amount=10, from_block=start_block)
+        """
+        if isinstance(token, str):
+            symbol, decimals = self._get_token_params(token)
+            token = Token(symbol, token, self.chain, decimals)
+        if isinstance(min_amount, (int, float)):
+            min_amount = Amount(min_amount, decimals=token.decimals)
+
+        next_block = self.w3.eth.block_number if from_block is None else from_block
+        deadline = time.monotonic() + timeout
+        while True:
+            latest_block = self.w3.eth.block_number
+            for log in self.get_transfers(token, next_block, latest_block):
+                amount = Amount(log.args['value'], decimals=token.decimals, wei=True)
+                if min_amount is None or amount.wei >= min_amount.wei:
+                    logger.info(f'{self.account.profile_number} Получен перевод {amount} {token.symbol} '
+                                f'в сети {self.chain.name}')
+                    return amount
+            next_block = max(next_block, latest_block + 1)
+
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'Перевод {token.symbol} в сети {self.chain.name} не поступил за {timeout} секунд')
+            time.sleep(poll_interval)
 
-        # Используем set для хранения уникальных пар (токен, spender)
-        # Это исключает дубликаты, если было несколько approve для одной пары
-        approved = set()
+    def remove_approves(self):
+        """
+        Удаление всех активных approves (одобрений) токенов для смарт-контрактов
 
-        # Кэш для токенов, чтобы не запрашивать параметры повторно
-        tokens_cache = {}
+        Этот метод полезен для повышения безопасности кошелька, так как отзывает
+        все ранее выданные разрешения на использование токенов смарт-контрактами.
 
-        # Парсим логи и извлекаем адреса токенов и spender'ов
+        Алгоритм работы:
+        1. Берет из ApprovalIndex пары (токен, spender), найденные в прошлых запусках, и номер блока,
+           до которого логи уже просмотрены
+        2. Получает события Approval только после этого блока: через Etherscan API, если указан ETHERSCAN_API_KEY,
+           иначе запросами eth_getLogs к RPC через LogScanner
+        3. Проверяет текущие разрешения всех пар одним запросом через Multicall3
+        4. Вызывает approve с amount=0 только для пар с ненулевым разрешением
+        5. Сохраняет в индекс номер блока и пары, которые еще нужно проверять
+
+        Примечание: Каждый отзыв - это отдельная транзакция с комиссией, транзакции отправляются
+        друг за другом без ожидания подтверждения и подтверждаются вместе в конце.
+        Без ETHERSCAN_API_KEY первый запуск просматривает всю историю сети через RPC и может занять много времени,
+        следующие запуски просматривают только новые блоки.
+        """
+        # Загружаем пары из прошлых запусков и догружаем логи только новых блоков
+        checkpoint, approved = ApprovalIndex.get(self.chain.chain_id, self.account.address)
+        latest_block = self.w3.eth.block_number
+        logs = self._get_approval_logs(checkpoint + 1, latest_block) if checkpoint < latest_block else []
+
+        # Парсим логи и извлекаем адреса токенов и spender'ов, set исключает дубликаты
         for log in logs:
+            topics = [topic if isinstance(topic, str) else Web3.to_hex(topic) for topic in log['topics']]
+            # у ERC721 тот же Approval, но с tokenId в topics[3], такие разрешения здесь не отзываются
+            if len(topics) != 3:
+                continue
             # address в логе - это адрес контракта токена
-            token_address = log.get('address')
-
+            token_address = to_checksum(log['address'])
             # topics[2] содержит адрес spender (контракт, получивший approve)
             # Обрезаем первые 26 символов (64 - 40 = 24 нуля + '0x'), оставляя адрес
-            spender_address = '0x' + log.get('topics')[2][26:]
-
-            # Добавляем пару в set (автоматически исключаются дубликаты)
+            spender_address = to_checksum('0x' + topics[2][26:])
             approved.add((token_address, spender_address))
 
-        # Отзываем каждое одобрение
-        for token_address, spender_address in approved:
-            # Проверяем кэш токенов
-            token = tokens_cache.get(token_address)
-
-            # Если токена нет в кэше, получаем его параметры из контракта
-            if not token:
-                symbol, decimals = self._get_token_params(token_address)
-                token = Token(symbol, token_address, self.chain, decimals)
-                # Кэшируем токен для последующих использований
-                tokens_cache[token_address] = token
-
-            # Отзываем approve, устанавливая amount в 0
-            self.approve(token, 0, spender_address)
+        if not approved:
+            ApprovalIndex.set(self.chain.chain_id, self.account.address, latest_block, approved)
+            logger.info(f'{self.account.profile_number} Нет активных approve в сети {self.chain.name}')
+            return
 
-    def _get_approval_logs(self):
+        # Проверяем текущие разрешения всех пар одним запросом, отзывать нужно только ненулевые
+        pairs = list(approved)
+        allowances = self._get_allowances(pairs)
+        active = {pair: allowance for pair, allowance in zip(pairs, allowances) if allowance}
+        # пары, разрешение которых не удалось прочитать, остаются в индексе и проверяются в следующий запуск
+        unknown = {pair for pair, allowance in zip(pairs, allowances) if allowance is None}
+        ApprovalIndex.set(self.chain.chain_id, self.account.address, latest_block, set(active) | unknown)
+        logger.info(f'{self.account.profile_number} Активных approve: {len(active)} из {len(approved)}')
+        if unknown:
+            logger.warning(f'{self.account.profile_number} Не удалось проверить {len(unknown)} approve '
+                           f'в сети {self.chain.name}, проверим при следующем запуске')
+
+        # Отзываем каждое одобрение, не дожидаясь подтверждения каждой транзакции
+        tx_futures = []
+        for token_address, spender_address in active:
+            symbol, decimals = self._get_token_params(token_address)
+            token = Token(symbol, token_address, self.chain, decimals)
+
+            # Отзываем approve, устанавливая amount в 0, разрешение уже прочитано выше
+            tx_future = self._send_approve(token, Amount(0, decimals=decimals), spender_address, wait=False)
+            if tx_future:
+                tx_futures.append(tx_future)
+
+        # Ждем подтверждения всех отправленных отзывов
+        for tx_future in tx_futures:
+            try:
+                tx_future.result()
+            except Exception as e:
+                logger.error(f'{self.account.profile_number} Отзыв approve {tx_future.tx_hash} не подтвержден: {e}')
+
+    def _get_allowances(self, pairs: list[tuple[str, str]]) -> list[int | None]:
+        """
+        Получение разрешений аккаунта для списка пар (токен, spender) пачкой через Multicall3,
+        если Multicall3 недоступен - одним batch запросом к RPC.
+        :param pairs: список пар (адрес токена, адрес spender)
+        :return: разрешения в wei в порядке пар, None если токен не ответил на allowance
+        """
+        padded_owner = bytes.fromhex(self.account.address[2:]).rjust(32, b'\0')
+        calls = [(token, ALLOWANCE_SELECTOR + padded_owner + bytes.fromhex(spender[2:]).rjust(32, b'\0'))
+                 for token, spender in pairs]
+        try:
+            results = self._multicall(calls)
+            return [int.from_bytes(data[:32], 'big') if success and len(data) >= 32 else None
+                    for success, data in results]
+        except Exception as e:
+            logger.warning(f'Multicall3 недоступен в сети {self.chain.name}, получаем разрешения batch запросом: {e}')
+
+        allowance_calls = [self._get_contract(ContractRaw(token, 'erc20', self.chain)).functions.allowance(
+            self.account.address, to_checksum(spender)).call for token, spender in pairs]
+        try:
+            with self.batch() as batch:
+                calls = [batch.add(request) for request in allowance_calls]
+            return [call.result for call in calls]
+        except Exception as e:
+            logger.debug(f'Не удалось получить разрешения одним batch запросом, получаем по одному: {e}')
+
+        # по одному, чтобы токен без allowance не помешал проверить остальные
+        allowances = []
+        for request in allowance_calls:
+            try:
+                allowances.append(request())
+            except Exception as e:
+                logger.debug(f'Не удалось получить allowance: {e}')
+                allowances.append(None)
+        return allowances
+
+    def _get_approval_logs(self, from_block: int = 0, to_block: int | None = None) -> list[dict]:
         """
         Получение логов Approval(address,address,uint256) по адресу отправителя
-        :return: список логов Approval из etherscan по блокчейну Chain
+        через Etherscan API, если указан ETHERSCAN_API_KEY, иначе через eth_getLogs к RPC
+        :param from_block: первый блок
+        :param to_block: последний блок, по умолчанию последний блок сети
+        :return: список логов Approval в сети Chain, у каждого лога есть address и topics
         """
+        topic0 = '0x' + self.w3.keccak(text='Approval(address,address,uint256)').hex()
+        topic1 = '0x' + self.account.address[2:].lower().rjust(64, '0')
+        if to_block is None:
+            to_block = self.w3.eth.block_number
+
+        if not config.ETHERSCAN_API_KEY:
+            return LogScanner(self.w3, topics=[topic0, topic1]).get_logs(from_block, to_block)
+
         url = f'https://api.etherscan.io/v2/api'
-        params = {
-            'chainid': self.chain.chain_id,
-            'module': 'logs',
-            'action': 'getLogs',
-            'fromBlock': 0,
-            'toBlock': 'latest',
-            'topic0': '0x' + self.w3.keccak(text='Approval(address,address,uint256)').hex(),
-            'topic0_1': 'and',
-            'topic1': '0x' + self.account.address[2:].rjust(64, '0'),
-            'apikey': config.ETHERSCAN_API_KEY,
-        }
-        response = get_response(url, params)
-        return response.get('result', [])
+        logs = []
+        page = 1
+        while True:
+            params = {
+                'chainid': self.chain.chain_id,
+                'module': 'logs',
+                'action': 'getLogs',
+                'fromBlock': from_block,
+                'toBlock': to_block,
+                'topic0': topic0,
+                'topic0_1_opr': 'and',
+                'topic1': topic1,
+                'page': page,
+                'offset': ETHERSCAN_PAGE_SIZE,
+                'apikey': config.ETHERSCAN_API_KEY,
+            }
+            response = get_response(url, params)
+            result = response.get('result', [])
+            # при отсутствии логов или ошибке etherscan возвращает в result строку с описанием
+            if not isinstance(result, list):
+                if response.get('message') != 'No records found':
+                    raise ValueError(f'Ошибка получения логов Approval из etherscan: {result}')
+                return logs
+            logs.extend(result)
+            if len(result) < ETHERSCAN_PAGE_SIZE:
+                return logs
+            page += 1
 
 
 if __name__ == '__main__':
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Optional
+
+import requests
+from eth_utils import keccak
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider, Web3
+from web3._utils.http_session_manager import HTTPSessionManager
+from web3.providers import JSONBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from config import config
+
+
+class SessionPool:
+    """
+    Общий пул keep-alive сессий requests для подключения к RPC.
+
+    Сессия определяется парой (rpc, прокси), поэтому все Onchain одного аккаунта или разных аккаунтов
+    без прокси переиспользуют уже открытые TCP+TLS соединения к RPC во всех потоках.
+    Размер пула ограничен config.web3_sessions_max, сессии без запросов дольше
+    config.web3_session_idle_timeout секунд удаляются из пула. Удаленные сессии не закрываются явно,
+    так как другой поток может еще выполнять через них запрос, их соединения закрываются сборщиком мусора.
+    """
+    _sessions: OrderedDict[tuple[str, str], requests.Session] = OrderedDict()
+    _last_used: dict[tuple[str, str], float] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls, rpc: str, proxies: Optional[dict] = None) -> requests.Session:
+        """
+        Возвращает сессию для rpc и прокси из пула, создает новую, если ее еще нет.
+        :param rpc: адрес RPC
+        :param proxies: прокси в формате requests {'http': ..., 'https': ...} или None
+        :return: сессия requests
+        """
+        key = (rpc, (proxies or {}).get('https', ''))
+        with cls._lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = cls._create_session()
+                cls._sessions[key] = session
+            cls._sessions.move_to_end(key)
+            cls._last_used[key] = time.monotonic()
+            cls._evict()
+        return session
+
+    @classmethod
+    def _create_session(cls) -> requests.Session:
+        """
+        Создает сессию с пулом соединений, рассчитанным на одновременную работу всех потоков.
+        :return: сессия requests
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(10, config.threads))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @classmethod
+    def _evict(cls) -> None:
+        """
+        Удаляет из пула сессии, которые простаивают дольше таймаута, и самые старые сессии сверх лимита.
+        Последняя использованная сессия не удаляется. Вызывается под блокировкой.
+        Сессии не закрываются, чтобы не оборвать запрос, который другой поток успел начать через сессию,
+        соединения закроются, когда на сессию не останется ссылок.
+        :return: None
+        """
+        evicted = 0
+        now = time.monotonic()
+        for key in list(cls._sessions)[:-1]:
+            is_idle = now - cls._last_used[key] > config.web3_session_idle_timeout
+            if not is_idle and len(cls._sessions) <= config.web3_sessions_max:
+                break
+            del cls._sessions[key]
+            del cls._last_used[key]
+            evicted += 1
+
+        if evicted:
+            logger.debug(f'Удалено из пула {evicted} неактивных сессий RPC')
+
+    @classmethod
+    def close_all(cls) -> None:
+        """
+        Закрывает все сессии пула.
+        """
+        with cls._lock:
+            sessions = list(cls._sessions.values())
+            cls._sessions.clear()
+            cls._last_used.clear()
+        for session in sessions:
+            session.close()
+
+
+class _PooledSessionManager(HTTPSessionManager):
+    """
+    Менеджер сессий web3, который вместо своего кэша сессий по потокам берет сессию из SessionPool.
+    """
+
+    def __init__(self, proxies: Optional[dict]) -> None:
+        super().__init__()
+        self._proxies = proxies
+
+    def cache_and_return_session(self, endpoint_uri: str, session: Any = None,
+                                 request_timeout: Optional[float] = None) -> requests.Session:
+        return SessionPool.get_session(endpoint_uri, self._proxies)
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    HTTPProvider, который отправляет запросы через общую сессию из SessionPool.
+
+    Examples:
+        >>> w3 = Web3(PooledHTTPProvider(chain.rpc, request_kwargs={'proxies': proxies}))
+    """
+
+    def __init__(self, endpoint_uri: str, request_kwargs: Optional[dict] = None, **kwargs) -> None:
+        super().__init__(endpoint_uri, request_kwargs=request_kwargs, **kwargs)
+        self._request_session_manager = _PooledSessionManager((request_kwargs or {}).get('proxies'))
+
+
+class RpcEndpointError(Exception):
+    """
+    RPC не смог обработать запрос (лимит запросов, ошибка сервера), запрос можно повторить в другом RPC.
+    """
+
+
+class RpcStats:
+    """
+    Статистика работы RPC в текущем процессе: задержка последних успешных запросов и последние ошибки.
+
+    После ошибки RPC считается нездоровым config.rpc_error_timeout секунд и получает запросы,
+    только если все остальные RPC сети тоже нездоровы.
+    """
+    _stats: dict[str, RpcStats] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, rpc: str) -> None:
+        self.rpc = rpc
+        self.latencies: deque[float] = deque(maxlen=100)
+        self.results: deque[bool] = deque(maxlen=50)
+        self.unhealthy_until = 0.0
+
+    @classmethod
+    def get(cls, rpc: str) -> RpcStats:
+        """
+        Возвращает статистику RPC, создает ее при первом обращении.
+        :param rpc: адрес RPC
+        :return: статистика RPC
+        """
+        with cls._lock:
+            if rpc not in cls._stats:
+                cls._stats[rpc] = cls(rpc)
+            return cls._stats[rpc]
+
+    @classmethod
+    def rank(cls, rpcs: list[str]) -> list[str]:
+        """
+        Сортирует RPC: сначала здоровые, затем по средней задержке с учетом доли ошибок.
+        RPC без статистики идут первыми среди здоровых, чтобы их задержка тоже была измерена.
+        :param rpcs: список адресов RPC
+        :return: отсортированный список адресов RPC
+        """
+        now = time.monotonic()
+        stats = [cls.get(rpc) for rpc in rpcs]
+        stats.sort(key=lambda item: (item.unhealthy_until > now, item.average_latency * (1 + 10 * item.error_rate)))
+        return [item.rpc for item in stats]
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.results.append(True)
+
+    def record_error(self) -> None:
+        self.results.append(False)
+        self.unhealthy_until = time.monotonic() + config.rpc_error_timeout
+
+    @property
+    def average_latency(self) -> float:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.results.count(False) / len(self.results) if self.results else 0.0
+
+    def get_p95(self) -> float | None:
+        """
+        95-й перцентиль задержки успешных запросов, None если запросов пока мало.
+        """
+        if len(self.latencies) < 20:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[int(len(latencies) * 0.95)]
+
+
+class MultiRpcProvider(JSONBaseProvider):
+    """
+    Провайдер для сети с несколькими RPC.
+
+    Запросы на чтение отправляются в самый быстрый здоровый RPC, при ошибке соединения, HTTP ошибке
+    или превышении лимита запросов повторяются в следующем RPC. Если включен config.is_rpc_hedge и запрос
+    выполняется дольше p95 задержки RPC, такой же запрос параллельно отправляется в следующий RPC
+    и используется первый ответ. Подписанные транзакции отправляются по очереди до первого RPC, который их принял,
+    повторная отправка той же транзакции безопасна, ответ already known, а также nonce too low, если RPC уже знает
+    эту транзакцию, считается успешной отправкой.
+
+    Examples:
+        >>> w3 = Web3(MultiRpcProvider(['https://rpc1...', 'https://rpc2...'], request_kwargs=request_kwargs))
+    """
+    WRITE_METHODS = {'eth_sendRawTransaction', 'eth_sendTransaction'}
+    _executor: ThreadPoolExecutor | None = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, endpoints: list[str], request_kwargs: Optional[dict] = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.endpoints = list(endpoints)
+        self.endpoint_uri = self.endpoints[0]
+        # повторы делает сам MultiRpcProvider через другие RPC, поэтому повторы web3 отключены
+        self._providers = {
+            rpc: PooledHTTPProvider(rpc, request_kwargs=request_kwargs, exception_retry_configuration=None)
+            for rpc in self.endpoints
+        }
+
+    def __str__(self) -> str:
+        return f'RPC connection {", ".join(self.endpoints)}'
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        if method in self.WRITE_METHODS:
+            return self._send_write(method, params)
+        return self._send_read(lambda provider: provider.make_request(method, params))
+
+    def make_batch_request(self, requests: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse] | RPCResponse:
+        return self._send_read(lambda provider: provider.make_batch_request(requests))
+
+    def _send_read(self, request: Callable[[HTTPProvider], Any]) -> Any:
+        """
+        Отправляет запрос на чтение в лучший RPC, при ошибке в следующий, при медленном ответе дублирует запрос.
+        :param request: функция, которая выполняет запрос через переданный провайдер
+        :return: ответ RPC
+        """
+        ranked = RpcStats.rank(self.endpoints)
+        if not config.is_rpc_hedge or len(ranked) == 1:
+            return self._send_sequential(ranked, request)
+
+        pending = {}
+        next_index = 0
+        last_error = None
+        while True:
+            if not pending:
+                if next_index == len(ranked):
+                    raise last_error
+                rpc = ranked[next_index]
+                next_index += 1
+                pending[self._get_executor().submit(self._timed_request, rpc, request)] = rpc
+
+            # если последний запущенный запрос дольше p95 задержки его RPC, запускаем запрос в следующем RPC
+            hedge_delay = RpcStats.get(ranked[next_index - 1]).get_p95() if next_index < len(ranked) else None
+            done, _ = wait(pending, timeout=hedge_delay, return_when=FIRST_COMPLETED)
+            if not done:
+                rpc = ranked[next_index]
+                next_index += 1
+                pending[self._get_executor().submit(self._timed_request, rpc, request)] = rpc
+                continue
+
+            for future in done:
+                pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+
+    def _send_sequential(self, ranked: list[str], request: Callable[[HTTPProvider], Any]) -> Any:
+        """
+        Отправляет запрос по очереди в RPC из списка до первого успешного ответа.
+        :param ranked: отсортированный список RPC
+        :param request: функция, которая выполняет запрос через переданный провайдер
+        :return: ответ RPC
+        """
+        last_error = None
+        for rpc in ranked:
+            try:
+                return self._timed_request(rpc, request)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    def _send_write(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """
+        Отправляет транзакцию в RPC по очереди до первого, который ее принял.
+        :param method: метод отправки транзакции
+        :param params: параметры метода
+        :return: ответ RPC
+        """
+        ranked = RpcStats.rank(self.endpoints)
+        last_error = None
+        for index, rpc in enumerate(ranked):
+            try:
+                response = self._timed_request(rpc, lambda provider: provider.make_request(method, params))
+            except Exception as e:
+                last_error = e
+                continue
+
+            # предыдущие RPC не ответили, но могли принять транзакцию: тогда следующий RPC ответит already known
+            # или nonce too low (если транзакция уже в блоке), это успешная отправка с хэшем keccak(raw_tx)
+            if index and method == 'eth_sendRawTransaction' and self._is_sent_before(rpc, response, params[0]):
+                tx_hash = Web3.to_hex(keccak(hexstr=params[0]))
+                return {'jsonrpc': '2.0', 'id': response.get('id'), 'result': tx_hash}
+            return response
+        raise last_error
+
+    def _is_sent_before(self, rpc: str, response: RPCResponse, raw_transaction: str) -> bool:
+        """
+        Проверяет, что ошибка отправки транзакции означает, что она уже дошла до сети через другой RPC.
+        already known - транзакция уже в mempool. nonce too low - nonce занят, успехом считается, только если
+        RPC знает транзакцию с этим хэшем, иначе nonce заняла другая транзакция.
+        :param rpc: адрес RPC, который вернул ответ
+        :param response: ответ RPC на отправку транзакции
+        :param raw_transaction: подписанная транзакция в hex
+        :return: True, если транзакция уже отправлена
+        """
+        error = response.get('error') if isinstance(response, dict) else None
+        if not error:
+            return False
+        message = str(error.get('message', '') if isinstance(error, dict) else error).lower()
+        if 'already known' in message or 'known transaction' in message:
+            return True
+        if 'nonce too low' not in message:
+            return False
+        tx_hash = Web3.to_hex(keccak(hexstr=raw_transaction))
+        try:
+            found = self._providers[rpc].make_request(RPCEndpoint('eth_getTransactionByHash'), [tx_hash])
+        except Exception as e:
+            logger.debug(f'Не удалось проверить транзакцию {tx_hash} в {rpc}: {e}')
+            return False
+        return bool(found.get('result'))
+
+    def _timed_request(self, rpc: str, request: Callable[[HTTPProvider], Any]) -> Any:
+        """
+        Выполняет запрос через провайдер RPC и записывает задержку или ошибку в статистику RPC.
+        :param rpc: адрес RPC
+        :param request: функция, которая выполняет запрос через переданный провайдер
+        :return: ответ RPC
+        :raises RpcEndpointError: если RPC ответил ошибкой лимита запросов или ошибкой сервера
+        """
+        stats = RpcStats.get(rpc)
+        start = time.perf_counter()
+        try:
+            response = request(self._providers[rpc])
+            if self.is_rate_limited(response):
+                raise RpcEndpointError(f'{rpc}: {response["error"]}')
+        except Exception as e:
+            stats.record_error()
+            logger.debug(f'Ошибка RPC {rpc}: {e}')
+            raise
+        stats.record_success(time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def is_rate_limited(response: Any) -> bool:
+        """
+        Проверяет, что RPC ответил ошибкой превышения лимита запросов, а не ошибкой самого запроса.
+        :param response: ответ RPC
+        :return: True, если запрос стоит повторить в другом RPC
+        """
+        if not isinstance(response, dict) or 'error' not in response:
+            return False
+        error = response['error'] if isinstance(response['error'], dict) else {'message': str(response['error'])}
+        message = str(error.get('message', '')).lower()
+        return error.get('code') in (429, -32005) or 'rate limit' in message or 'too many requests' in message
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=max(8, config.threads * 2),
+                                                   thread_name_prefix='rpc-hedge')
+            return cls._executor
+
+
+def get_provider_key(provider: Any) -> str:
+    """
+    Ключ подключения к RPC для группировки запросов и учета возможностей RPC.
+    Для MultiRpcProvider это все его RPC, так как запросы через него уходят в любой из них, а не в endpoint_uri.
+    :param provider: провайдер web3
+    :return: адрес RPC или адреса всех RPC провайдера через запятую
+    """
+    if isinstance(provider, MultiRpcProvider):
+        return ','.join(provider.endpoints)
+    return getattr(provider, 'endpoint_uri', '')
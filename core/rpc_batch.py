@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable
+
+from loguru import logger
+from web3 import Web3
+from web3.exceptions import BadResponseFormat, Web3RPCError
+
+from config import config
+from core.providers import get_provider_key
+
+# коды ошибок JSON-RPC, которыми RPC отклоняет сам batch запрос (invalid request, method not found)
+BATCH_REJECT_CODES = (-32600, -32601)
+# после скольких неудачных batch запросов подряд считать, что RPC не поддерживает пачки
+BATCH_FAILURES_LIMIT = 3
+
+
+class BatchCall:
+    """
+    Отложенный запрос внутри RpcBatch, результат доступен в атрибуте result после выполнения пачки.
+    """
+
+    def __init__(self, request: Callable[[], Any]) -> None:
+        self.request = request
+        self.result = None
+
+
+class RpcBatch:
+    """
+    Пачка независимых запросов на чтение, которая отправляется в RPC одним JSON-RPC массивом.
+
+    Запросы передаются функциями без аргументов, например lambda: w3.eth.get_balance(address)
+    или contract.functions.decimals().call. Пачка выполняется при выходе из блока with.
+    Если batch запрос не удался, запросы выполняются по очереди. RPC запоминается, чтобы больше не
+    пробовать отправлять в него пачки, только если он явно отклонил пачку (ошибка -32600 или ответ
+    не списком) или batch запросы к нему не удались BATCH_FAILURES_LIMIT раз подряд, поэтому разовый
+    таймаут или ошибка 5xx не отключают пачки до конца работы.
+
+    Examples:
+        >>> with RpcBatch(w3) as batch:
+        ...     nonce = batch.add(lambda: w3.eth.get_transaction_count(address))
+        ...     balance = batch.add(lambda: w3.eth.get_balance(address))
+        >>> print(nonce.result, balance.result)
+    """
+    # RPC, которые отклонили batch запрос или не смогли выполнить его несколько раз подряд
+    _unsupported_rpcs: set[str] = set()
+    # количество неудачных batch запросов подряд по RPC
+    _failures: dict[str, int] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, w3: Web3) -> None:
+        self.w3 = w3
+        self.calls: list[BatchCall] = []
+
+    def __enter__(self) -> RpcBatch:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.execute()
+
+    def add(self, request: Callable[[], Any]) -> BatchCall:
+        """
+        Добавляет запрос в пачку.
+        :param request: функция без аргументов, которая делает запрос к RPC
+        :return: объект BatchCall, в котором после выполнения пачки будет результат
+        """
+        call = BatchCall(request)
+        self.calls.append(call)
+        return call
+
+    def execute(self) -> list[Any]:
+        """
+        Отправляет все запросы пачки одним HTTP запросом, при ошибке выполняет их по одному.
+        :return: список результатов в порядке добавления запросов
+        """
+        if not self._is_batch_available():
+            return self._execute_sequential()
+
+        try:
+            with self.w3.batch_requests() as batcher:
+                for call in self.calls:
+                    batcher.add(call.request())
+                results = batcher.execute()
+        except Exception as e:
+            logger.debug(f'Batch запрос к {self._rpc} не удался, выполняем запросы по одному: {e}')
+            results = self._execute_sequential()
+            # если по одному запросы прошли, значит ошибка в пачке, а не в самих запросах
+            self._register_failure(e)
+            return results
+
+        with self._lock:
+            self._failures.pop(self._rpc, None)
+        for call, result in zip(self.calls, results):
+            call.result = result
+        return results
+
+    def _execute_sequential(self) -> list[Any]:
+        """
+        Выполняет запросы пачки по очереди.
+        :return: список результатов в порядке добавления запросов
+        """
+        for call in self.calls:
+            call.result = call.request()
+        return [call.result for call in self.calls]
+
+    def _register_failure(self, error: Exception) -> None:
+        """
+        Учитывает неудачный batch запрос и отключает пачки для RPC, если он явно отклонил пачку
+        или batch запросы не удались BATCH_FAILURES_LIMIT раз подряд.
+        :param error: ошибка batch запроса
+        """
+        with self._lock:
+            failures = self._failures.get(self._rpc, 0) + 1
+            self._failures[self._rpc] = failures
+            if not self._is_batch_rejected(error) and failures < BATCH_FAILURES_LIMIT:
+                return
+            self._failures.pop(self._rpc, None)
+            self._unsupported_rpcs.add(self._rpc)
+        logger.warning(f'RPC {self._rpc} не поддерживает batch запросы, запросы будут отправляться по одному')
+
+    @staticmethod
+    def _is_batch_rejected(error: Exception) -> bool:
+        """
+        Проверяет, что RPC отклонил сам batch запрос: ответил ошибкой invalid request / method not found
+        или вернул ответ не списком.
+        :param error: ошибка batch запроса
+        :return: True, если RPC не принимает batch запросы
+        """
+        if isinstance(error, BadResponseFormat):
+            return True
+        if isinstance(error, Web3RPCError):
+            rpc_error = (error.rpc_response or {}).get('error')
+            if isinstance(rpc_error, dict):
+                return rpc_error.get('code') in BATCH_REJECT_CODES
+            return any(str(code) in error.message for code in BATCH_REJECT_CODES)
+        return False
+
+    def _is_batch_available(self) -> bool:
+        """
+        Проверяет, имеет ли смысл отправлять пачку: batch включен в конфиге,
+        запросов больше одного и RPC не отказывался от batch запросов ранее.
+        """
+        return config.is_rpc_batch and len(self.calls) > 1 and self._rpc not in self._unsupported_rpcs
+
+    @property
+    def _rpc(self) -> str:
+        return get_provider_key(self.w3.provider)
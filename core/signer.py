@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from eth_account import Account as EthAccount
+from loguru import logger
+
+from config import config
+
+
+def _sign(tx: dict, private_key: str) -> bytes:
+    """
+    Подписывает транзакцию, выполняется в процессе пула подписи.
+    :param tx: параметры транзакции
+    :param private_key: приватный ключ
+    :return: подписанная транзакция для eth_sendRawTransaction
+    """
+    return bytes(EthAccount.sign_transaction(tx, private_key).raw_transaction)
+
+
+class TxSigner:
+    """
+    Общий для всех потоков пул процессов для подписи транзакций.
+
+    Подпись (secp256k1 и RLP кодирование) нагружает процессор и держит GIL, поэтому при массовой отправке
+    транзакций из многих потоков подпись выносится в config.signing_processes отдельных процессов,
+    а потоки в это время продолжают работать с сетью. Если signing_processes = 0 или воркеры
+    уже запущены в режиме процессов, транзакция подписывается в текущем потоке.
+
+    Examples:
+        >>> raw_transaction = TxSigner.sign(tx_params, account.private_key)
+        >>> tx_hash = w3.eth.send_raw_transaction(raw_transaction)
+    """
+    _executor: ProcessPoolExecutor | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def sign(cls, tx: dict, private_key: str) -> bytes:
+        """
+        Подписывает транзакцию в пуле процессов или в текущем потоке.
+        :param tx: параметры транзакции
+        :param private_key: приватный ключ
+        :return: подписанная транзакция для eth_sendRawTransaction
+        """
+        executor = cls._get_executor()
+        if executor is None:
+            return _sign(tx, private_key)
+
+        try:
+            return executor.submit(_sign, dict(tx), private_key).result()
+        except BrokenProcessPool as e:
+            logger.warning(f'Пул подписи транзакций остановлен, подписываем в текущем потоке: {e}')
+            with cls._lock:
+                if cls._executor is executor:
+                    cls._executor = None
+            return _sign(tx, private_key)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Останавливает процессы пула подписи, следующий вызов sign запустит их заново.
+        """
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor | None:
+        """
+        Возвращает пул процессов, создает его при первом обращении.
+        :return: пул процессов или None, если подписывать нужно в текущем потоке
+        """
+        # в процессе воркера (workers_mode = 'process') GIL не общий с другими аккаунтами, пул не нужен
+        if config.signing_processes <= 0 or multiprocessing.parent_process() is not None:
+            return None
+
+        with cls._lock:
+            if cls._executor is None:
+                # spawn, а не fork: процесс уже запустил потоки, копировать их блокировки в дочерний процесс небезопасно
+                cls._executor = ProcessPoolExecutor(max_workers=config.signing_processes,
+                                                    mp_context=multiprocessing.get_context('spawn'))
+            return cls._executor
+
+
+atexit.register(TxSigner.shutdown)
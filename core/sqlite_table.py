@@ -0,0 +1,445 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Iterator
+
+from loguru import logger
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+
+from config import config
+from models.account import Account
+
+
+class SqliteTable:
+    """
+    Таблица статистики в базе SQLite с теми же методами, что и у класса Excel.
+
+    Используется вместо Excel для report.xlsx и других таблиц статистики, когда несколько воркеров
+    (потоков или процессов) одновременно обновляют счетчики. Каждая запись - отдельная транзакция,
+    файл не перезаписывается целиком. Для просмотра в Excel таблицу можно выгрузить методом export_to_excel.
+
+    Строки и столбцы нумеруются как в Excel: 1 строка - заголовки, данные начинаются со 2 строки.
+    База хранится рядом с таблицей: report.xlsx -> config/data/report.db. Если при первом запуске
+    рядом лежит xlsx файл, его данные переносятся в базу.
+    """
+
+    def __init__(self, account: Account | None = None, file: str = 'report.xlsx') -> None:
+        """
+        Инициализация класса
+        :param account: объект аккаунта
+        :param file: название таблицы с расширением, например report.xlsx, база будет называться report.db
+        """
+        self.account = account
+        self._open(file)
+        if account:
+            self.acc_row = self._find_acc_row(str(self.account.profile_number))
+        else:
+            self.account = Account(0)
+
+    def _open(self, file: str) -> None:
+        """
+        Подключается к базе таблицы, создает схему и переносит данные из xlsx, если база новая.
+        :param file: название таблицы с расширением
+        :return: None
+        """
+        self._excel_file = os.path.join(config.PATH_DATA, file)
+        self._file = os.path.splitext(self._excel_file)[0] + '.db'
+        self._local = threading.local()
+
+        with self._transaction() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS columns (name TEXT PRIMARY KEY, position INTEGER UNIQUE NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS rows (row INTEGER PRIMARY KEY, profile_number TEXT)')
+            conn.execute('CREATE INDEX IF NOT EXISTS rows_profile_number ON rows (profile_number)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cells ('
+                         'row INTEGER NOT NULL, column TEXT NOT NULL, value, PRIMARY KEY (row, column))')
+            conn.execute('CREATE INDEX IF NOT EXISTS cells_column ON cells (column)')
+            # база новая - переносим данные из xlsx в той же транзакции, чтобы другие воркеры их дождались
+            is_new = conn.execute('SELECT COUNT(*) FROM columns').fetchone()[0] == 0
+            if is_new and os.path.exists(self._excel_file):
+                self._import(conn, self._excel_file)
+            conn.execute("INSERT OR IGNORE INTO columns (name, position) VALUES ('Profile Number', 1)")
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """
+        Подключение к базе для текущего потока, sqlite не разрешает использовать одно подключение из разных потоков.
+        :return: подключение к базе
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._file, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Транзакция с блокировкой записи с самого начала (BEGIN IMMEDIATE),
+        чтобы чтение и запись счетчика не перемешивались между воркерами.
+        """
+        conn = self._conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def change_table(self, table_name: str) -> None:
+        """
+        Меняет таблицу для работы. Если базы нет, метод создаст её.
+        :param table_name: имя таблицы с расширением, например: report.xlsx
+        :return: None
+        """
+        self._open(table_name)
+
+    def connect_account(self, account: Account) -> None:
+        """
+        Подключает аккаунт к таблице. Автоматически находит строку аккаунта по profile_number.
+        :param account: объект аккаунта
+        :return: None
+        """
+        self.account = account
+        self.acc_row = self._find_acc_row(str(self.account.profile_number))
+
+    def flush(self) -> None:
+        """
+        Ничего не делает, каждая запись сохраняется сразу. Нужен для совместимости с Excel.
+        :return: None
+        """
+
+    def _find_acc_row(self, profile_number: str) -> int:
+        """
+        Находит номер строки в таблице по номеру профиля. Если строки нет, добавляет ее.
+        :param profile_number: номер профиля
+        :return: номер строки
+        """
+        query = 'SELECT row FROM rows WHERE profile_number = ? ORDER BY row LIMIT 1'
+        result = self._conn.execute(query, (profile_number,)).fetchone()
+        if result:
+            return result[0]
+        with self._transaction() as conn:
+            # повторная проверка под блокировкой записи: строку мог добавить другой воркер
+            result = conn.execute(query, (profile_number,)).fetchone()
+            if result:
+                return result[0]
+            row = self._next_row(conn)
+            conn.execute('INSERT INTO rows (row, profile_number) VALUES (?, ?)', (row, profile_number))
+            conn.execute('INSERT INTO cells (row, column, value) VALUES (?, ?, ?)', (row, 'Profile Number', profile_number))
+        return row
+
+    @staticmethod
+    def _next_row(conn: sqlite3.Connection) -> int:
+        """
+        Номер следующей свободной строки.
+        :param conn: подключение к базе
+        :return: номер строки
+        """
+        return max(conn.execute('SELECT MAX(row) FROM rows').fetchone()[0] or 1, 1) + 1
+
+    def add_row(self, values: list) -> None:
+        """
+        Добавляет значения из списка в строку в конец таблицы. Каждое значение в отдельный столбец по порядку.
+        :param values: список значений
+        :return: None
+        """
+        with self._transaction() as conn:
+            row = self._next_row(conn)
+            profile_number = str(values[0]) if values and values[0] is not None else None
+            conn.execute('INSERT INTO rows (row, profile_number) VALUES (?, ?)', (row, profile_number))
+            for position, value in enumerate(values, start=1):
+                if value is None:
+                    continue
+                column = self._column_by_position(conn, position)
+                conn.execute('INSERT OR REPLACE INTO cells (row, column, value) VALUES (?, ?, ?)', (row, column, value))
+
+    @staticmethod
+    def _column_by_position(conn: sqlite3.Connection, position: int) -> str:
+        """
+        Возвращает имя столбца по номеру, если столбца нет, создает его с именем-буквой как в Excel.
+        :param conn: подключение к базе
+        :param position: номер столбца
+        :return: имя столбца
+        """
+        result = conn.execute('SELECT name FROM columns WHERE position = ?', (position,)).fetchone()
+        if result:
+            return result[0]
+        name = get_column_letter(position)
+        conn.execute('INSERT INTO columns (name, position) VALUES (?, ?)', (name, position))
+        return name
+
+    def set_cell(self, column_name: str, value: str | int | float, row: Optional[int] = None) -> None:
+        """
+        Устанавливает значение в ячейку по имени столбца и номеру строчки.
+        Если номер строчки не передан, записывает в строку аккаунта. Если столбец не существует, создает его.
+        :param column_name: имя столбца
+        :param value: значение для записи (строка, число или float)
+        :param row: номер строки, если не указан, то берется строка аккаунта
+        :return: None
+        """
+        row = self.acc_row if not row else row
+        self.find_column(column_name)
+        with self._transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO cells (row, column, value) VALUES (?, ?, ?)', (row, column_name, value))
+            if column_name == 'Profile Number':
+                conn.execute('INSERT OR REPLACE INTO rows (row, profile_number) VALUES (?, ?)', (row, str(value)))
+
+    def add_column(self, column_name: str) -> int:
+        """
+        Добавляет столбец в конец таблицы. Если столбец уже существует, возвращает его номер.
+        :param column_name: имя столбца
+        :return: номер столбца
+        """
+        with self._transaction() as conn:
+            result = conn.execute('SELECT position FROM columns WHERE name = ?', (column_name,)).fetchone()
+            if result:
+                return result[0]
+            col_num = conn.execute('SELECT MAX(position) FROM columns').fetchone()[0] + 1
+            conn.execute('INSERT INTO columns (name, position) VALUES (?, ?)', (column_name, col_num))
+        logger.info(
+            f'{self.account.profile_number} Создан новый столбец {column_name} (столбец {col_num}).')
+        return col_num
+
+    def find_column(self, column_name: str) -> int:
+        """
+        Находит номер столбца по имени. Если столбец не найден, создает его.
+        :param column_name: имя столбца
+        :return: номер столбца
+        """
+        result = self._conn.execute('SELECT position FROM columns WHERE name = ?', (column_name,)).fetchone()
+        if result:
+            return result[0]
+        logger.warning(
+            f'{self.account.profile_number} Столбец {column_name} не найден, создаем новый.')
+        return self.add_column(column_name)
+
+    def _get_value(self, column_name: str, row: int) -> str | int | float | None:
+        """
+        Читает значение ячейки.
+        :param column_name: имя столбца
+        :param row: номер строки
+        :return: значение ячейки или None
+        """
+        result = self._conn.execute(
+            'SELECT value FROM cells WHERE row = ? AND column = ?', (row, column_name)).fetchone()
+        return result[0] if result else None
+
+    def get_cell(self, column_name: str, row: Optional[int] = None) -> str | int | None:
+        """
+        Возвращает значение ячейки по имени столбца из строки аккаунта.
+        Если столбец не существует, он будет создан автоматически.
+        :param column_name: имя столбца
+        :param row: номер строки, если не указан, то берется строка аккаунта
+        :return: значение ячейки (строка, число или None если ячейка пустая)
+        """
+        row = self.acc_row if not row else row
+        self.find_column(column_name)
+        return self._get_value(column_name, row)
+
+    def get_column(self, column_name: str, is_empty_pass: bool = False) -> list[str | int | None]:
+        """
+        Возвращает список значений столбца по имени. Если в ячейке пусто, возвращает None.
+        :param column_name: имя столбца
+        :param is_empty_pass: пропускать ли пустые ячейки
+        :return: список значений столбца
+        """
+        self.find_column(column_name)
+        values = [value for (value,) in self._conn.execute(
+            'SELECT cells.value FROM rows LEFT JOIN cells ON cells.row = rows.row AND cells.column = ? '
+            'ORDER BY rows.row', (column_name,))]
+        if is_empty_pass:
+            return [value for value in values if value]
+        return values
+
+    def get_row(self, row: Optional[int] = None) -> list[str | int | None]:
+        """
+        Возвращает список значений из строки аккаунта.
+        :param row: номер строки, если не указан, то берется строка аккаунта
+        :return: список значений строки
+        """
+        row = self.acc_row if not row else row
+        return [value for (value,) in self._conn.execute(
+            'SELECT cells.value FROM columns LEFT JOIN cells ON cells.column = columns.name AND cells.row = ? '
+            'ORDER BY columns.position', (row,))]
+
+    @staticmethod
+    def _to_number(column_name: str, value: str | int | float | None, is_float_allowed: bool = True) -> int | float:
+        """
+        Приводит значение счетчика к числу, пустое значение считается 0.
+        :param column_name: имя столбца, для текста ошибки
+        :param value: значение ячейки
+        :param is_float_allowed: приводить ли строку с дробным числом к float, как Excel.get_counter,
+        или считать ее ошибкой, как Excel.increase_counter
+        :return: число
+        :raises TypeError: если значение не является числом
+        """
+        if value is None:
+            return 0
+        if isinstance(value, str):
+            if value.isdigit():
+                return int(value)
+            if is_float_allowed and value.replace('.', '', 1).isdigit():
+                return float(value)
+            raise TypeError(f'Значение в столбце {column_name} не является числом')
+        return value
+
+    def get_counter(self, column_name: str, row: Optional[int] = None) -> int | float:
+        """
+        Возвращает значение счетчика из ячейки. Если ячейка пустая, возвращает 0 и записывает 0 в ячейку.
+        :param column_name: имя столбца
+        :param row: номер строки, если не указан, то берется строка аккаунта
+        :return: значение ячейки
+        """
+        row = self.acc_row if not row else row
+        self.find_column(column_name)
+        with self._transaction() as conn:
+            value = self._get_value(column_name, row)
+            number = self._to_number(column_name, value)
+            if number is not value:
+                conn.execute('INSERT OR REPLACE INTO cells (row, column, value) VALUES (?, ?, ?)',
+                             (row, column_name, number))
+        return number
+
+    def increase_counter(self, column_name: str, number: int = 1, row: Optional[int] = None) -> int:
+        """
+        Увеличивает значение счетчика на 1 или на указанное число. Чтение и запись выполняются в одной транзакции,
+        поэтому одновременные увеличения из разных воркеров не теряются.
+        :param column_name: имя столбца
+        :param number: число, на которое увеличить счетчик (по умолчанию 1)
+        :param row: номер строки, если не указан, то берется строка аккаунта
+        :return: результирующее значение в ячейке
+        :raises TypeError: если значение в ячейке не является числом
+        """
+        row = self.acc_row if not row else row
+        self.find_column(column_name)
+        with self._transaction() as conn:
+            # строку с дробным числом, как и Excel.increase_counter, не увеличиваем
+            value = self._to_number(column_name, self._get_value(column_name, row), is_float_allowed=False) + number
+            conn.execute('INSERT OR REPLACE INTO cells (row, column, value) VALUES (?, ?, ?)', (row, column_name, value))
+        return value
+
+    def set_date(self, column_name: str, row: Optional[int] = None) -> None:
+        """
+        Записывает текущее время и дату в таблицу в формате config.date_format.
+        :param column_name: имя столбца
+        :param row: номер строки, если не указан, то берется строка аккаунта
+        :return: None
+        """
+        self.set_cell(column_name, datetime.now().strftime(config.date_format), row)
+
+    def get_date(self, column_name: str, row: Optional[int] = None) -> datetime:
+        """
+        Возвращает дату из ячейки таблицы. Если в ячейке пусто, возвращает старую дату (2000-01-01).
+        Даты, перенесенные из xlsx через import_from_excel, хранятся в формате ISO, остальные в config.date_format.
+        :param column_name: имя столбца
+        :param row: номер строки, если не указан, то берется строка аккаунта
+        :return: объект datetime с датой из ячейки
+        """
+        date_str = self.get_cell(column_name, row)
+        if isinstance(date_str, datetime):
+            return date_str
+        if date_str:
+            try:
+                return datetime.fromisoformat(date_str)
+            except ValueError:
+                return datetime.strptime(date_str, config.date_format)
+        logger.error(
+            f'{self.account.profile_number} Не нашли дату в столбце {column_name} возвращаем старую дату')
+        return datetime.now().replace(year=2000)
+
+    def get_counters(self, column_name: str) -> list[int | float]:
+        """
+        Возвращает список значений счетчиков из столбца. Если ячейка пустая, возвращает 0.
+        :param column_name: имя столбца
+        :return: список значений счетчиков
+        """
+        values = []
+        for value in self.get_column(column_name):
+            try:
+                values.append(self._to_number(column_name, value))
+            except TypeError:
+                values.append(value)
+        return values
+
+    def import_from_excel(self, file: str) -> None:
+        """
+        Переносит данные из xlsx таблицы в базу. Существующие ячейки с теми же номерами строк перезаписываются.
+        :param file: полный путь к xlsx файлу
+        :return: None
+        """
+        with self._transaction() as conn:
+            self._import(conn, file)
+
+    def _import(self, conn: sqlite3.Connection, file: str) -> None:
+        """
+        Переносит данные из xlsx таблицы в базу внутри открытой транзакции.
+        :param conn: подключение к базе с открытой транзакцией
+        :param file: полный путь к xlsx файлу
+        :return: None
+        """
+        table = load_workbook(file, read_only=True)
+        try:
+            rows = table.active.iter_rows(values_only=True)
+            header = next(rows, ())
+            names = []
+            for position, name in enumerate(header, start=1):
+                name = str(name) if name is not None else get_column_letter(position)
+                conn.execute('INSERT OR REPLACE INTO columns (name, position) VALUES (?, ?)', (name, position))
+                names.append(name)
+            for row, values in enumerate(rows, start=2):
+                profile_number = str(values[0]) if values and values[0] is not None else None
+                conn.execute('INSERT OR REPLACE INTO rows (row, profile_number) VALUES (?, ?)', (row, profile_number))
+                conn.executemany(
+                    'INSERT OR REPLACE INTO cells (row, column, value) VALUES (?, ?, ?)',
+                    [(row, name, value) for name, value in zip(names, values) if value is not None])
+        finally:
+            table.close()
+        logger.info(f'Данные из {file} перенесены в базу {self._file}')
+
+    def export_to_excel(self, file: str | None = None) -> str:
+        """
+        Собирает xlsx таблицу из базы для просмотра в Excel. Номера строк сохраняются,
+        пропущенные строки остаются пустыми.
+        :param file: полный путь к xlsx файлу, по умолчанию таблица рядом с базой, например report.xlsx
+        :return: путь к созданному файлу
+
+        Examples:
+            >>> table = SqliteTable(file='report.xlsx')
+            >>> table.export_to_excel()  # config/data/report.xlsx
+        """
+        file = file or self._excel_file
+        columns = [name for (name,) in self._conn.execute('SELECT name FROM columns ORDER BY position')]
+        positions = {name: index for index, name in enumerate(columns)}
+
+        table = Workbook(write_only=True)
+        sheet = table.create_sheet()
+        sheet.append(columns)
+
+        # write_only таблица заполняется только подряд, последняя записанная строка - заголовки
+        last_row, current_row, values = 1, None, []
+        query = ('SELECT numbers.row, cells.column, cells.value '
+                 'FROM (SELECT row FROM rows UNION SELECT row FROM cells) AS numbers '
+                 'LEFT JOIN cells ON cells.row = numbers.row ORDER BY numbers.row')
+        for row, column, value in self._conn.execute(query):
+            if row != current_row:
+                if current_row is not None:
+                    sheet.append(values)
+                    last_row = current_row
+                for _ in range(last_row + 1, row):
+                    sheet.append([])
+                current_row, values = row, [None] * len(columns)
+            if column in positions:
+                values[positions[column]] = value
+        if current_row is not None:
+            sheet.append(values)
+
+        table.save(file)
+        return file
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from config import config
+from core.excel import Excel
+from core.sqlite_table import SqliteTable
+from models.account import Account
+
+
+def get_table(account: Account | None = None, file: str = 'report.xlsx') -> Excel | SqliteTable:
+    """
+    Возвращает таблицу статистики в зависимости от config.statistics_backend.
+    У Excel и SqliteTable одинаковые методы, поэтому код активностей не зависит от выбранного хранилища.
+    :param account: объект аккаунта
+    :param file: название таблицы с расширением, например report.xlsx
+    :return: объект Excel или SqliteTable
+
+    Examples:
+        >>> report = get_table(bot.account)
+        >>> report.increase_counter('Swap')
+    """
+    if config.statistics_backend == 'sqlite':
+        return SqliteTable(account, file)
+    return Excel(account, file)
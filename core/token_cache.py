@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+from config import config, Tokens
+from core.json_store import JsonStore
+from models.token import TokenTypes
+from utils.utils import to_checksum
+
+
+class TokenCache:
+    """
+    Кэш параметров токенов (symbol, decimals) по сети и адресу контракта.
+
+    Параметры токена не меняются, поэтому после первого запроса к RPC они хранятся в памяти
+    (LRU на config.token_cache_size записей) и в файле config/data/tokens_cache.json, общем для всех
+    Onchain и всех запусков. Токены из реестра Tokens доступны без запросов с самого начала, в файл не
+    записываются и имеют приоритет над ним, поэтому исправления в config/tokens.py сразу вступают в силу.
+
+    Examples:
+        >>> params = TokenCache.get(chain.chain_id, token_address)
+        >>> if params is None:
+        ...     params = request_token_params(token_address)
+        ...     TokenCache.set(chain.chain_id, token_address, *params)
+        >>> symbol, decimals = params
+    """
+    _memory: OrderedDict[tuple[int, str], tuple[str, int]] = OrderedDict()
+    _disk = JsonStore('tokens_cache.json', 'кэш токенов')
+    _registry: dict[str, tuple[str, int]] | None = None
+    _lock = threading.RLock()
+
+    @classmethod
+    def get(cls, chain_id: int, address: str) -> tuple[str, int] | None:
+        """
+        Возвращает параметры токена из кэша.
+        :param chain_id: id сети
+        :param address: адрес контракта токена
+        :return: кортеж (symbol, decimals) или None, если токена нет в кэше
+        """
+        key = (chain_id, to_checksum(address))
+        with cls._lock:
+            params = cls._memory.get(key)
+            if params is not None:
+                cls._memory.move_to_end(key)
+                return params
+
+            disk_key = cls._disk_key(*key)
+            params = cls._load_registry().get(disk_key) or cls._disk.get(disk_key)
+            if params is not None:
+                params = (params[0], int(params[1]))
+                cls._remember(key, params)
+            return params
+
+    @classmethod
+    def set(cls, chain_id: int, address: str, symbol: str, decimals: int) -> None:
+        """
+        Сохраняет параметры токена в память и в файл.
+        :param chain_id: id сети
+        :param address: адрес контракта токена
+        :param symbol: символ токена
+        :param decimals: количество знаков после запятой
+        """
+        key = (chain_id, to_checksum(address))
+        with cls._lock:
+            cls._remember(key, (symbol, decimals))
+            cls._disk.set(cls._disk_key(*key), (symbol, decimals))
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Очищает кэш в памяти, файл при следующем обращении будет прочитан заново.
+        """
+        with cls._lock:
+            cls._memory.clear()
+            cls._disk.clear()
+            cls._registry = None
+
+    @classmethod
+    def _remember(cls, key: tuple[int, str], params: tuple[str, int]) -> None:
+        cls._memory[key] = params
+        cls._memory.move_to_end(key)
+        while len(cls._memory) > config.token_cache_size:
+            cls._memory.popitem(last=False)
+
+    @staticmethod
+    def _disk_key(chain_id: int, address: str) -> str:
+        return f'{chain_id}:{address}'
+
+    @classmethod
+    def _load_registry(cls) -> dict[str, tuple[str, int]]:
+        """
+        Собирает параметры токенов из реестра Tokens один раз.
+        :return: словарь 'chain_id:address' -> (symbol, decimals)
+        """
+        if cls._registry is None:
+            cls._registry = {
+                cls._disk_key(token.chain.chain_id, to_checksum(token.address)): (token.symbol, token.decimals)
+                for token in Tokens.get_tokens() if token.type_token != TokenTypes.NATIVE
+            }
+        return cls._registry
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+
+from hexbytes import HexBytes
+from loguru import logger
+from web3 import Web3
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from config import config
+from core.providers import get_provider_key
+from core.rpc_batch import RpcBatch
+from models.chain import Chain
+
+
+class TxFuture(Future):
+    """
+    Отправленная транзакция, результат которой (receipt) появится после попадания транзакции в блок.
+
+    - tx_hash - хэш транзакции в том же формате, что возвращает Onchain._sign_and_send
+    - chain - сеть транзакции
+
+    Examples:
+        >>> tx = onchain.send_token(address, 0.01, wait=False)
+        >>> tx.add_done_callback(lambda f: logger.info(f'Подтверждена {f.tx_hash}'))
+        >>> ...  # продолжаем работу, пока транзакция ждет подтверждения
+        >>> receipt = tx.result()
+    """
+
+    def __init__(self, tx_hash: str, chain: Chain) -> None:
+        super().__init__()
+        self.tx_hash = tx_hash
+        self.chain = chain
+
+    def __repr__(self) -> str:
+        return f'TxFuture(tx_hash={self.tx_hash}, chain={self.chain.name}, done={self.done()})'
+
+
+class _TrackedTx:
+    def __init__(self, w3: Web3, tx_hash: str, future: TxFuture, deadline: float) -> None:
+        self.w3 = w3
+        self.tx_hash = tx_hash
+        self.future = future
+        self.deadline = deadline
+
+
+class ReceiptTracker:
+    """
+    Общий фоновый поток, который ждет подтверждения всех отправленных транзакций всех аккаунтов и сетей.
+
+    Раз в config.tx_receipt_poll_interval секунд запрашивает receipt всех ожидающих транзакций,
+    по одному batch запросу на каждый RPC, и завершает TxFuture найденных транзакций.
+    Если транзакция не попала в блок за config.tx_receipt_timeout секунд, TxFuture завершается ошибкой TimeExhausted.
+    Транзакции, TxFuture которых отменили через cancel(), больше не опрашиваются.
+    """
+    _pending: dict[str, _TrackedTx] = {}
+    _condition = threading.Condition()
+    _thread: threading.Thread | None = None
+
+    @classmethod
+    def track(cls, w3: Web3, tx_hash: HexBytes, chain: Chain) -> TxFuture:
+        """
+        Добавляет транзакцию в отслеживание.
+        :param w3: объект Web3 сети транзакции
+        :param tx_hash: хэш транзакции
+        :param chain: сеть транзакции
+        :return: TxFuture, который завершится receipt транзакции, если транзакция уже отслеживается - ее TxFuture
+        """
+        future = TxFuture(tx_hash.hex(), chain)
+        item = _TrackedTx(w3, Web3.to_hex(tx_hash), future, time.monotonic() + config.tx_receipt_timeout)
+        with cls._condition:
+            # транзакция уже отслеживается (повторная отправка того же tx), все ожидающие получат один TxFuture
+            tracked = cls._pending.get(item.tx_hash)
+            if tracked is not None and not tracked.future.cancelled():
+                return tracked.future
+            cls._pending[item.tx_hash] = item
+            if cls._thread is None or not cls._thread.is_alive():
+                cls._thread = threading.Thread(target=cls._run, name='receipt-tracker', daemon=True)
+                cls._thread.start()
+            cls._condition.notify()
+        return future
+
+    @classmethod
+    def _run(cls) -> None:
+        """
+        Цикл фонового потока: ждет появления транзакций и опрашивает их receipt.
+        """
+        while True:
+            with cls._condition:
+                while not cls._pending:
+                    cls._condition.wait()
+                for item in [item for item in cls._pending.values() if item.future.cancelled()]:
+                    del cls._pending[item.tx_hash]
+                tracked = list(cls._pending.values())
+
+            # группируем транзакции по подключению к rpc, чтобы опросить каждое одним запросом,
+            # транзакции MultiRpcProvider опрашиваются через него с переключением между его rpc
+            groups: dict[str, list[_TrackedTx]] = {}
+            for item in tracked:
+                groups.setdefault(get_provider_key(item.w3.provider), []).append(item)
+            for items in groups.values():
+                try:
+                    cls._poll(items)
+                except Exception as e:
+                    logger.debug(f'Ошибка при проверке receipt транзакций: {e}')
+
+            cls._expire()
+            time.sleep(config.tx_receipt_poll_interval)
+
+    @classmethod
+    def _poll(cls, items: list[_TrackedTx]) -> None:
+        """
+        Запрашивает receipt транзакций одного rpc и завершает TxFuture найденных транзакций.
+        :param items: транзакции одного rpc
+        """
+        w3 = items[0].w3
+        mined = cls._get_mined(w3, items)
+        if not mined:
+            return
+
+        with RpcBatch(w3) as batch:
+            receipts = [batch.add(lambda tx_hash=item.tx_hash: w3.eth.get_transaction_receipt(tx_hash))
+                        for item in mined]
+
+        for item, receipt in zip(mined, receipts):
+            with cls._condition:
+                cls._pending.pop(item.tx_hash, None)
+            if cls._start_resolving(item):
+                item.future.set_result(receipt.result)
+
+    @classmethod
+    def _get_mined(cls, w3: Web3, items: list[_TrackedTx]) -> list[_TrackedTx]:
+        """
+        Проверяет, какие транзакции уже попали в блок, одним batch запросом без обработки ответа web3,
+        так как для неподтвержденных транзакций rpc возвращает пустой результат.
+        :param w3: объект Web3
+        :param items: транзакции одного rpc
+        :return: транзакции, для которых уже есть receipt
+        """
+        requests = [('eth_getTransactionReceipt', [item.tx_hash]) for item in items]
+        if len(requests) > 1 and config.is_rpc_batch:
+            responses = w3.provider.make_batch_request(requests)
+            if isinstance(responses, list):
+                return [item for item, response in zip(items, responses) if response.get('result')]
+
+        mined = []
+        for item in items:
+            try:
+                w3.eth.get_transaction_receipt(item.tx_hash)
+                mined.append(item)
+            except TransactionNotFound:
+                pass
+        return mined
+
+    @classmethod
+    def _expire(cls) -> None:
+        """
+        Завершает ошибкой TimeExhausted транзакции, которые ждут подтверждения дольше таймаута.
+        """
+        now = time.monotonic()
+        with cls._condition:
+            expired = [item for item in cls._pending.values() if item.deadline < now]
+            for item in expired:
+                del cls._pending[item.tx_hash]
+
+        for item in expired:
+            if cls._start_resolving(item):
+                item.future.set_exception(TimeExhausted(
+                    f'Транзакция {item.future.tx_hash} не попала в блок за {config.tx_receipt_timeout} секунд'))
+
+    @staticmethod
+    def _start_resolving(item: _TrackedTx) -> bool:
+        """
+        Переводит TxFuture в состояние выполнения, после чего его уже нельзя отменить,
+        чтобы завершение TxFuture, который вызывающий код успел отменить, не роняло фоновый поток.
+        :param item: отслеживаемая транзакция
+        :return: False, если TxFuture отменен и завершать его не нужно
+        """
+        return item.future.set_running_or_notify_cancel()
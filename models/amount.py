@@ -1,9 +1,82 @@
 from __future__ import annotations
 
-from decimal import Decimal
+import math
+import numbers
+import operator
+from decimal import Context, Decimal
+from typing import Any, Callable, Iterable, Iterator
 
 from web3.types import Wei
 
+try:
+    import numpy as np
+except ImportError:  # numpy есть в requirements.txt, без него AmountArray работает на списках, но медленнее
+    np = None
+
+# контекст с точностью, достаточной для любого uint256 (78 знаков), чтобы перевод wei в Decimal был точным
+_DECIMAL_CONTEXT = Context(prec=100)
+
+
+def _to_ratio(number: int | float | Decimal) -> tuple[int, int]:
+    """
+    Точное представление числа в виде дроби (числитель, знаменатель > 0).
+    float берется в том виде, в котором он печатается: 0.1 - это 1/10, а не 0.1000000000000000055...
+    :param number: int, float или Decimal
+    :return: (числитель, знаменатель)
+    """
+    if isinstance(number, int):
+        return number, 1
+    if isinstance(number, float):
+        text = repr(number)
+        if 'e' not in text and 'n' not in text:
+            integer, _, fraction = text.partition('.')
+            return int(integer + fraction), 10 ** len(fraction)
+        number = Decimal(text)
+    return number.as_integer_ratio()
+
+
+def _div(numerator: int, denominator: int) -> int:
+    """
+    Целочисленное деление с отбрасыванием дробной части (к нулю, как int(float)), а не вниз, как у //.
+    """
+    quotient = abs(numerator) // abs(denominator)
+    return quotient if (numerator < 0) == (denominator < 0) else -quotient
+
+
+def _to_wei(amount: int | float | Decimal | str, decimals: int) -> int:
+    """
+    Перевод суммы из ether в wei без потери точности, лишние знаки после запятой отбрасываются.
+    :param amount: сумма в ether, число или строка с числом, например '1.5'
+    :param decimals: количество знаков после запятой
+    :return: сумма в wei
+    :raises ValueError: если строка не является числом
+    :raises TypeError: если сумма передана в неподдерживаемом типе
+    """
+    if isinstance(amount, numbers.Integral):
+        return int(amount) * 10 ** decimals
+    if isinstance(amount, str):
+        try:
+            amount = Decimal(amount.strip())
+        except ArithmeticError:
+            raise ValueError(f'Сумма Amount должна быть числом, получено: {amount!r}') from None
+    elif isinstance(amount, numbers.Real) and not isinstance(amount, Decimal):
+        amount = Decimal(repr(float(amount)))
+    elif not isinstance(amount, Decimal):
+        raise TypeError(f'Сумма Amount должна быть int, float, Decimal или str, получено: {type(amount).__name__}')
+    # scaleb только сдвигает порядок, int() отбрасывает лишние знаки
+    return int(amount.scaleb(decimals, _DECIMAL_CONTEXT))
+
+
+def _to_vector(values: list[int]) -> Any:
+    """
+    Вектор целых чисел python для AmountArray: массив numpy с dtype=object или сам список.
+    """
+    if np is None:
+        return values
+    vector = np.empty(len(values), dtype=object)
+    vector[:] = values
+    return vector
+
 
 class Amount:
     """
@@ -19,37 +92,71 @@ class Amount:
     с другими объектами класса Amount, int, float.
     Объекты класса Amount можно сравнивать между собой, с int, float.
 
+    Внутри хранится только целое число wei и decimals, поэтому все операции (кроме возведения в дробную степень)
+    выполняются в целых числах без потери точности, float участвует в расчетах так, как он печатается (0.1 - это ровно 0.1).
+    Если результат не делится до wei нацело, лишние знаки отбрасываются.
+    ether и ether_decimal вычисляются только при обращении к ним.
+
     Атрибуты:
 
     - wei - количество токенов в wei, минимальная единица измерения
     - ether - количество токенов в ether, в человеческом формате
     - ether_decimal - количество токенов в ether, в формате Decimal, для точных операций
     """
+    __slots__ = ('wei', 'decimals', '_ether', '_ether_decimal')
 
     wei: int | Wei
-    ether: float
-    ether_decimal: Decimal
+    decimals: int
 
-    def __init__(self, amount: int | float | Decimal | Wei, decimals: int = 18, wei: bool = False):
+    def __init__(self, amount: int | float | Decimal | str | Wei, decimals: int = 18, wei: bool = False):
         """
-        :param amount: сумма токенов в wei или обычном формате
+        :param amount: сумма токенов в wei или обычном формате, можно передать строкой, например '1.5'
         :param decimals: количество знаков после запятой, по умолчанию 18
         :param wei: указывайте True, если сумма в amount указана в wei (длинное число)
         """
-        if wei:
-            self.wei = int(amount)
-            self.ether_decimal = Decimal(str(amount)) / 10 ** decimals
-            self.ether = float(self.ether_decimal)
-        else:
-            self.wei = int(amount * 10 ** decimals)
-            self.ether_decimal = Decimal(str(amount))
-            self.ether = float(self.ether_decimal)
-
+        self.wei = int(amount) if wei else _to_wei(amount, decimals)
         self.decimals = decimals
+        self._ether = None
+        self._ether_decimal = None
+
+    @property
+    def ether(self) -> float:
+        if self._ether is None:
+            # деление int на int в python округляется до ближайшего float, без промежуточных потерь
+            self._ether = self.wei / 10 ** self.decimals
+        return self._ether
+
+    @property
+    def ether_decimal(self) -> Decimal:
+        if self._ether_decimal is None:
+            self._ether_decimal = Decimal(self.wei).scaleb(-self.decimals, _DECIMAL_CONTEXT)
+        return self._ether_decimal
 
     def __str__(self) -> str:
         return f'{self.ether}'
 
+    @staticmethod
+    def _from_wei(wei: int, decimals: int) -> Amount:
+        """
+        Создает Amount из целого wei без проверок и пересчета суммы.
+        """
+        amount = Amount.__new__(Amount)
+        amount.wei = wei
+        amount.decimals = decimals
+        amount._ether = None
+        amount._ether_decimal = None
+        return amount
+
+    def _new(self, wei: int) -> Amount:
+        """
+        Создает Amount с тем же decimals без пересчета суммы.
+        """
+        return self._from_wei(wei, self.decimals)
+
+    def _check_decimals(self, other: Amount, operation: str) -> None:
+        if self.decimals != other.decimals:
+            raise ValueError(f'Ошибка {operation} двух Amount, разное количество знаков после запятой')
+
     def __add__(self, other: Amount | int | float) -> Amount:
         """
         Сложение двух Amount или сложение Amount с int, float.
@@ -57,22 +164,21 @@ class Amount:
         Если слагаемые Amount и имеют разные decimals, то возникнет ошибка.
 
         При сложении Amount с Amount, сложение будет происходить в wei и результат будет с тем же decimals,
-        что и у слагаемых.'
+        что и у слагаемых.
 
-        При сложении Amount с int, float, сложение будет происходить в ether, с точностью float, результат будет
+        При сложении Amount с int, float, число переводится в wei этого Amount и складывается в wei, результат будет
         с тем же decimals, что и у слагаемого Amount.
 
-        Для точных операций используйте ether_decimal.
-
         :param other: Amount, int, float
         :return: Amount
         """
         if isinstance(other, Amount):
-            if self.decimals != other.decimals:
-                raise ValueError('Ошибка сложения двух Amount, разное количество знаков после запятой')
-            return Amount(self.wei + other.wei, wei=True, decimals=self.decimals)
-        if isinstance(other, int) or isinstance(other, float):
-            return Amount(self.ether + other, decimals=self.decimals)
+            self._check_decimals(other, 'сложения')
+            return self._new(self.wei + other.wei)
+        if isinstance(other, (int, float)):
+            return self._new(self.wei + _to_wei(other, self.decimals))
+        if isinstance(other, AmountArray):
+            return NotImplemented
 
         raise ValueError(
             'Ошибка сложения Amount с другим типом данных, сложение возможно только с Amount, int, float')
@@ -86,19 +192,19 @@ class Amount:
         При вычитании Amount с Amount, вычитание будет происходить в wei и результат будет с тем же decimals,
         что и у вычитаемых.
 
-        При вычитании Amount с int, float, вычитание будет происходить в ether, с точностью float, результат будет
+        При вычитании Amount с int, float, число переводится в wei этого Amount и вычитается в wei, результат будет
         с тем же decimals, что и у вычитаемого Amount.
 
-        Для точных операций используйте ether_decimal.
         :param other: Amount, int, float
         :return: Amount
         """
         if isinstance(other, Amount):
-            if self.decimals != other.decimals:
-                raise ValueError('Ошибка вычитания двух Amount, разное количество знаков после запятой')
-            return Amount(self.wei - other.wei, wei=True, decimals=self.decimals)
-        if isinstance(other, int) or isinstance(other, float):
-            return Amount(self.ether - other, decimals=self.decimals)
+            self._check_decimals(other, 'вычитания')
+            return self._new(self.wei - other.wei)
+        if isinstance(other, (int, float)):
+            return self._new(self.wei - _to_wei(other, self.decimals))
+        if isinstance(other, AmountArray):
+            return NotImplemented
 
         raise ValueError(
             'Ошибка вычитания Amount с другим типом данных, вычитание возможно только с Amount, int, float')
@@ -109,23 +215,23 @@ class Amount:
 
         Если множители Amount и имеют разные decimals, то возникнет ошибка.
 
-        При умножении Amount на Amount, умножение будет происходить в ether c ether, с точностью float
-        и результат будет с тем же decimals, что и у множителей.
+        При умножении Amount на Amount, перемножаются суммы в ether, расчет идет в целых wei без потери точности,
+        результат будет с тем же decimals, что и у множителей.
 
-        При умножении Amount на int, float, умножение будет происходить в ether, с точностью float, результат будет
+        При умножении Amount на int, float, wei умножается на число без перевода в float, результат будет
         с тем же decimals, что и у множителя Amount.
 
-        Для точных операций используйте ether_decimal.
-
         :param other: Amount, int, float
         :return: Amount
         """
         if isinstance(other, Amount):
-            if self.decimals != other.decimals:
-                raise ValueError('Ошибка умножения двух Amount, разное количество знаков после запятой')
-            return Amount(self.ether * other.ether, decimals=self.decimals)
-        if isinstance(other, int) or isinstance(other, float):
-            return Amount(self.ether * other, decimals=self.decimals)
+            self._check_decimals(other, 'умножения')
+            return self._new(_div(self.wei * other.wei, 10 ** self.decimals))
+        if isinstance(other, int):
+            return self._new(self.wei * other)
+        if isinstance(other, float):
+            numerator, denominator = _to_ratio(other)
+            return self._new(_div(self.wei * numerator, denominator))
 
         raise ValueError(
             'Ошибка умножения Amount с другим типом данных, умножение возможно только с Amount, int, float')
@@ -136,24 +242,21 @@ class Amount:
 
         Если делители Amount и имеют разные decimals, то возникнет ошибка.
 
-        При делении Amount на Amount, деление будет происходить в wei c wei, результат будет с тем же
-        decimals, что и у делителей.
-
-        При делении Amount на int, float, деление будет происходить в ether, с точностью float, результат будет
-        с тем же decimals, что и у делителя Amount.
+        При делении Amount на Amount, деление будет происходить в wei c wei, дробная часть отбрасывается,
+        результат будет с тем же decimals, что и у делителей.
 
-        Для точных операций используйте ether_decimal.
+        При делении Amount на int, float, wei делится на число без перевода в float, результат будет
+        с тем же decimals, что и у делимого Amount.
 
         :param other: Amount, int, float
         :return: Amount
         """
         if isinstance(other, Amount):
-            if self.decimals != other.decimals:
-                raise ValueError('Ошибка деления двух Amount, разное количество знаков после запятой')
-            return Amount(self.wei / other.wei, wei=True, decimals=self.decimals)
-
-        elif isinstance(other, int) or isinstance(other, float):
-            return Amount(self.ether / other, decimals=self.decimals)
+            self._check_decimals(other, 'деления')
+            return self._new(_div(self.wei, other.wei))
+        if isinstance(other, (int, float)):
+            numerator, denominator = _to_ratio(other)
+            return self._new(_div(self.wei * denominator, numerator))
 
         raise ValueError(
             'Ошибка деления Amount с другим типом данных, деление возможно только с Amount, int, float')
@@ -167,21 +270,18 @@ class Amount:
         При нахождении остатка от деления Amount на Amount, нахождение остатка будет происходить в wei c wei,
         результат будет с тем же decimals, что и у делителей.
 
-        При нахождении остатка от деления Amount на int, float, нахождение остатка будет происходить в ether,
-        с точностью float, результат будет с тем же decimals, что и у делителя Amount.
-
-        Для точных операций используйте ether_decimal.
+        При нахождении остатка от деления Amount на int, float, остаток считается от суммы в ether
+        (Amount(1.5) % 0.7 = Amount(0.1)) без потери точности, результат будет с тем же decimals, что и у Amount.
 
         :param other: Amount, int, float
         :return: Amount
         """
         if isinstance(other, Amount):
-            if self.decimals != other.decimals:
-                raise ValueError(
-                    'Ошибка нахождения остатка от деления двух Amount, разное количество знаков после запятой')
-            return Amount(self.wei % other.wei, wei=True, decimals=self.decimals)
-        elif isinstance(other, int) or isinstance(other, float):
-            return Amount(self.ether % other, decimals=self.decimals)
+            self._check_decimals(other, 'нахождения остатка от деления')
+            return self._new(self.wei % other.wei)
+        if isinstance(other, (int, float)):
+            numerator, denominator = _to_ratio(other)
+            return self._new(_div(self.wei * denominator % (numerator * 10 ** self.decimals), denominator))
 
         raise ValueError(
             'Ошибка нахождения остатка от деления Amount с другим типом данных, операция возможна только с Amount, int, float')
@@ -192,26 +292,28 @@ class Amount:
 
         Если Amount и степень имеют разные decimals, то возникнет ошибка.
 
-        При возведении Amount в степень Amount, возведение будет происходить в ether c ether, результат будет с тем же
-        decimals, что и у Amount.
-
-        При возведении Amount в степень int, float, возведение будет происходить в ether, с точностью float, результат\
-        будет с тем же decimals, что и у Amount.
+        При возведении в целую степень расчет идет без потери точности, при возведении в дробную степень
+        (в том числе в степень Amount с дробной суммой) - в ether с точностью float.
+        Результат будет с тем же decimals, что и у Amount.
 
-        Для точных операций используйте ether_decimal.
         :param other: Amount, int, float
         :return: Amount
         """
         if isinstance(other, Amount):
-            if self.decimals != other.decimals:
-                raise ValueError(
-                    'Ошибка возведения в степень двух Amount, разное количество знаков после запятой')
-            return Amount(self.ether ** other.ether, decimals=self.decimals)
-        elif isinstance(other, int) or isinstance(other, float):
-            return Amount(self.ether ** other, decimals=self.decimals)
-
-        raise ValueError(
-            'Ошибка возведения Amount в степень с другим типом данных, операция возможна только с Amount, int, float')
+            self._check_decimals(other, 'возведения в степень')
+            other = other.wei // 10 ** other.decimals if other.wei % 10 ** other.decimals == 0 else other.ether
+        elif not isinstance(other, (int, float)):
+            raise ValueError(
+                'Ошибка возведения Amount в степень с другим типом данных, операция возможна только с Amount, int, float')
+
+        if isinstance(other, int) or other.is_integer():
+            other = int(other)
+            if other > 0:
+                return self._new(_div(self.wei ** other, 10 ** (self.decimals * (other - 1))))
+            if other == 0:
+                return self._new(10 ** self.decimals)
+            return self._new(_div(10 ** (self.decimals * (1 - other)), self.wei ** -other))
+        return Amount(self.ether ** other, decimals=self.decimals)
 
     def __floordiv__(self, other: Amount | int | float) -> Amount:
         """
@@ -222,20 +324,18 @@ class Amount:
         При целочисленном делении Amount на Amount, деление будет происходить в wei c wei, результат будет с тем же
         decimals, что и у Amount.
 
-        При целочисленном делении Amount на int, float, деление будет происходить в ether, с точностью float, результат
-        будет с тем же decimals, что и у Amount.
+        При целочисленном делении Amount на int, float, результат - целая часть отношения суммы в ether к числу
+        (Amount(1.5) // 0.5 = Amount(3.0)), с тем же decimals, что и у Amount.
 
-        Для точных операций используйте ether_decimal.
         :param other: Amount, int, float
         :return: Amount
         """
         if isinstance(other, Amount):
-            if self.decimals != other.decimals:
-                raise ValueError(
-                    'Ошибка целочисленного деления двух Amount, разное количество знаков после запятой')
-            return Amount(self.wei // other.wei, wei=True, decimals=self.decimals)
-        elif isinstance(other, int) or isinstance(other, float):
-            return Amount(self.ether // other, decimals=self.decimals)
+            self._check_decimals(other, 'целочисленного деления')
+            return self._new(self.wei // other.wei)
+        if isinstance(other, (int, float)):
+            numerator, denominator = _to_ratio(other)
+            return self._new(self.wei * denominator // (numerator * 10 ** self.decimals) * 10 ** self.decimals)
 
         raise ValueError(
             'Ошибка целочисленного деления Amount с другим типом данных, операция возможна только с Amount, int, float')
@@ -246,8 +346,8 @@ class Amount:
     def __rsub__(self, other: Amount | int | float) -> Amount:
         if isinstance(other, Amount):
             return other - self
-        elif isinstance(other, int) or isinstance(other, float):
-            return Amount(other - self.ether, decimals=self.decimals)
+        elif isinstance(other, (int, float)):
+            return self._new(_to_wei(other, self.decimals) - self.wei)
         raise ValueError(
             'Ошибка вычитания Amount с другим типом данных, вычитание возможно только с Amount, int, float')
 
@@ -257,16 +357,17 @@ class Amount:
     def __rtruediv__(self, other: Amount | int | float) -> Amount:
         if isinstance(other, Amount):
             return other / self
-        elif isinstance(other, int) or isinstance(other, float):
-            return Amount(other / self.ether, decimals=self.decimals)
+        elif isinstance(other, (int, float)):
+            numerator, denominator = _to_ratio(other)
+            return self._new(_div(numerator * 10 ** (self.decimals * 2), denominator * self.wei))
         raise ValueError(
             'Ошибка деления Amount с другим типом данных, деление возможно только с Amount, int, float')
 
     def __rmod__(self, other: Amount | int | float) -> Amount:
         if isinstance(other, Amount):
             return other % self
-        elif isinstance(other, int) or isinstance(other, float):
-            return Amount(other % self.ether, decimals=self.decimals)
+        elif isinstance(other, (int, float)):
+            return self._new(_to_wei(other, self.decimals) % self.wei)
         raise ValueError(
             'Ошибка нахождения остатка от деления Amount с другим типом данных, операция возможна только с Amount, int, float')
 
@@ -276,11 +377,36 @@ class Amount:
     def __rfloordiv__(self, other: Amount | int | float) -> Amount:
         if isinstance(other, Amount):
             return other // self
-        elif isinstance(other, int) or isinstance(other, float):
-            return Amount(other // self.ether, decimals=self.decimals)
+        elif isinstance(other, (int, float)):
+            numerator, denominator = _to_ratio(other)
+            return self._new(numerator * 10 ** self.decimals // (denominator * self.wei) * 10 ** self.decimals)
         raise ValueError(
             'Ошибка целочисленного деления Amount с другим типом данных, операция возможна только с Amount, int, float')
 
+    def _compare(self, other: Amount | int | float) -> int:
+        """
+        Сравнивает сумму с другим Amount в wei или с числом в ether без потери точности.
+        :param other: Amount, int, float
+        :return: -1, 0 или 1
+        """
+        if isinstance(other, Amount):
+            if self.decimals != other.decimals:
+                raise ValueError('Ошибка сравнения двух Amount, разное количество знаков после запятой')
+            left, right = self.wei, other.wei
+        elif isinstance(other, int):
+            left, right = self.wei, other * 10 ** self.decimals
+        elif isinstance(other, float):
+            # округление в float монотонно: если float отличаются, точное сравнение даст тот же результат,
+            # inf и nan нельзя представить дробью, они тоже сравниваются как float
+            left, right = self.ether, other
+            if left == right and math.isfinite(other):
+                numerator, denominator = _to_ratio(other)
+                left, right = self.wei * denominator, numerator * 10 ** self.decimals
+        else:
+            raise ValueError(
+                'Ошибка сравнения Amount с другим типом данных, сравнение возможно только с Amount, int, float')
+        return (left > right) - (left < right)
+
     def __eq__(self, other: Amount | int | float) -> bool:
         """
         Сравнение двух Amount или сравнение Amount с int, float.
@@ -289,39 +415,320 @@ class Amount:
 
         При сравнении Amount с Amount, сравнение будет происходить в wei.
 
-        При сравнении Amount с int, float, сравнение будет происходить в ether.
+        При сравнении Amount с int, float, сравнение будет происходить в ether без потери точности.
 
-        Для точных операций используйте ether_decimal.
         :param other: Amount, int, float
         :return: bool
         """
-        if isinstance(other, Amount):
-            if self.decimals != other.decimals:
-                raise ValueError('Ошибка сравнения двух Amount, разное количество знаков после запятой')
-            return self.wei == other.wei
-        if isinstance(other, int) or isinstance(other, float):
-            return self.ether == other
-        raise ValueError(
-            'Ошибка сравнения Amount с другим типом данных, сравнение возможно только с Amount, int, float')
+        if isinstance(other, float) and math.isnan(other):
+            return False
+        return self._compare(other) == 0
 
     def __ne__(self, other: Amount | int | float) -> bool:
         return not self == other
 
     def __lt__(self, other: Amount | int | float) -> bool:
-        if isinstance(other, Amount):
-            if self.decimals != other.decimals:
-                raise ValueError('Ошибка сравнения двух Amount, разное количество знаков после запятой')
-            return self.wei < other.wei
-        if isinstance(other, int) or isinstance(other, float):
-            return self.ether < other
-        raise ValueError(
-            'Ошибка сравнения Amount с другим типом данных, сравнение возможно только с Amount, int, float')
+        return self._compare(other) < 0
 
     def __le__(self, other: Amount | int | float) -> bool:
-        return self < other or self == other
+        return self._compare(other) <= 0
 
     def __gt__(self, other: Amount | int | float) -> bool:
-        return not self <= other
+        return self._compare(other) > 0
 
     def __ge__(self, other: Amount | int | float) -> bool:
-        return not self < other
+        return self._compare(other) >= 0
+
+
+class AmountArray:
+    """
+    Массив сумм одного токена с общим decimals, например балансы токена на всех аккаунтах.
+
+    Операции выполняются сразу над всеми суммами массива, без создания объекта Amount на каждую сумму.
+    Суммы хранятся в wei целыми числами python без ограничения разрядности (uint256 не переполняется),
+    в массиве numpy с dtype=object. numpy указан в requirements.txt, но не обязателен: без него суммы хранятся
+    в списке, результаты те же, операции примерно в 2 раза медленнее. ether считается один раз
+    при первом обращении: массив numpy float64 или список float.
+
+    Массивы можно складывать и вычитать между собой, с Amount, int, float, умножать и делить на int, float,
+    сравнивать с AmountArray, Amount, int, float (результат - маска bool для выборки по индексу).
+    Результаты операций в wei точные, как у Amount, лишние знаки меньше 1 wei отбрасываются.
+
+    Атрибуты:
+
+    - wei - суммы в wei, массив numpy или список int
+    - ether - суммы в ether, массив numpy float64 или список float
+    - decimals - количество знаков после запятой
+
+    Examples:
+        >>> balances = AmountArray.from_amounts([onchain.get_balance(token) for onchain in onchains])
+        >>> balances.sum()  # Amount, сумма по всем аккаунтам
+        >>> balances.to_usd(price)  # стоимость каждого баланса в $
+        >>> rich = balances[balances > 0.1]  # балансы больше 0.1
+    """
+    __slots__ = ('wei', 'decimals', '_ether')
+
+    def __init__(self, amounts: Iterable[int | float | Decimal | Wei] = (), decimals: int = 18, wei: bool = False):
+        """
+        :param amounts: суммы токенов в wei или обычном формате
+        :param decimals: количество знаков после запятой, по умолчанию 18
+        :param wei: указывайте True, если суммы в amounts указаны в wei (длинные числа)
+        """
+        if wei:
+            values = list(map(int, amounts))
+        else:
+            values = [_to_wei(amount, decimals) for amount in amounts]
+        self.wei = _to_vector(values)
+        self.decimals = decimals
+        self._ether = None
+
+    @classmethod
+    def from_amounts(cls, amounts: Iterable[Amount], decimals: int | None = None) -> AmountArray:
+        """
+        Создает массив из списка Amount.
+
+        Если у Amount разные decimals, то возникнет ошибка.
+
+        :param amounts: список Amount одного токена
+        :param decimals: количество знаков после запятой, по умолчанию как у первого Amount (18 для пустого списка)
+        :return: AmountArray
+        """
+        amounts = list(amounts)
+        if decimals is None:
+            decimals = amounts[0].decimals if amounts else 18
+        if any(amount.decimals != decimals for amount in amounts):
+            raise ValueError('Ошибка создания AmountArray, у Amount разное количество знаков после запятой')
+        return cls._from_wei(_to_vector([amount.wei for amount in amounts]), decimals)
+
+    @classmethod
+    def _from_wei(cls, wei: Any, decimals: int) -> AmountArray:
+        """
+        Создает массив из готового вектора wei без проверок и пересчета сумм.
+        """
+        array = cls.__new__(cls)
+        array.wei = wei
+        array.decimals = decimals
+        array._ether = None
+        return array
+
+    def _new(self, wei: Any) -> AmountArray:
+        return self._from_wei(wei, self.decimals)
+
+    def to_list(self) -> list[Amount]:
+        """
+        Переводит массив в список Amount.
+        :return: список Amount с тем же decimals
+        """
+        return [Amount._from_wei(wei, self.decimals) for wei in self._values()]
+
+    @property
+    def ether(self) -> Any:
+        if self._ether is None:
+            if np is not None:
+                # 10 ** decimals до 22 знаков точно представляется во float64
+                self._ether = self.wei.astype(np.float64) / float(10 ** self.decimals)
+            else:
+                scale = 10 ** self.decimals
+                self._ether = [wei / scale for wei in self.wei]
+        return self._ether
+
+    def _values(self) -> list[int]:
+        return self.wei.tolist() if np is not None else self.wei
+
+    def __len__(self) -> int:
+        return len(self.wei)
+
+    def __iter__(self) -> Iterator[Amount]:
+        return iter(self.to_list())
+
+    def __getitem__(self, index: Any) -> Amount | AmountArray:
+        """
+        Возвращает Amount по номеру или AmountArray по срезу, списку номеров или маске bool.
+        :param index: номер, срез, список номеров или маска bool (результат сравнения массива)
+        :return: Amount или AmountArray
+        """
+        if np is not None:
+            values = self.wei[index]
+            if isinstance(values, np.ndarray):
+                return self._new(values)
+            return Amount._from_wei(int(values), self.decimals)
+
+        if isinstance(index, int):
+            return Amount._from_wei(self.wei[index], self.decimals)
+        if isinstance(index, slice):
+            return self._new(self.wei[index])
+        index = list(index)
+        if index and isinstance(index[0], bool):
+            return self._new([wei for wei, is_selected in zip(self.wei, index) if is_selected])
+        return self._new([self.wei[i] for i in index])
+
+    def __str__(self) -> str:
+        return f'{self.ether}'
+
+    def _other_wei(self, other: AmountArray | Amount | int | float, operation: str) -> Any:
+        """
+        Переводит второй операнд в wei: вектор для AmountArray, число для Amount, int, float.
+        """
+        if isinstance(other, AmountArray):
+            if self.decimals != other.decimals:
+                raise ValueError(f'Ошибка {operation} AmountArray, разное количество знаков после запятой')
+            if len(self) != len(other):
+                raise ValueError(f'Ошибка {operation} AmountArray, разная длина массивов: {len(self)} и {len(other)}')
+            return other.wei
+        if isinstance(other, Amount):
+            if self.decimals != other.decimals:
+                raise ValueError(f'Ошибка {operation} AmountArray и Amount, разное количество знаков после запятой')
+            return other.wei
+        if isinstance(other, (int, float)):
+            return _to_wei(other, self.decimals)
+        raise ValueError(
+            f'Ошибка {operation} AmountArray с другим типом данных, операция возможна только с AmountArray, Amount, int, float')
+
+    def _apply(self, left: Any, right: Any, function: Callable[[Any, Any], Any]) -> Any:
+        """
+        Применяет операцию поэлементно, left или right может быть числом.
+        """
+        if np is not None:
+            return function(left, right)
+        if not isinstance(left, list):
+            return [function(left, value) for value in right]
+        if not isinstance(right, list):
+            return [function(value, right) for value in left]
+        return [function(a, b) for a, b in zip(left, right)]
+
+    def _truncate_div(self, values: Any, denominator: int) -> Any:
+        """
+        Делит вектор wei на положительное число с отбрасыванием дробной части, как _div.
+        """
+        if denominator == 1:
+            return values
+        if np is not None:
+            quotients = abs(values) // denominator
+            return np.where(values < 0, -quotients, quotients)
+        return [value // denominator if value >= 0 else -(-value // denominator) for value in values]
+
+    def __add__(self, other: AmountArray | Amount | int | float) -> AmountArray:
+        """
+        Сложение поэлементно с AmountArray той же длины или с Amount, int, float, расчет идет в wei.
+        :param other: AmountArray, Amount, int, float
+        :return: AmountArray
+        """
+        return self._new(self._apply(self.wei, self._other_wei(other, 'сложения'), operator.add))
+
+    def __sub__(self, other: AmountArray | Amount | int | float) -> AmountArray:
+        """
+        Вычитание поэлементно AmountArray той же длины или Amount, int, float, расчет идет в wei.
+        :param other: AmountArray, Amount, int, float
+        :return: AmountArray
+        """
+        return self._new(self._apply(self.wei, self._other_wei(other, 'вычитания'), operator.sub))
+
+    def __radd__(self, other: Amount | int | float) -> AmountArray:
+        return self + other
+
+    def __rsub__(self, other: Amount | int | float) -> AmountArray:
+        return self._new(self._apply(self._other_wei(other, 'вычитания'), self.wei, operator.sub))
+
+    def __mul__(self, other: int | float) -> AmountArray:
+        """
+        Умножение всех сумм на int, float без перевода в float, например для расчета доли от балансов.
+        :param other: int, float
+        :return: AmountArray
+        """
+        if not isinstance(other, (int, float)):
+            raise ValueError('Ошибка умножения AmountArray с другим типом данных, умножение возможно только на int, float')
+        numerator, denominator = _to_ratio(other)
+        return self._new(self._truncate_div(self._apply(self.wei, numerator, operator.mul), denominator))
+
+    def __rmul__(self, other: int | float) -> AmountArray:
+        return self * other
+
+    def __truediv__(self, other: int | float) -> AmountArray:
+        """
+        Деление всех сумм на int, float без перевода в float.
+        :param other: int, float
+        :return: AmountArray
+        """
+        if not isinstance(other, (int, float)):
+            raise ValueError('Ошибка деления AmountArray с другим типом данных, деление возможно только на int, float')
+        numerator, denominator = _to_ratio(other)
+        if numerator == 0:
+            raise ZeroDivisionError('Ошибка деления AmountArray на ноль')
+        if numerator < 0:
+            numerator, denominator = -numerator, -denominator
+        return self._new(self._truncate_div(self._apply(self.wei, denominator, operator.mul), numerator))
+
+    def _compare(self, other: AmountArray | Amount | int | float, function: Callable[[Any, Any], Any]) -> Any:
+        """
+        Сравнивает поэлементно в wei без потери точности.
+        :return: маска bool, массив numpy или список
+        """
+        if isinstance(other, float):
+            if not math.isfinite(other):
+                return self._apply(self.ether, other, function)
+            numerator, denominator = _to_ratio(other)
+            left = self._apply(self.wei, denominator, operator.mul) if denominator != 1 else self.wei
+            return self._apply(left, numerator * 10 ** self.decimals, function)
+        return self._apply(self.wei, self._other_wei(other, 'сравнения'), function)
+
+    def __eq__(self, other: AmountArray | Amount | int | float) -> Any:
+        return self._compare(other, operator.eq)
+
+    def __ne__(self, other: AmountArray | Amount | int | float) -> Any:
+        return self._compare(other, operator.ne)
+
+    def __lt__(self, other: AmountArray | Amount | int | float) -> Any:
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other: AmountArray | Amount | int | float) -> Any:
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other: AmountArray | Amount | int | float) -> Any:
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other: AmountArray | Amount | int | float) -> Any:
+        return self._compare(other, operator.ge)
+
+    def sum(self) -> Amount:
+        """
+        Сумма всех сумм массива, считается в wei без потери точности.
+        :return: Amount
+        """
+        total = int(self.wei.sum()) if np is not None else sum(self.wei)
+        return Amount._from_wei(total, self.decimals)
+
+    def mean(self) -> Amount:
+        """
+        Среднее значение сумм массива, лишние знаки меньше 1 wei отбрасываются.
+        :return: Amount
+        """
+        if not len(self):
+            raise ValueError('Ошибка расчета среднего, AmountArray пустой')
+        return Amount._from_wei(_div(self.sum().wei, len(self)), self.decimals)
+
+    def min(self) -> Amount:
+        """
+        :return: наименьшая сумма массива
+        """
+        return Amount._from_wei(min(self._values()), self.decimals)
+
+    def max(self) -> Amount:
+        """
+        :return: наибольшая сумма массива
+        """
+        return Amount._from_wei(max(self._values()), self.decimals)
+
+    def to_usd(self, price: float | Iterable[float]) -> Any:
+        """
+        Стоимость каждой суммы в $ по цене токена, с точностью float.
+        :param price: цена токена или цены для каждой суммы массива
+        :return: массив numpy float64 или список float
+        """
+        if isinstance(price, (int, float)):
+            if np is not None:
+                return self.ether * price
+            return [ether * price for ether in self.ether]
+        if np is not None:
+            return self.ether * np.asarray(price, dtype=np.float64)
+        return [ether * item for ether, item in zip(self.ether, price)]
+
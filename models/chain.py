@@ -8,7 +8,8 @@ class Chain:
     Класс для хранения информации о сети. Информацию о сети можно искать тут https://chainid.network/chains.json
 
     - name - название сети, в формате snake_case, при инициализации в класс Chains должно совпадать с именем переменной
-    - param rpc: адрес провайдера в формате https://1rpc.io/ethereum, можно взять на https://chainlist.org/
+    - param rpc: адрес провайдера в формате https://1rpc.io/ethereum, можно взять на https://chainlist.org/,
+      либо список адресов, тогда запросы распределяются между ними с учетом скорости и ошибок, первый адрес используется в метамаске
     - chain_id: id сети, например 1 для Ethereum, можно искать тут https://chainid.network/chains.json, либо https://api.debank.com/chain/list
     - native_token: тикер нативного токена сети, по умолчанию 'ETH'
     - is_eip1559: если сеть поддерживает EIP-1559, то True, иначе False, можно взять тут https://api.debank.com/chain/list
@@ -16,12 +17,14 @@ class Chain:
     - okx_name: название сети в OKX, список сетей можно получить запустив метод bot.exchanges.okx.get_chains(), по умолчанию None
     - binance_name: название сети в Binance, список сетей можно получить запустив метод bot.exchanges.binance.get_chains(), по умолчанию None
     - multiplier: множитель для увеличения комиссии, если транзакции не проходят из-за низкой комиссии, по умолчанию 1.0
+    - block_interval: среднее время блока в секундах, если не указано, берется из config/data/chains_data.json
+    - ws_rpc: адрес websocket провайдера в формате wss://..., используется для подписки на новые блоки, по умолчанию None
     """
 
     def __init__(
             self,
             name: str,
-            rpc: str,
+            rpc: str | list[str],
             *,
             chain_id: int,
             metamask_name: Optional[str] = None,
@@ -30,9 +33,12 @@ class Chain:
             okx_name: str | None = None,
             binance_name: str | None = None,
             multiplier: float = 1.0,
+            block_interval: float | None = None,
+            ws_rpc: str | None = None,
     ):
         self.name = name
-        self.rpc = rpc
+        self.rpcs = [rpc] if isinstance(rpc, str) else list(rpc)
+        self.rpc = self.rpcs[0]
         self.chain_id = chain_id
         self.metamask_name = metamask_name if metamask_name else name
         self.native_token = native_token
@@ -40,6 +46,8 @@ class Chain:
         self.binance_name = binance_name
         self.is_eip1559 = is_eip1559
         self.multiplier = multiplier
+        self.block_interval = block_interval
+        self.ws_rpc = ws_rpc
 
     def __str__(self):
         return self.rpc
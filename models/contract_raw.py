@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import json
 import os
+import threading
+from collections import OrderedDict
 from typing import Optional, TYPE_CHECKING
 
 from eth_typing import ChecksumAddress
@@ -16,6 +18,96 @@ if TYPE_CHECKING:
     from models import Chain
 
 
+class AbiRegistry:
+    """
+    Общий для всего процесса реестр abi: файл config/data/ABIs/{abi_name}.json читается и разбирается
+    один раз, все ContractRaw и Token с этим abi получают один и тот же объект.
+    Объект abi общий, поэтому его нельзя изменять.
+
+    Examples:
+        >>> erc20_abi = AbiRegistry.get('erc20')
+    """
+    _abis: dict[str, list[dict]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, abi_name: str) -> list[dict]:
+        """
+        Возвращает abi по названию файла, при первом обращении загружает его из файла.
+        :param abi_name: название файла с abi без расширения
+        :return: abi контракта
+        """
+        abi = cls._abis.get(abi_name)
+        if abi is not None:
+            return abi
+        with cls._lock:
+            if abi_name not in cls._abis:
+                path = os.path.join(config.PATH_ABI, f'{abi_name}.json')
+                with open(path) as file:
+                    cls._abis[abi_name] = json.load(file)
+            return cls._abis[abi_name]
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Забывает загруженные abi, например после изменения файлов abi во время работы.
+        """
+        with cls._lock:
+            cls._abis.clear()
+
+
+class ContractCache:
+    """
+    Кэш объектов контрактов web3 одного подключения w3 по (адрес, abi).
+
+    Создание w3.eth.contract строит классы и таблицы функций по abi, поэтому объект контракта
+    создается один раз и переиспользуется во всех следующих вызовах через это подключение.
+    Кэш принадлежит подключению: Onchain создает его вместе со своим w3, AsyncOnchain - вместе с общим
+    AsyncWeb3 для пары (rpc, прокси), поэтому кэш не удерживает в памяти чужие подключения и их сессии.
+    Размер кэша ограничен config.contract_cache_size, давно не использованные контракты удаляются.
+
+    Examples:
+        >>> contracts = ContractCache(w3)
+        >>> contract = contracts.get(Tokens.USDT_ARBITRUM_ONE)
+        >>> balance = contract.functions.balanceOf(address).call()
+    """
+
+    def __init__(self, w3: Web3) -> None:
+        """
+        :param w3: объект Web3 или AsyncWeb3, к которому привязываются контракты
+        """
+        self.w3 = w3
+        self._contracts: OrderedDict[tuple[str, str], Contract] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, contract_raw: ContractRaw) -> Contract:
+        """
+        Возвращает объект контракта, создает его при первом обращении.
+        :param contract_raw: объект ContractRaw
+        :return: объект контракта
+        """
+        key = (contract_raw.address, contract_raw.abi_name)
+        with self._lock:
+            contract = self._contracts.get(key)
+            if contract is not None:
+                self._contracts.move_to_end(key)
+                return contract
+
+        contract = self.w3.eth.contract(address=contract_raw.address, abi=contract_raw.abi)
+        with self._lock:
+            self._contracts[key] = contract
+            while len(self._contracts) > config.contract_cache_size:
+                self._contracts.popitem(last=False)
+        return contract
+
+    def clear(self) -> None:
+        """
+        Очищает кэш объектов контрактов.
+        """
+        with self._lock:
+            self._contracts.clear()
+
+
 class ContractRaw:
     """
     Класс для хранения информации о контракте.
@@ -48,19 +140,17 @@ class ContractRaw:
     @property
     def abi(self) -> list[dict]:
         """
-        Ленивый геттер abi контракта, загружает его из файла при первом обращении.
+        Ленивый геттер abi контракта, берет его из общего AbiRegistry, файл читается один раз за процесс.
         :return: abi контракта
         """
         if not self._abi:
-            path = os.path.join(config.PATH_ABI, f'{self.abi_name}.json')
-            with open(path) as file:
-                self._abi = json.load(file)
+            self._abi = AbiRegistry.get(self.abi_name)
         return self._abi
 
 
     def get_contract_instance(self, w3: Web3) -> Contract:
         """
-        Возвращает экземпляр контракта.
+        Возвращает экземпляр контракта, для повторных вызовов через одно подключение используйте ContractCache.
         :param w3: экземпляр Web3
         :return: экземпляр контракта
         """
@@ -6,8 +6,10 @@ from config import config, Chains, Tokens
 from core.bot import Bot
 from core.onchain import Onchain
 from core.excel import Excel
+from core.storage import get_table
 from models.account import Account
 from utils.logging import init_logger, send_telegram_message
+from utils.pool import run_pool
 from utils.utils import random_sleep, get_accounts, generate_password, get_price_token, shuffle_account, \
     get_multiplayer
 
@@ -33,25 +35,26 @@ def main():
         # перемешиваем аккаунты если включен режим случайного выбора
         shuffle_account(accounts_for_work)
 
-        # Перебираем аккаунты
-        for account in accounts_for_work:
-            # передаем аккаунт в функцию worker
-            worker(account)
-            # Пауза между профилями
-            random_sleep(*config.pause_between_profile)
+        # Перебираем аккаунты, передаем каждый в функцию worker,
+        # при config.threads > 1 аккаунты обрабатываются параллельно
+        results = run_pool(accounts_for_work, worker, initializer=init_logger)
 
-        logger.success(f'Цикл {i + 1} завершен, обработано {len(accounts_for_work)} аккаунтов')
+        failed = [result.account.profile_number for result in results if not result.is_success]
+        logger.success(f'Цикл {i + 1} завершен, обработано {len(accounts_for_work)} аккаунтов, '
+                       f'с ошибками {len(failed)}')
+        if failed:
+            logger.warning(f'Профили с ошибками: {failed}')
         logger.info(f'Ожидание перед следующим циклом ~{config.pause_between_cycle[1]} секунд')
 
         # Пауза между циклами
         random_sleep(*config.pause_between_cycle)
 
 
-def worker(account: Account) -> None:
+def worker(account: Account) -> bool:
     """
     Функция Воркера, который создает бота, передает ему аккаунт и вызывает функции активностей передавая туда бота.
     :param account: аккаунт
-    :return: None
+    :return: True, если аккаунт отработал без ошибок
     """
     # Создаем бота, если в конфиге включен is_browser_run, то будет запущен браузер
     try:
@@ -59,8 +62,10 @@ def worker(account: Account) -> None:
             # Вызываем функцию activity и передаем в нее бота
             activity(bot)
             # сюда по необходимости добавляем другие функции с активностями
+        return bot.error is None
     except Exception as e:
         logger.critical(f"{account.profile_number} Ошибка при инициализации Bot: {e}")
+        return False
 
 
 def schedule_and_filter(accounts: list[Account]) -> list[Account]:
@@ -81,7 +86,7 @@ def schedule_and_filter(accounts: list[Account]) -> list[Account]:
     accounts_for_work = []
 
     # подключение к таблице со статистикой, без аккаунта
-    excel = Excel(file='report.xlsx')
+    excel = get_table(file='report.xlsx')
     # получаем общую статистику
     swap_counters = excel.get_counters('Swap')
     average_counter = sum(swap_counters) / len(swap_counters)
@@ -96,7 +101,7 @@ def schedule_and_filter(accounts: list[Account]) -> list[Account]:
         excel.connect_account(account)
 
         # проверяем статус профиля в таблице
-        status = excel.get_counter('Status')
+        status = excel.get_cell('Status')
         if status != 'Work':
             continue
 
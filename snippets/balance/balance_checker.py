@@ -23,18 +23,24 @@ def activity(bot: Bot):
     for chain in chains:
         chain_instance = Onchain(bot.account, chain)
         tokens = Tokens.get_tokens_by_chain(chain)
-        balance = chain_instance.get_balance()
-        logger.info(f'Баланс {chain.native_token} на сети {chain.name}: {balance}')
-        excel.set_cell(f'{chain.name} {chain.native_token}', balance.ether)
-        if not prices.get(chain.native_token, 0):
-            price = get_price_token(chain.native_token)
-            prices[chain.native_token] = price
-        usd_balance = balance.ether * prices[chain.native_token]
-        excel.set_cell(f'$ {chain.name} {chain.native_token}', usd_balance)
-
-
-        for token in tokens:
-            balance = chain_instance.get_balance(token=token)
+        # нативный баланс и балансы всех токенов сети одним запросом multicall
+        native_balances, *tokens_balances = chain_instance.get_balances([None] + tokens)
+        balance = native_balances[0]
+        if balance is None:
+            logger.error(f'Не удалось получить баланс {chain.native_token} на сети {chain.name}')
+        else:
+            logger.info(f'Баланс {chain.native_token} на сети {chain.name}: {balance}')
+            excel.set_cell(f'{chain.name} {chain.native_token}', balance.ether)
+            if not prices.get(chain.native_token, 0):
+                price = get_price_token(chain.native_token)
+                prices[chain.native_token] = price
+            usd_balance = balance.ether * prices[chain.native_token]
+            excel.set_cell(f'$ {chain.name} {chain.native_token}', usd_balance)
+
+        for token, (balance,) in zip(tokens, tokens_balances):
+            if balance is None:
+                logger.error(f'Не удалось получить баланс {token.symbol} на сети {chain.name}')
+                continue
 
             logger.info(f'Баланс {token.symbol} на сети {chain.name}: {balance}')
             excel.set_cell(f'{chain.name} {token.symbol}', balance.ether)
@@ -45,3 +51,5 @@ def activity(bot: Bot):
                 usd_balance = balance.ether * prices[token.symbol]
                 excel.set_cell(f'$ {chain.name} {token.symbol}', usd_balance)
 
+    # сохраняем все записанные балансы аккаунта в файл одним сохранением
+    excel.flush()
@@ -0,0 +1,87 @@
+"""
+Бенчмарк отчета по портфелю: ACCOUNTS аккаунтов по TOKENS токенов. Сравнивается расчет по одному Amount
+(как в balance_checker) и AmountArray на токен: сумма по токену, стоимость в $ каждого аккаунта и портфеля.
+
+Запуск из корня проекта:
+    python -m snippets.benchmarks.amount_array
+"""
+import random
+import time
+
+from models import amount as amount_module
+from models.amount import Amount, AmountArray
+
+ACCOUNTS = 10_000  # аккаунтов в отчете
+TOKENS = 50  # токенов на аккаунт
+
+
+def prepare() -> tuple[list[int], list[float], list[list[int]]]:
+    """
+    Случайные балансы в wei до 1000 токенов.
+    :return: (decimals токенов, цены токенов, балансы [токен][аккаунт])
+    """
+    random.seed(1)
+    decimals = [random.choice((6, 8, 18)) for _ in range(TOKENS)]
+    prices = [random.uniform(0.01, 4000) for _ in range(TOKENS)]
+    balances = [[random.randrange(1000 * 10 ** token_decimals) for _ in range(ACCOUNTS)] for token_decimals in decimals]
+    return decimals, prices, balances
+
+
+def report_amounts(amounts: list[list[Amount]], prices: list[float]) -> tuple[list[Amount], list[float]]:
+    """
+    Отчет по одному Amount.
+    :return: (сумма по каждому токену, стоимость портфеля каждого аккаунта в $)
+    """
+    totals = []
+    usd = [0.0] * ACCOUNTS
+    for token_amounts, price in zip(amounts, prices):
+        total = token_amounts[0]
+        for amount in token_amounts[1:]:
+            total += amount
+        totals.append(total)
+        for i, amount in enumerate(token_amounts):
+            usd[i] += amount.ether * price
+    return totals, usd
+
+
+def report_arrays(arrays: list[AmountArray], prices: list[float]) -> tuple[list[Amount], list[float]]:
+    """
+    Отчет по AmountArray.
+    :return: (сумма по каждому токену, стоимость портфеля каждого аккаунта в $)
+    """
+    totals = [array.sum() for array in arrays]
+    usd = [0.0] * ACCOUNTS
+    for array, price in zip(arrays, prices):
+        token_usd = array.to_usd(price)
+        usd = usd + token_usd if amount_module.np is not None else [a + b for a, b in zip(usd, token_usd)]
+    return totals, list(usd)
+
+
+def measure(name: str, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print(f'{name:>30}: {(time.perf_counter() - start) * 1000:9.1f} мс')
+    return result
+
+
+def main():
+    decimals, prices, balances = prepare()
+    backend = 'numpy' if amount_module.np is not None else 'списки (numpy не установлен)'
+    print(f'{ACCOUNTS} аккаунтов x {TOKENS} токенов, AmountArray: {backend}')
+
+    amounts = measure('создание Amount', lambda: [[Amount(wei, token_decimals, wei=True) for wei in token_balances]
+                                                  for token_decimals, token_balances in zip(decimals, balances)])
+    arrays = measure('создание AmountArray', lambda: [AmountArray(token_balances, token_decimals, wei=True)
+                                                      for token_decimals, token_balances in zip(decimals, balances)])
+    measure('AmountArray из Amount', lambda: [AmountArray.from_amounts(token_amounts) for token_amounts in amounts])
+
+    totals, usd = measure('отчет по Amount', report_amounts, amounts, prices)
+    array_totals, array_usd = measure('отчет по AmountArray', report_arrays, arrays, prices)
+
+    assert [total.wei for total in totals] == [total.wei for total in array_totals]
+    max_error = max(abs(a - b) / max(a, 1e-9) for a, b in zip(usd, array_usd))
+    print(f'{"суммы по токенам":>30}: совпадают, отклонение $ {max_error:.1e}')
+
+
+if __name__ == '__main__':
+    main()
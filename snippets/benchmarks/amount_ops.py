@@ -0,0 +1,101 @@
+"""
+Бенчмарк Amount: время на операцию и память на объект для прежней реализации (Decimal и float считаются
+в конструкторе, арифметика через float) и текущей (только целый wei, ether считается при обращении).
+
+Запуск из корня проекта:
+    python -m snippets.benchmarks.amount_ops
+"""
+import timeit
+import tracemalloc
+from decimal import Decimal
+
+from models.amount import Amount
+
+REPEAT = 5  # сколько раз повторить замер, берется лучший
+NUMBER = 20_000  # операций в одном замере
+OBJECTS = 10_000  # объектов для замера памяти
+WEI = 1_234_567_890_123_456_789
+
+
+class LegacyAmount:
+    """
+    Копия прежней реализации Amount (конструктор и операции из замера) для сравнения.
+    """
+
+    def __init__(self, amount, decimals=18, wei=False):
+        if wei:
+            self.wei = int(amount)
+            self.ether_decimal = Decimal(str(amount)) / 10 ** decimals
+            self.ether = float(self.ether_decimal)
+        else:
+            self.wei = int(amount * 10 ** decimals)
+            self.ether_decimal = Decimal(str(amount))
+            self.ether = float(self.ether_decimal)
+        self.decimals = decimals
+
+    def __add__(self, other):
+        return LegacyAmount(self.wei + other.wei, decimals=self.decimals, wei=True)
+
+    def __mul__(self, other):
+        if isinstance(other, LegacyAmount):
+            return LegacyAmount(self.ether * other.ether, decimals=self.decimals)
+        return LegacyAmount(self.ether * other, decimals=self.decimals)
+
+    def __truediv__(self, other):
+        return LegacyAmount(self.ether / other, decimals=self.decimals)
+
+    def __lt__(self, other):
+        return self.ether < other
+
+
+def measure(cls) -> dict[str, float]:
+    """
+    Замеряет время операций для класса суммы.
+    :param cls: LegacyAmount или Amount
+    :return: {операция: микросекунд на операцию}
+    """
+    a = cls(WEI, wei=True)
+    b = cls(2.5)
+    operations = {
+        'из wei': lambda: cls(WEI, wei=True),
+        'из float': lambda: cls(1.2345),
+        'чтение wei': lambda: cls(WEI, wei=True).wei,
+        'a + b': lambda: a + b,
+        'a * b': lambda: a * b,
+        'a * 1.1': lambda: a * 1.1,
+        'a / 3': lambda: a / 3,
+        'a < 1.5': lambda: a < 1.5,
+    }
+    return {name: min(timeit.repeat(operation, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e6
+            for name, operation in operations.items()}
+
+
+def measure_memory(cls) -> float:
+    """
+    Замеряет память на один объект, созданный из wei.
+    :param cls: LegacyAmount или Amount
+    :return: байт на объект
+    """
+    tracemalloc.start()
+    amounts = [cls(WEI + i, wei=True) for i in range(OBJECTS)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del amounts
+    return size / OBJECTS
+
+
+def main():
+    before, after = measure(LegacyAmount), measure(Amount)
+    print(f'{"операция":>12} {"было, мкс":>10} {"стало, мкс":>11} {"ускорение":>10}')
+    for name in before:
+        print(f'{name:>12} {before[name]:10.2f} {after[name]:11.2f} {before[name] / after[name]:9.1f}x')
+
+    memory_before, memory_after = measure_memory(LegacyAmount), measure_memory(Amount)
+    print(f'{"память":>12} {memory_before:8.0f} Б {memory_after:9.0f} Б {memory_before / memory_after:9.1f}x')
+
+    # точность: прежняя реализация теряет младшие wei при умножении через float
+    print(f'{"точность":>12} {(LegacyAmount(WEI, wei=True) * 3).wei:>30} -> {(Amount(WEI, wei=True) * 3).wei}')
+
+
+if __name__ == '__main__':
+    main()
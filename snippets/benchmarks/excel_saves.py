@@ -0,0 +1,76 @@
+"""
+Бенчмарк записи в Excel: сколько раз сохраняется файл и сколько времени уходит на аккаунт
+в обычном и буферизованном режиме.
+
+Запуск из корня проекта:
+    python -m snippets.benchmarks.excel_saves
+"""
+import os
+import tempfile
+import time
+
+from openpyxl import Workbook
+
+from config import config
+from core.excel import Excel
+from models.account import Account
+
+ROWS = 500  # строк в таблице
+ACCOUNTS = 5  # сколько аккаунтов обработать
+CELLS_PER_ACCOUNT = 30  # сколько ячеек пишет активность, как balance_checker
+
+
+def prepare_table(path: str) -> None:
+    """
+    Создает таблицу с ROWS аккаунтами и CELLS_PER_ACCOUNT столбцами.
+    :param path: путь к файлу
+    """
+    table = Workbook()
+    sheet = table.active
+    sheet.append(['Profile Number'] + [f'Column {i}' for i in range(CELLS_PER_ACCOUNT)])
+    for profile_number in range(1, ROWS + 1):
+        sheet.append([str(profile_number)] + [0] * CELLS_PER_ACCOUNT)
+    table.save(path)
+
+
+def run(is_buffered: bool) -> tuple[float, float]:
+    """
+    Пишет CELLS_PER_ACCOUNT ячеек для ACCOUNTS аккаунтов.
+    :param is_buffered: буферизованный режим Excel
+    :return: (сохранений на аккаунт, секунд на аккаунт)
+    """
+    saves = 0
+    original_save = Workbook.save
+
+    def counting_save(self, filename):
+        nonlocal saves
+        saves += 1
+        return original_save(self, filename)
+
+    Workbook.save = counting_save
+    try:
+        start = time.perf_counter()
+        for profile_number in range(1, ACCOUNTS + 1):
+            excel = Excel(Account(profile_number), file='benchmark.xlsx', is_buffered=is_buffered)
+            for i in range(CELLS_PER_ACCOUNT):
+                excel.set_cell(f'Column {i}', profile_number * i)
+            excel.flush()
+        duration = time.perf_counter() - start
+    finally:
+        Workbook.save = original_save
+    return saves / ACCOUNTS, duration / ACCOUNTS
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config.PATH_DATA = tmp_dir
+        prepare_table(os.path.join(tmp_dir, 'benchmark.xlsx'))
+
+        for is_buffered in (False, True):
+            saves, seconds = run(is_buffered)
+            mode = 'буферизованный' if is_buffered else 'обычный'
+            print(f'{mode:>15}: {saves:5.1f} сохранений на аккаунт, {seconds * 1000:8.1f} мс на аккаунт')
+
+
+if __name__ == '__main__':
+    main()
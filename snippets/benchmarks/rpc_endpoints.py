@@ -0,0 +1,249 @@
+"""
+Бенчмарк RPC из config/chains.py: задержка (p50/p95/p99), пропускная способность при параллельных запросах,
+поддержка batch запросов, максимальный размер batch и поведение при превышении лимита запросов.
+
+Отчет сохраняется в logs/rpc_benchmark.json и logs/rpc_benchmark.csv.
+
+Запуск из корня проекта:
+    python -m snippets.benchmarks.rpc_endpoints                      # все сети из Chains
+    python -m snippets.benchmarks.rpc_endpoints --chains ethereum bsc
+    python -m snippets.benchmarks.rpc_endpoints --stub               # локальная заглушка RPC без сети, для CI
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from config import config
+from config.chains import Chains
+from core.providers import MultiRpcProvider
+
+LATENCY_REQUESTS = 50  # последовательных запросов для замера задержки
+THROUGHPUT_REQUESTS = 200  # запросов для замера пропускной способности
+CONCURRENCY = 20  # одновременных запросов при замере пропускной способности
+MAX_BATCH_SIZE = 1000  # до какого размера проверять batch запросы
+TIMEOUT = 10  # таймаут запроса в секундах
+
+STUB_MAX_BATCH_SIZE = 100  # максимальный размер batch в заглушке
+STUB_RATE_LIMIT = 100  # запросов в секунду, после которых заглушка отвечает ошибкой 429
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Локальная заглушка JSON-RPC: отвечает на любые запросы номером блока, принимает batch до STUB_MAX_BATCH_SIZE
+    запросов и отвечает ошибкой 429 после STUB_RATE_LIMIT запросов в секунду.
+    """
+    window_started = 0.0
+    window_requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.lock:
+            now = time.monotonic()
+            if now - StubHandler.window_started >= 1:
+                StubHandler.window_started = now
+                StubHandler.window_requests = 0
+            StubHandler.window_requests += 1
+            is_limited = StubHandler.window_requests > STUB_RATE_LIMIT
+
+        time.sleep(0.002)
+        if is_limited:
+            self._send({'jsonrpc': '2.0', 'id': None, 'error': {'code': 429, 'message': 'Too many requests'}})
+        elif isinstance(body, list) and len(body) > STUB_MAX_BATCH_SIZE:
+            self._send({'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'batch too large'}})
+        elif isinstance(body, list):
+            self._send([{'jsonrpc': '2.0', 'id': item['id'], 'result': '0x10'} for item in body])
+        else:
+            self._send({'jsonrpc': '2.0', 'id': body['id'], 'result': '0x10'})
+
+    def _send(self, response: dict | list) -> None:
+        data = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = CONCURRENCY * 2
+
+
+def start_stub() -> str:
+    """
+    Запускает заглушку RPC в фоновом потоке.
+    :return: адрес заглушки
+    """
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def call(session: requests.Session, rpc: str, payload: dict | list) -> tuple[float, dict | list | None, str]:
+    """
+    Отправляет JSON-RPC запрос.
+    :param session: сессия requests
+    :param rpc: адрес RPC
+    :param payload: запрос или список запросов
+    :return: (задержка в секундах, ответ или None, статус: ok, rate_limited или error)
+    """
+    start = time.perf_counter()
+    try:
+        response = session.post(rpc, json=payload, timeout=TIMEOUT)
+        latency = time.perf_counter() - start
+        if response.status_code == 429:
+            return latency, None, 'rate_limited'
+        data = response.json()
+    except (requests.RequestException, ValueError):
+        return time.perf_counter() - start, None, 'error'
+
+    if MultiRpcProvider.is_rate_limited(data):
+        return latency, data, 'rate_limited'
+    if isinstance(data, dict) and 'error' in data:
+        return latency, data, 'error'
+    return latency, data, 'ok'
+
+
+def percentile(values: list[float], percent: int) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def request_payload(request_id: int = 1) -> dict:
+    return {'jsonrpc': '2.0', 'id': request_id, 'method': 'eth_blockNumber', 'params': []}
+
+
+def measure_latency(session: requests.Session, rpc: str) -> dict:
+    """
+    Замеряет задержку последовательных запросов.
+    """
+    latencies = []
+    errors = 0
+    for _ in range(LATENCY_REQUESTS):
+        latency, _, status = call(session, rpc, request_payload())
+        if status == 'ok':
+            latencies.append(latency)
+        else:
+            errors += 1
+    return {
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'latency_errors': errors,
+    }
+
+
+def measure_throughput(session: requests.Session, rpc: str) -> dict:
+    """
+    Замеряет пропускную способность при CONCURRENCY одновременных запросах и сколько из них упираются в лимит.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        results = list(executor.map(lambda i: call(session, rpc, request_payload(i)), range(THROUGHPUT_REQUESTS)))
+    duration = time.perf_counter() - start
+
+    statuses = [status for _, _, status in results]
+    # номер первого запроса, на котором RPC начал отвечать ошибкой лимита
+    first_limited = statuses.index('rate_limited') + 1 if 'rate_limited' in statuses else None
+    return {
+        'requests_per_second': round(statuses.count('ok') / duration, 1),
+        'ok': statuses.count('ok'),
+        'rate_limited': statuses.count('rate_limited'),
+        'errors': statuses.count('error'),
+        'first_rate_limited_request': first_limited,
+    }
+
+
+def measure_batch(session: requests.Session, rpc: str) -> dict:
+    """
+    Проверяет поддержку batch запросов и ищет максимальный размер batch удвоением размера.
+    """
+    max_size = 0
+    size = 1
+    while size <= MAX_BATCH_SIZE:
+        _, data, status = call(session, rpc, [request_payload(i) for i in range(size)])
+        is_ok = (status == 'ok' and isinstance(data, list) and len(data) == size
+                 and all('result' in item for item in data))
+        if not is_ok:
+            break
+        max_size = size
+        size *= 2
+    return {'is_batch_supported': max_size > 1, 'max_batch_size': max_size}
+
+
+def benchmark(chain_name: str, rpc: str) -> dict:
+    """
+    Выполняет все замеры для одного RPC.
+    :param chain_name: название сети
+    :param rpc: адрес RPC
+    :return: строка отчета
+    """
+    with requests.Session() as session:
+        session.headers.update({'Content-Type': 'application/json'})
+        result = {'chain': chain_name, 'rpc': rpc}
+        result.update(measure_latency(session, rpc))
+        result.update(measure_batch(session, rpc))
+        # пропускная способность последней, чтобы лимит запросов не исказил остальные замеры
+        result.update(measure_throughput(session, rpc))
+    return result
+
+
+def save_report(results: list[dict], path: str) -> None:
+    """
+    Сохраняет отчет в json и csv.
+    :param results: строки отчета
+    :param path: путь к файлу отчета без расширения
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f'{path}.json', 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+    if results:
+        with open(f'{path}.csv', 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк RPC сетей из config/chains.py')
+    parser.add_argument('--chains', nargs='*', help='названия сетей, по умолчанию все сети')
+    parser.add_argument('--stub', action='store_true', help='замерять локальную заглушку RPC вместо настоящих RPC')
+    parser.add_argument('--output', default=os.path.join(config.PATH_LOG, 'rpc_benchmark'),
+                        help='путь к отчету без расширения')
+    args = parser.parse_args()
+
+    chains = [Chains.get_chain(name) for name in args.chains] if args.chains else Chains.get_chains_list()
+    stub_rpc = start_stub() if args.stub else None
+
+    results = []
+    for chain in chains:
+        for rpc in [stub_rpc] if stub_rpc else chain.rpcs:
+            result = benchmark(chain.name, rpc)
+            results.append(result)
+            print(f'{chain.name:>15} {rpc}: p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} мс, '
+                  f'{result["requests_per_second"]} запросов/с, batch до {result["max_batch_size"]}, '
+                  f'лимит {result["rate_limited"]}/{THROUGHPUT_REQUESTS}')
+
+    save_report(results, args.output)
+    print(f'Отчет сохранен в {args.output}.json и {args.output}.csv')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from eth_account.hdaccount import seed_from_mnemonic
+from eth_keys import keys
+
+# BIP-44 путь m/44'/60'/0'/0 до ключей Ethereum (как в MetaMask), номер ключа добавляется последним элементом пути
+# 44' - BIP-44 стандарт, 60' - Ethereum coin type, 0' - account number, 0 - change (0 для внешних адресов)
+HARDENED = 0x80000000
+ETHEREUM_PARENT_PATH = (44 + HARDENED, 60 + HARDENED, 0 + HARDENED, 0)
+# порядок группы точек кривой secp256k1
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+# с какого количества seed фраз имеет смысл запускать процессы
+PARALLEL_SEEDS_THRESHOLD = 16
+
+
+def _hmac_sha512(key: bytes, data: bytes) -> bytes:
+    return hmac.new(key, data, hashlib.sha512).digest()
+
+
+def _get_public_key(private_key: bytes) -> bytes:
+    """
+    Сжатый публичный ключ (33 байта) для приватного ключа.
+    """
+    return keys.PrivateKey(private_key).public_key.to_compressed_bytes()
+
+
+def _derive_child_key(parent_key: bytes, chain_code: bytes, index: int,
+                      parent_public_key: bytes | None = None) -> tuple[bytes, bytes]:
+    """
+    BIP-32 деривация дочернего приватного ключа. Для обычного (не hardened) номера нужен публичный ключ родителя,
+    его можно передать заранее посчитанным, чтобы не вычислять точку кривой для каждого номера.
+    :param parent_key: приватный ключ родителя
+    :param chain_code: chain code родителя
+    :param index: номер дочернего ключа, для hardened номеров с прибавленным HARDENED
+    :param parent_public_key: сжатый публичный ключ родителя
+    :return: (приватный ключ, chain code) дочернего узла
+    :raises ValueError: если ключ с этим номером невалиден (вероятность меньше 1 к 2**127),
+        по BIP-32 такой номер пропускается, используйте следующий
+    """
+    if index >= HARDENED:
+        data = b'\x00' + parent_key
+    else:
+        data = parent_public_key or _get_public_key(parent_key)
+    child = _hmac_sha512(chain_code, data + index.to_bytes(4, 'big'))
+    tweak = int.from_bytes(child[:32], 'big')
+    child_key = (tweak + int.from_bytes(parent_key, 'big')) % SECP256K1_N
+    if tweak >= SECP256K1_N or child_key == 0:
+        raise ValueError(f'Ключ с номером {index} невалиден по BIP-32 и должен быть пропущен, '
+                         f'используйте следующий номер')
+    return child_key.to_bytes(32, 'big'), child[32:]
+
+
+@lru_cache(maxsize=128)
+def _get_parent_node(seed: str) -> tuple[bytes, bytes, bytes]:
+    """
+    Вычисляет узел m/44'/60'/0'/0 для seed фразы один раз: 2048 раундов PBKDF2 и деривация до родительского узла
+    выполняются только при первом обращении, все номера ключей считаются от сохраненного узла.
+    :param seed: seed фраза
+    :return: (приватный ключ узла, chain code, сжатый публичный ключ узла)
+    """
+    master_node = _hmac_sha512(b'Bitcoin seed', seed_from_mnemonic(seed, ''))
+    key, chain_code = master_node[:32], master_node[32:]
+    for index in ETHEREUM_PARENT_PATH:
+        key, chain_code = _derive_child_key(key, chain_code, index)
+    return key, chain_code, _get_public_key(key)
+
+
+def _normalize_seed(seed: str | list) -> str:
+    if isinstance(seed, list):
+        seed = ' '.join(seed)
+    return ' '.join(seed.split())
+
+
+def _derive_child(parent_key: bytes, chain_code: bytes, parent_public_key: bytes, index: int) -> bytes:
+    """
+    Приватный ключ с номером index от родительского узла m/44'/60'/0'/0.
+    """
+    return _derive_child_key(parent_key, chain_code, index, parent_public_key)[0]
+
+
+def get_pk_from_seed(seed: str | list, index: int = 0) -> str:
+    """
+    Получение приватного ключа из seed фразы по пути m/44'/60'/0'/0/{index} (как в MetaMask).
+    Результат совпадает с EthAccount.from_mnemonic, но растяжение seed выполняется один раз на фразу.
+    :param seed: seed фраза в виде строки или списка слов
+    :param index: номер приватного ключа (0, 1, 2, ...)
+    :return: приватный ключ в формате hex строки без 0x
+    :raises ValueError: если ключ с этим номером невалиден по BIP-32
+    """
+    return _derive_child(*_get_parent_node(_normalize_seed(seed)), index).hex()
+
+
+def get_pks_from_seed(seed: str | list, count: int, start: int = 0) -> list[str]:
+    """
+    Получение нескольких приватных ключей подряд из одной seed фразы.
+    :param seed: seed фраза в виде строки или списка слов
+    :param count: количество ключей
+    :param start: номер первого ключа
+    :return: список приватных ключей с номерами start, start + 1, ...
+    """
+    parent = _get_parent_node(_normalize_seed(seed))
+    return [_derive_child(*parent, index).hex() for index in range(start, start + count)]
+
+
+def get_pks_from_seeds(seeds: list[str | list], index: int = 0, processes: int | None = None) -> list[str]:
+    """
+    Получение приватных ключей для списка seed фраз, например для заполнения файла аккаунтов.
+    Растяжение каждой фразы (PBKDF2) занимает десятки миллисекунд, поэтому большие списки
+    распределяются по процессам.
+    :param seeds: список seed фраз
+    :param index: номер ключа для каждой фразы
+    :param processes: количество процессов, по умолчанию количество ядер процессора
+    :return: список приватных ключей в порядке фраз
+
+    Examples:
+        >>> private_keys = get_pks_from_seeds(get_list_from_file('seeds.txt'))
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(seeds) < PARALLEL_SEEDS_THRESHOLD:
+        return [get_pk_from_seed(seed, index) for seed in seeds]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        chunksize = max(1, len(seeds) // (processes * 4))
+        return list(executor.map(get_pk_from_seed, seeds, [index] * len(seeds), chunksize=chunksize))
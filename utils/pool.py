@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Any
+
+from loguru import logger
+
+from config.settings import config
+from core.excel import Excel
+from models.account import Account
+from utils.utils import random_sleep
+
+
+class WorkerResult:
+    """
+    Результат работы воркера над одним аккаунтом.
+
+    - account - аккаунт, с которым работал воркер
+    - is_success - True, если воркер отработал без ошибок и не вернул False
+    - error - текст ошибки, если воркер выбросил исключение
+    - duration - время работы воркера в секундах
+    """
+
+    def __init__(self, account: Account, is_success: bool, error: str | None = None, duration: float = 0.0) -> None:
+        self.account = account
+        self.is_success = is_success
+        self.error = error
+        self.duration = duration
+
+    def __repr__(self) -> str:
+        return (f'WorkerResult(profile_number={self.account.profile_number}, is_success={self.is_success}, '
+                f'error={self.error}, duration={self.duration:.1f})')
+
+
+def _run_one(worker: Callable[[Account], Any], account: Account) -> WorkerResult:
+    """
+    Запускает воркер для одного аккаунта, перехватывает ошибки и делает паузу между профилями.
+    :param worker: функция воркера, принимает аккаунт, может вернуть False в случае неудачи
+    :param account: аккаунт
+    :return: результат работы воркера
+    """
+    start = time.perf_counter()
+    try:
+        result = worker(account)
+        is_success, error = result is not False, None
+    except Exception as e:
+        logger.critical(f'{account.profile_number} Ошибка в воркере: {e}')
+        is_success, error = False, str(e)
+    duration = time.perf_counter() - start
+
+    # atexit не вызывается в процессах пула, поэтому накопленные изменения всех таблиц процесса
+    # (не только bot.excel, но и report.xlsx, balances.xlsx) сохраняются после каждого аккаунта
+    if multiprocessing.parent_process() is not None:
+        Excel.flush_all()
+
+    # пауза между профилями внутри каждого воркера, чтобы не запускать профили пачкой
+    random_sleep(*config.pause_between_profile)
+    return WorkerResult(account, is_success, error, duration)
+
+
+def run_pool(
+        accounts: list[Account],
+        worker: Callable[[Account], Any],
+        threads: int | None = None,
+        mode: str | None = None,
+        initializer: Callable[[], Any] | None = None
+) -> list[WorkerResult]:
+    """
+    Запускает воркер для каждого аккаунта в несколько потоков или процессов.
+
+    Аккаунты подаются воркерам через ограниченную очередь, поэтому в памяти одновременно
+    находится не больше threads * 2 задач. Каждый аккаунт обрабатывается своим ботом,
+    ошибки одного аккаунта не останавливают остальные.
+
+    :param accounts: список аккаунтов
+    :param worker: функция воркера, принимает аккаунт, может вернуть False в случае неудачи
+    :param threads: количество одновременных воркеров, по умолчанию config.threads
+    :param mode: 'thread' или 'process', по умолчанию config.workers_mode
+    :param initializer: функция, которая вызывается при старте каждого процесса (например init_logger)
+    :return: список результатов в порядке завершения
+
+    Examples:
+        >>> results = run_pool(accounts, worker, threads=10)
+        >>> failed = [r.account.profile_number for r in results if not r.is_success]
+    """
+    threads = threads or config.threads
+    mode = mode or config.workers_mode
+
+    if threads <= 1:
+        return [_run_one(worker, account) for account in accounts]
+
+    if mode == 'process':
+        return _run_processes(accounts, worker, threads, initializer)
+    if mode == 'thread':
+        return _run_threads(accounts, worker, threads)
+    raise ValueError(f'Неизвестный режим работы воркеров {mode}, используйте thread или process')
+
+
+def _run_threads(accounts: list[Account], worker: Callable[[Account], Any], threads: int) -> list[WorkerResult]:
+    """
+    Запуск воркеров в потоках с ограниченной очередью аккаунтов.
+    :param accounts: список аккаунтов
+    :param worker: функция воркера
+    :param threads: количество потоков
+    :return: список результатов
+    """
+    tasks: queue.Queue[Account | None] = queue.Queue(maxsize=threads * 2)
+    results = []
+    results_lock = threading.Lock()
+
+    def consumer() -> None:
+        while True:
+            account = tasks.get()
+            if account is None:
+                return
+            result = _run_one(worker, account)
+            with results_lock:
+                results.append(result)
+
+    pool = [threading.Thread(target=consumer, name=f'worker-{i}', daemon=True) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+
+    for account in accounts:
+        tasks.put(account)
+    for _ in pool:
+        tasks.put(None)
+
+    for thread in pool:
+        thread.join()
+    return results
+
+
+def _run_processes(
+        accounts: list[Account],
+        worker: Callable[[Account], Any],
+        processes: int,
+        initializer: Callable[[], Any] | None
+) -> list[WorkerResult]:
+    """
+    Запуск воркеров в отдельных процессах. Воркер должен быть объявлен на уровне модуля,
+    чтобы его можно было передать в другой процесс.
+    :param accounts: список аккаунтов
+    :param worker: функция воркера
+    :param processes: количество процессов
+    :param initializer: функция инициализации процесса
+    :return: список результатов
+    """
+    if config.accounts_source == 'excel' or config.statistics_backend == 'excel':
+        logger.warning('В режиме workers_mode = \'process\' каждый процесс загружает xlsx таблицы отдельно '
+                       'и перезаписывает файл целиком, записи других процессов могут потеряться. '
+                       'Для записи в таблицы используйте workers_mode = \'thread\' или statistics_backend = \'sqlite\'')
+
+    results = []
+    pending: dict[Future, Account] = {}
+
+    def collect(done: set[Future]) -> None:
+        # ошибка одного процесса (например, BrokenProcessPool) не должна терять уже собранные результаты
+        for future in done:
+            account = pending.pop(future)
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.critical(f'{account.profile_number} Процесс воркера завершился с ошибкой: {e}')
+                results.append(WorkerResult(account, False, str(e)))
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=initializer) as executor:
+        for account in accounts:
+            # держим в очереди не больше processes * 2 задач
+            if len(pending) >= processes * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            try:
+                pending[executor.submit(_run_one, worker, account)] = account
+            except BrokenProcessPool as e:
+                logger.critical(f'{account.profile_number} Пул процессов остановлен, аккаунт не запущен: {e}')
+                results.append(WorkerResult(account, False, str(e)))
+
+        done, _ = wait(pending)
+        collect(done)
+    return results
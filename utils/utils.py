@@ -7,7 +7,7 @@ import secrets
 import string
 import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Optional, Any
+from typing import Optional, Any, Iterator
 
 import requests
 from eth_typing import ChecksumAddress
@@ -15,6 +15,7 @@ from requests.adapters import HTTPAdapter
 from urllib3 import Retry
 from web3 import Web3
 from loguru import logger
+from openpyxl import load_workbook
 
 from config.settings import config
 from core.excel import Excel
@@ -48,9 +49,11 @@ def get_accounts() -> list[Account]:
     :return: генератор аккаунтов
     """
     if config.accounts_source == 'excel':
-        accounts_raw_data = get_from_excel()
-    else:
-        accounts_raw_data = get_accounts_from_txt()
+        accounts = list(iter_accounts_from_excel())
+        logger.info(f"Извлечено {len(accounts)} аккаунтов")
+        return accounts
+
+    accounts_raw_data = get_accounts_from_txt()
 
     # Определяем количество аккаунтов
     length = len(accounts_raw_data[0])
@@ -67,19 +70,65 @@ def get_accounts() -> list[Account]:
     return accounts
 
 
+# столбцы таблицы аккаунтов в порядке аргументов Account
+ACCOUNT_COLUMNS = ("Profile Number", "Address", "Password", "Private Key", "Seed", "Proxy")
+
+
+def iter_rows_from_excel(file: str = 'accounts.xlsx') -> Iterator[tuple]:
+    """
+    Построчно читает данные аккаунтов из excel файла за один проход, не загружая таблицу целиком.
+    Таблица открывается в режиме только для чтения, строки без номера профиля пропускаются.
+    :param file: название файла в папке config/data
+    :return: генератор кортежей (profile_number, address, password, private_key, seed, proxy)
+    """
+    path = os.path.join(config.PATH_DATA, file)
+    if not os.path.exists(path):
+        # создаем файл со стандартными заголовками
+        Excel(file=file)
+    # сохраняем изменения, которые могли накопиться в памяти
+    Excel.flush_all()
+
+    table = load_workbook(path, read_only=True)
+    try:
+        rows = table.active.iter_rows(values_only=True)
+        header = next(rows, ())
+        indexes = [header.index(name) if name in header else None for name in ACCOUNT_COLUMNS]
+        for row in rows:
+            values = tuple(row[index] if index is not None and index < len(row) else None for index in indexes)
+            if values[0] is None:
+                continue
+            yield values
+    finally:
+        table.close()
+
+
+def iter_accounts_from_excel(file: str = 'accounts.xlsx') -> Iterator[Account]:
+    """
+    Ленивый генератор аккаунтов из excel файла, аккаунты создаются по мере чтения строк.
+    :param file: название файла в папке config/data
+    :return: генератор аккаунтов
+
+    Examples:
+        >>> for account in iter_accounts_from_excel():
+        ...     print(account.profile_number, account.address)
+    """
+    for profile_number, address, password, private_key, seed, proxy in iter_rows_from_excel(file):
+        yield Account(profile_number, address, password, private_key, seed, proxy)
+
+
 def get_from_excel() -> tuple[list[str], list[str], list[str], list[str], list[str], list[str]]:
     """
     Получает аккаунты из excel файла
     :return: кортеж списков аккаунтов
     """
-    excel = Excel(file='accounts.xlsx')
-    # Получаем данные из excel файла
-    profile_numbers = excel.get_column("Profile Number")
-    passwords = excel.get_column("Password")
-    addresses = excel.get_column("Address")
-    seeds = excel.get_column("Seed")
-    private_keys = excel.get_column("Private Key")
-    proxies = excel.get_column("Proxy")
+    profile_numbers, addresses, passwords, private_keys, seeds, proxies = [], [], [], [], [], []
+    for profile_number, address, password, private_key, seed, proxy in iter_rows_from_excel():
+        profile_numbers.append(profile_number)
+        addresses.append(address)
+        passwords.append(password)
+        private_keys.append(private_key)
+        seeds.append(seed)
+        proxies.append(proxy)
     return profile_numbers, addresses, passwords, private_keys, seeds, proxies
 
 
@@ -385,5 +434,13 @@ def get_user_agent() -> str:
     Получает случайный user-agent из файла user_agents.txt
     :return: user-agent
     """
-    user_agents = get_list_from_file("user_agents.txt")
-    return random.choice(user_agents)
\ No newline at end of file
+    return random.choice(_get_user_agents())
+
+
+@functools.lru_cache(maxsize=1)
+def _get_user_agents() -> list[str]:
+    """
+    Читает user_agents.txt один раз за запуск
+    :return: список user-agent
+    """
+    return get_list_from_file("user_agents.txt")
\ No newline at end of file